@@ -9,16 +9,43 @@ import logging
 import os
 import asyncio
 import sys
-from datetime import datetime
+import time
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+from pathlib import Path
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
 from mistralai import Mistral, UserMessage, SystemMessage
 
-from embeddings.embeddings import get_embeddings_model
+from embeddings.embeddings import env_flag, get_embeddings_model
+from embeddings.cache import QueryEmbeddingCache
+from embeddings.microbatch import QueryMicroBatcher
+from embeddings.loading import resident_memory_mb
 from vectors.vectors import load_vector_store, get_vector_store_stats
+from vectors.cascade import (
+    DEFAULT_CASCADE_CANDIDATES,
+    DEFAULT_CASCADE_SKIP_MARGIN,
+    CascadeRetriever,
+    load_cascade_index,
+)
+from vectors.filtering import (
+    DEFAULT_PREFILTER_SELECTIVITY,
+    FilteredSearcher,
+    MetadataIndex,
+)
+from vectors.index_factory import get_search_params_from_env
+from vectors.intervals import DateIntervalIndex, day_window
+from vectors.quantization import (
+    DEFAULT_RESCORE_FACTOR,
+    ExactRescorer,
+    load_exact_vectors,
+)
 from api.models import (
+    EventSummary,
+    EventsOnResponse,
+    SearchFilters,
     SearchQuery,
     SearchResult,
     SearchResponse,
@@ -58,6 +85,36 @@ MISTRAL_MODEL = os.getenv("MISTRAL_MODEL", "mistral-small-latest")
 MISTRAL_TEMPERATURE = float(os.getenv("MISTRAL_TEMPERATURE", "0.7"))
 RAG_TOP_K = int(os.getenv("RAG_TOP_K", "5"))
 
+# Micro-batching des requêtes concurrentes (désactivé si taille <= 1)
+EMBEDDINGS_MICROBATCH_SIZE = int(os.getenv("EMBEDDINGS_MICROBATCH_SIZE", "1"))
+EMBEDDINGS_MICROBATCH_WAIT_MS = float(os.getenv("EMBEDDINGS_MICROBATCH_WAIT_MS", "5"))
+# Forward de chauffe avant d'accepter des requêtes
+EMBEDDINGS_WARMUP = env_flag("EMBEDDINGS_WARMUP", True)
+
+# Recherche en cascade (index compact construit par le pipeline avec CASCADE_EMBEDDINGS_MODEL)
+FAISS_CASCADE_SEARCH = env_flag("FAISS_CASCADE_SEARCH", False)
+FAISS_CASCADE_CANDIDATES = int(
+    os.getenv("FAISS_CASCADE_CANDIDATES", str(DEFAULT_CASCADE_CANDIDATES))
+)
+# Écart cosinus au-delà duquel e5-large est évité: chaque requête reclassée
+# coûte deux encodages, plus qu'une recherche directe (voir vectors.cascade)
+FAISS_CASCADE_SKIP_MARGIN = float(
+    os.getenv("FAISS_CASCADE_SKIP_MARGIN", str(DEFAULT_CASCADE_SKIP_MARGIN))
+)
+
+# Reclassement par les vecteurs exacts conservés avec un index quantifié
+# (FAISS_KEEP_EXACT_VECTORS à la construction); désactivé si facteur <= 0
+FAISS_RESCORE_FACTOR = int(os.getenv("FAISS_RESCORE_FACTOR", str(DEFAULT_RESCORE_FACTOR)))
+
+# Paramètres de recherche IVF / HNSW (priment sur ceux enregistrés avec l'index)
+FAISS_SEARCH_PARAMS = get_search_params_from_env()
+# Recherche filtrée: sélectivité en dessous de laquelle FAISS est pré-filtré
+FAISS_PREFILTER_SELECTIVITY = float(
+    os.getenv("FAISS_PREFILTER_SELECTIVITY", str(DEFAULT_PREFILTER_SELECTIVITY))
+)
+# Index mappé en mémoire (lecture seule), partagé entre les workers
+FAISS_MMAP = env_flag("FAISS_MMAP", False)
+
 # Initialisation de l'application FastAPI
 app = FastAPI(
     title="API de recherche d'événements culturels",
@@ -77,6 +134,12 @@ app.add_middleware(
 # Variables globales pour le vector store et le modèle d'embeddings
 vector_store = None
 embeddings_model = None
+query_batcher = None
+cascade_retriever = None
+cascade_embeddings = None
+exact_rescorer = None
+filtered_searcher = None
+index_load_metrics = None
 mistral_client = None
 default_system_prompt = None
 
@@ -116,10 +179,161 @@ def load_system_prompt(file_path: str) -> str:
         raise
 
 
+def load_cascade_retriever():
+    """
+    Prépare la recherche en cascade si elle est activée et que l'index compact existe.
+
+    Le petit modèle n'est chargé qu'une fois; l'index compact est relu à
+    chaque appel (démarrage, rechargement après rebuild).
+
+    Returns:
+        CascadeRetriever: Recherche en cascade, ou None si indisponible
+    """
+    global cascade_embeddings
+
+    if not FAISS_CASCADE_SEARCH:
+        return None
+
+    loaded = load_cascade_index(FAISS_INDEX_PATH)
+    if loaded is None:
+        logger.warning(
+            "⚠️  Index de cascade introuvable (CASCADE_EMBEDDINGS_MODEL non défini "
+            "lors de la construction): recherche directe"
+        )
+        return None
+    small_index, info = loaded
+
+    if cascade_embeddings is None or cascade_embeddings.model_id != info["model_id"]:
+        logger.info(f"Chargement du modèle de cascade: {info['model_id']}")
+        # Options propres au petit modèle (CASCADE_EMBEDDINGS_BACKEND...): celles
+        # du modèle principal (ex: graphe ONNX d'e5-large) ne s'y appliquent pas
+        cascade_embeddings = get_embeddings_model(
+            model_id=info["model_id"],
+            device=EMBEDDINGS_DEVICE,
+            env_prefix="CASCADE_EMBEDDINGS_",
+        )
+
+    try:
+        retriever = CascadeRetriever(
+            vector_store,
+            cascade_embeddings,
+            small_index,
+            candidates=FAISS_CASCADE_CANDIDATES,
+            skip_margin=FAISS_CASCADE_SKIP_MARGIN,
+        )
+    except ValueError as e:
+        logger.warning(f"⚠️  {e}: recherche directe")
+        return None
+
+    logger.info(
+        f"✓ Recherche en cascade activée ({info['model_id']}, "
+        f"{FAISS_CASCADE_CANDIDATES} candidats, marge {FAISS_CASCADE_SKIP_MARGIN})"
+    )
+    return retriever
+
+
+def load_index():
+    """
+    Charge le vector store et mesure la durée et la mémoire du chargement.
+
+    Les métriques (exposées par /stats) permettent de comparer le chargement
+    complet et le chargement mappé en mémoire (FAISS_MMAP).
+
+    Returns:
+        FAISS: Vector store chargé
+    """
+    global index_load_metrics
+
+    started_at, rss_before = time.perf_counter(), resident_memory_mb()
+    store = load_vector_store(
+        load_path=FAISS_INDEX_PATH,
+        embeddings=embeddings_model,
+        search_params=FAISS_SEARCH_PARAMS,
+        mmap=FAISS_MMAP,
+    )
+    rss_after = resident_memory_mb()
+
+    index_file = Path(FAISS_INDEX_PATH) / "index.faiss"
+    index_load_metrics = {
+        "mmap": FAISS_MMAP,
+        "seconds": round(time.perf_counter() - started_at, 3),
+        "rss_mb": round(rss_after, 1),
+        "rss_delta_mb": round(rss_after - rss_before, 1),
+        "index_file_mb": (
+            round(index_file.stat().st_size / (1024 * 1024), 1)
+            if index_file.exists()
+            else None
+        ),
+    }
+    logger.info(
+        f"✓ Index chargé en {index_load_metrics['seconds']:.2f} s "
+        f"(mmap: {FAISS_MMAP}, RSS +{index_load_metrics['rss_delta_mb']} Mo)"
+    )
+    return store
+
+
+def load_filtered_searcher():
+    """
+    Construit les index des métadonnées filtrables et des dates du vector store chargé.
+
+    Le reclassement exact (load_exact_rescorer, chargé avant) est réutilisé
+    pour les recherches filtrées.
+
+    Returns:
+        FilteredSearcher: Recherche filtrée, ou None si les index n'ont pas pu être construits
+    """
+    try:
+        started_at = time.perf_counter()
+        metadata_index = MetadataIndex.from_vector_store(vector_store)
+        date_index = DateIntervalIndex.from_vector_store(vector_store)
+    except Exception as e:
+        logger.warning(f"⚠️  Index des métadonnées indisponible ({e}): filtres désactivés")
+        return None
+
+    logger.info(
+        f"✓ Index des métadonnées construit en {time.perf_counter() - started_at:.2f} s "
+        f"({metadata_index.stats()}, dates: {date_index.stats()})"
+    )
+    return FilteredSearcher(
+        vector_store,
+        metadata_index,
+        prefilter_selectivity=FAISS_PREFILTER_SELECTIVITY,
+        date_index=date_index,
+        rescorer=exact_rescorer,
+    )
+
+
+def load_exact_rescorer():
+    """
+    Prépare le reclassement exact si les vecteurs exacts ont été conservés.
+
+    Returns:
+        ExactRescorer: Reclassement exact, ou None si indisponible
+    """
+    if FAISS_RESCORE_FACTOR <= 0:
+        return None
+
+    exact_vectors = load_exact_vectors(FAISS_INDEX_PATH)
+    if exact_vectors is None:
+        return None
+
+    try:
+        rescorer = ExactRescorer(
+            vector_store, exact_vectors, fetch_factor=FAISS_RESCORE_FACTOR
+        )
+    except ValueError as e:
+        logger.warning(f"⚠️  {e}: pas de reclassement exact")
+        return None
+
+    logger.info(f"✓ Reclassement exact activé (× {FAISS_RESCORE_FACTOR} candidats)")
+    return rescorer
+
+
 @app.on_event("startup")
 async def startup_event():
     """Initialise le vector store et le modèle d'embeddings au démarrage."""
-    global vector_store, embeddings_model, mistral_client, default_system_prompt
+    global vector_store, embeddings_model, query_batcher, mistral_client
+    global default_system_prompt, cascade_retriever, exact_rescorer, filtered_searcher
 
     logger.info("=" * 70)
     logger.info("DÉMARRAGE DE L'API DE RECHERCHE")
@@ -133,11 +347,26 @@ async def startup_event():
         )
         logger.info("✓ Modèle d'embeddings chargé")
 
+        if EMBEDDINGS_WARMUP:
+            logger.info("Warmup du modèle d'embeddings...")
+            embeddings_model.warmup()
+
+        # Regroupement des requêtes concurrentes en batchs
+        if EMBEDDINGS_MICROBATCH_SIZE > 1 and hasattr(embeddings_model, "embed_queries"):
+            query_batcher = QueryMicroBatcher(
+                embeddings_model,
+                max_batch_size=EMBEDDINGS_MICROBATCH_SIZE,
+                max_wait_ms=EMBEDDINGS_MICROBATCH_WAIT_MS,
+            )
+            logger.info(
+                f"✓ Micro-batching des requêtes activé "
+                f"(taille max: {EMBEDDINGS_MICROBATCH_SIZE}, "
+                f"attente max: {EMBEDDINGS_MICROBATCH_WAIT_MS} ms)"
+            )
+
         # Chargement du vector store
         logger.info(f"Chargement du vector store depuis: {FAISS_INDEX_PATH}")
-        vector_store = load_vector_store(
-            load_path=FAISS_INDEX_PATH, embeddings=embeddings_model
-        )
+        vector_store = load_index()
 
         # Affichage des statistiques
         stats = get_vector_store_stats(vector_store)
@@ -145,6 +374,10 @@ async def startup_event():
         logger.info(f"  - Nombre de vecteurs: {stats['num_vectors']:,}")
         logger.info(f"  - Dimension: {stats['dimension']}")
 
+        cascade_retriever = load_cascade_retriever()
+        exact_rescorer = load_exact_rescorer()
+        filtered_searcher = load_filtered_searcher()
+
         # Initialisation du client Mistral AI (si clé API disponible)
         if MISTRAL_API_KEY:
             logger.info("Initialisation du client Mistral AI...")
@@ -173,6 +406,84 @@ async def startup_event():
         raise
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Arrête la tâche de micro-batching des requêtes."""
+    if query_batcher is not None:
+        await query_batcher.stop()
+
+
+async def embed_query(text: str) -> list:
+    """
+    Calcule l'embedding d'une requête avec le modèle principal.
+
+    Si le micro-batching est activé, l'embedding est calculé dans un batch
+    partagé avec les requêtes concurrentes.
+
+    Args:
+        text: Texte de la requête
+
+    Returns:
+        list: Embedding de la requête
+    """
+    if query_batcher is None:
+        return embeddings_model.embed_query(text)
+    return await query_batcher.embed_query(text)
+
+
+async def search_with_scores(
+    text: str,
+    k: int,
+    filters: Optional[Dict[str, List[str]]] = None,
+    date_range: Optional[Tuple[int, int]] = None,
+) -> list:
+    """
+    Recherche les k documents les plus proches d'un texte.
+
+    Avec des filtres (métadonnées ou dates), la recherche est faite directement sur l'index
+    principal, pré- ou post-filtré selon la sélectivité (voir
+    vectors.filtering); la cascade est ignorée, les candidats filtrés sont
+    reclassés par leurs vecteurs exacts s'ils sont conservés.
+
+    Avec la recherche en cascade, le petit modèle sélectionne des candidats
+    que les vecteurs e5-large de l'index reclassent. Avec un index quantifié
+    dont les vecteurs exacts sont conservés, les candidats de l'index sont
+    reclassés par leurs vecteurs exacts. Si le micro-batching est
+    activé, l'embedding de la requête est calculé dans un batch partagé avec
+    les requêtes concurrentes; sinon la recherche est déléguée directement au
+    vector store.
+
+    Args:
+        text: Texte de la requête
+        k: Nombre de résultats
+        filters: Champ → valeurs acceptées (city, department, keywords, status)
+        date_range: Fenêtre (début, fin) en timestamps: événements qui la chevauchent
+
+    Returns:
+        list: Couples (document, score)
+    """
+    if filters or date_range:
+        return filtered_searcher.search(
+            await embed_query(text), k, filters or {}, date_range=date_range
+        )
+
+    if cascade_retriever is not None:
+        ids, distances = cascade_retriever.retrieve(text)
+        if cascade_retriever.is_confident(distances):
+            return cascade_retriever.results(ids, distances, k=k)
+        return cascade_retriever.rescore(await embed_query(text), ids, k)
+
+    if exact_rescorer is not None:
+        embedding = await embed_query(text)
+        return exact_rescorer.similarity_search_with_score_by_vector(embedding, k=k)
+
+    if query_batcher is None:
+        return vector_store.similarity_search_with_score(text, k=k)
+
+    embedding = await embed_query(text)
+    return vector_store.similarity_search_with_score_by_vector(embedding, k=k)
+
+
 @app.get("/", response_model=dict)
 async def root():
     """Point d'entrée racine de l'API."""
@@ -182,6 +493,7 @@ async def root():
         "endpoints": {
             "search": "/search",
             "ask": "/ask",
+            "events_on": "/events/on?date=YYYY-MM-DD",
             "stats": "/stats",
             "health": "/health",
             "rebuild": "/rebuild",
@@ -191,6 +503,12 @@ async def root():
     }
 
 
+def _model_load_metrics():
+    """Retourne les métriques de chargement du modèle d'embeddings, si disponibles."""
+    metrics = getattr(embeddings_model, "load_metrics", None)
+    return metrics if isinstance(metrics, dict) else None
+
+
 @app.get("/health", response_model=HealthResponse)
 async def health_check():
     """Vérifie l'état de santé de l'API."""
@@ -199,6 +517,7 @@ async def health_check():
         vector_store_loaded=vector_store is not None,
         embeddings_model_loaded=embeddings_model is not None,
         mistral_client_loaded=mistral_client is not None,
+        model_load_metrics=_model_load_metrics(),
     )
 
 
@@ -210,16 +529,76 @@ async def get_stats():
 
     try:
         stats = get_vector_store_stats(vector_store)
+
+        # Statistiques du cache LRU des requêtes (si activé)
+        query_cache = getattr(embeddings_model, "query_cache", None)
+        query_cache_stats = (
+            query_cache.stats() if isinstance(query_cache, QueryEmbeddingCache) else None
+        )
+
         return StatsResponse(
             num_vectors=stats["num_vectors"],
             dimension=stats["dimension"],
             index_path=FAISS_INDEX_PATH,
+            query_cache=query_cache_stats,
+            cascade=cascade_retriever.stats() if cascade_retriever else None,
+            rescoring=exact_rescorer.stats() if exact_rescorer else None,
+            filtering=filtered_searcher.stats() if filtered_searcher else None,
+            index_load_metrics=index_load_metrics,
         )
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des stats: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _query_filters(filters: Optional[SearchFilters]) -> Optional[Dict[str, List[str]]]:
+    """
+    Convertit les filtres d'une requête en dictionnaire champ → valeurs.
+
+    Raises:
+        HTTPException: 503 si des filtres sont demandés sans index des métadonnées
+    """
+    if filters is None:
+        return None
+    values = {
+        field: v
+        for field, v in filters.model_dump(exclude={"date_from", "date_to"}).items()
+        if v
+    }
+    if values and filtered_searcher is None:
+        raise HTTPException(
+            status_code=503, detail="Index des métadonnées non chargé: filtres indisponibles"
+        )
+    return values or None
+
+
+def _date_index() -> Optional[DateIntervalIndex]:
+    """Retourne l'index des dates de la recherche filtrée, s'il est chargé."""
+    return filtered_searcher.date_index if filtered_searcher else None
+
+
+def _query_date_range(filters: Optional[SearchFilters]) -> Optional[Tuple[int, int]]:
+    """
+    Convertit date_from / date_to d'une requête en fenêtre de timestamps.
+
+    Une borne absente laisse la fenêtre ouverte de ce côté.
+
+    Raises:
+        HTTPException: 400 si la fenêtre est vide, 503 sans index des dates
+    """
+    if filters is None or (filters.date_from is None and filters.date_to is None):
+        return None
+    if filters.date_from and filters.date_to and filters.date_from > filters.date_to:
+        raise HTTPException(status_code=400, detail="date_from postérieure à date_to")
+    if _date_index() is None:
+        raise HTTPException(
+            status_code=503, detail="Index des dates non chargé: filtre de dates indisponible"
+        )
+    start = day_window(filters.date_from)[0] if filters.date_from else -(2**62)
+    end = day_window(filters.date_to)[1] if filters.date_to else 2**62
+    return start, end
+
+
 @app.post("/search", response_model=SearchResponse)
 async def search(query: SearchQuery):
     """
@@ -235,12 +614,16 @@ async def search(query: SearchQuery):
         raise HTTPException(
             status_code=503, detail="Vector store ou modèle d'embeddings non chargé"
         )
+    filters = _query_filters(query.filters)
+    date_range = _query_date_range(query.filters)
 
     try:
-        logger.info(f"Recherche: '{query.query}' (k={query.k})")
+        logger.info(f"Recherche: '{query.query}' (k={query.k}, filtres: {filters})")
 
         # Recherche dans le vector store
-        results = vector_store.similarity_search_with_score(query.query, k=query.k)
+        results = await search_with_scores(
+            query.query, k=query.k, filters=filters, date_range=date_range
+        )
 
         # Formatage des résultats
         formatted_results = []
@@ -267,6 +650,50 @@ async def search(query: SearchQuery):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/events/on", response_model=EventsOnResponse)
+async def events_on(
+    day: date = Query(..., alias="date", description="Jour (YYYY-MM-DD)"),
+    limit: int = Query(50, ge=1, le=500, description="Nombre maximal d'événements"),
+):
+    """
+    Liste les événements en cours un jour donné, sans recherche sémantique.
+
+    La recherche est faite dans l'index des intervalles de dates (voir
+    vectors.intervals); seuls les documents retournés sont relus.
+
+    Args:
+        day: Jour demandé (heure de Paris)
+        limit: Nombre maximal d'événements
+
+    Returns:
+        Événements triés par date de début, un par event_id
+    """
+    date_index = _date_index()
+    if not vector_store or date_index is None:
+        raise HTTPException(status_code=503, detail="Index des dates non chargé")
+
+    started_at = time.perf_counter()
+    positions = date_index.events(*day_window(day), limit=limit)
+    lookup_us = (time.perf_counter() - started_at) * 1e6
+
+    events = []
+    for position in positions:
+        doc = vector_store.docstore.search(vector_store.index_to_docstore_id[position])
+        events.append(
+            EventSummary(
+                event_id=doc.metadata.get("event_id"),
+                title=doc.metadata.get("title", "Sans titre"),
+                city=doc.metadata.get("city"),
+                date_debut=doc.metadata.get("date_debut"),
+                date_fin=doc.metadata.get("date_fin"),
+            )
+        )
+
+    return EventsOnResponse(
+        day=day, events=events, total_results=len(events), lookup_us=round(lookup_us, 1)
+    )
+
+
 @app.post("/ask", response_model=AskResponse)
 async def ask_question(query: AskQuery):
     """
@@ -299,12 +726,17 @@ async def ask_question(query: AskQuery):
             detail="Client Mistral AI non initialisé. Vérifiez MISTRAL_API_KEY dans .env",
         )
 
+    filters = _query_filters(query.filters)
+    date_range = _query_date_range(query.filters)
+
     try:
-        logger.info(f"Question reçue: '{query.question}' (k={query.k})")
+        logger.info(f"Question reçue: '{query.question}' (k={query.k}, filtres: {filters})")
 
         # 1. Recherche sémantique dans le vector store
         logger.info(f"Recherche de {query.k} documents contextuels...")
-        results = vector_store.similarity_search_with_score(query.question, k=query.k)
+        results = await search_with_scores(
+            query.question, k=query.k, filters=filters, date_range=date_range
+        )
 
         # 2. Formatage du contexte
         context_results = []
@@ -515,12 +947,14 @@ async def run_rebuild_pipeline():
 
             # Recharger le vector store avec le nouvel index
             try:
-                global vector_store
-                vector_store = load_vector_store(
-                    load_path=FAISS_INDEX_PATH,
-                    embeddings=embeddings_model,
-                    verbose=False,
-                )
+                global vector_store, cascade_retriever, exact_rescorer, filtered_searcher
+                # L'ancien docstore SQLite n'est pas fermé ici: des requêtes en
+                # cours l'utilisent encore. Sa connexion est fermée par le
+                # ramasse-miettes une fois la dernière référence libérée.
+                vector_store = load_index()
+                cascade_retriever = load_cascade_retriever()
+                exact_rescorer = load_exact_rescorer()
+                filtered_searcher = load_filtered_searcher()
 
                 # Afficher les nouvelles statistiques
                 stats = get_vector_store_stats(vector_store)
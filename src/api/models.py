@@ -5,6 +5,7 @@ Ce module contient tous les modèles de données utilisés pour les requêtes
 et réponses de l'API de recherche d'événements culturels.
 """
 
+from datetime import date
 from typing import List, Optional
 from pydantic import BaseModel, Field
 
@@ -13,10 +14,25 @@ from pydantic import BaseModel, Field
 # Modèles pour la recherche sémantique
 # ============================================================================
 
+class SearchFilters(BaseModel):
+    """Filtres sur les métadonnées (valeurs d'un champ: OU, champs entre eux: ET)."""
+    city: Optional[List[str]] = Field(None, description="Villes acceptées")
+    department: Optional[List[str]] = Field(None, description="Départements acceptés")
+    keywords: Optional[List[str]] = Field(None, description="Mots-clés (au moins un)")
+    status: Optional[List[str]] = Field(None, description="Statuts acceptés")
+    date_from: Optional[date] = Field(
+        None, description="Événements en cours à partir de ce jour (inclus)"
+    )
+    date_to: Optional[date] = Field(
+        None, description="Événements en cours jusqu'à ce jour (inclus)"
+    )
+
+
 class SearchQuery(BaseModel):
     """Modèle pour une requête de recherche."""
     query: str = Field(..., description="Texte de la requête de recherche", min_length=1)
     k: int = Field(5, description="Nombre de résultats à retourner", ge=1, le=100)
+    filters: Optional[SearchFilters] = Field(None, description="Filtres sur les métadonnées (optionnel)")
 
 
 class SearchResult(BaseModel):
@@ -35,6 +51,23 @@ class SearchResponse(BaseModel):
     total_results: int = Field(..., description="Nombre de résultats retournés")
 
 
+class EventSummary(BaseModel):
+    """Modèle pour un événement listé sans recherche sémantique."""
+    event_id: Optional[str] = Field(None, description="Identifiant de l'événement")
+    title: str = Field(..., description="Titre de l'événement")
+    city: Optional[str] = Field(None, description="Ville")
+    date_debut: Optional[str] = Field(None, description="Date de début (ISO 8601)")
+    date_fin: Optional[str] = Field(None, description="Date de fin (ISO 8601)")
+
+
+class EventsOnResponse(BaseModel):
+    """Modèle pour la liste des événements d'une journée."""
+    day: date = Field(..., description="Jour demandé")
+    events: List[EventSummary] = Field(..., description="Événements en cours ce jour")
+    total_results: int = Field(..., description="Nombre d'événements retournés")
+    lookup_us: float = Field(..., description="Durée de la recherche dans l'index de dates (µs)")
+
+
 # ============================================================================
 # Modèles pour le chatbot avec RAG
 # ============================================================================
@@ -44,6 +77,7 @@ class AskQuery(BaseModel):
     question: str = Field(..., description="Question de l'utilisateur", min_length=1)
     k: int = Field(5, description="Nombre de documents de contexte à récupérer", ge=1, le=20)
     system_prompt: Optional[str] = Field(None, description="Prompt système personnalisé (optionnel)")
+    filters: Optional[SearchFilters] = Field(None, description="Filtres sur les métadonnées (optionnel)")
 
 
 class AskResponse(BaseModel):
@@ -63,6 +97,22 @@ class StatsResponse(BaseModel):
     num_vectors: int = Field(..., description="Nombre de vecteurs dans l'index")
     dimension: int = Field(..., description="Dimension des vecteurs")
     index_path: str = Field(..., description="Chemin du vector store")
+    query_cache: Optional[dict] = Field(
+        None, description="Statistiques du cache des embeddings de requêtes (si activé)"
+    )
+    cascade: Optional[dict] = Field(
+        None, description="Statistiques de la recherche en cascade (si activée)"
+    )
+    rescoring: Optional[dict] = Field(
+        None, description="Statistiques du reclassement par vecteurs exacts (si activé)"
+    )
+    filtering: Optional[dict] = Field(
+        None, description="Statistiques des recherches filtrées (stratégies choisies)"
+    )
+    index_load_metrics: Optional[dict] = Field(
+        None,
+        description="Chargement de l'index: mode (mmap), durée (s) et mémoire résidente (Mo)",
+    )
 
 
 class HealthResponse(BaseModel):
@@ -71,6 +121,10 @@ class HealthResponse(BaseModel):
     vector_store_loaded: bool = Field(..., description="Indique si le vector store est chargé")
     embeddings_model_loaded: bool = Field(..., description="Indique si le modèle d'embeddings est chargé")
     mistral_client_loaded: bool = Field(..., description="Indique si le client Mistral AI est chargé")
+    model_load_metrics: Optional[dict] = Field(
+        None,
+        description="Durée (s) et mémoire résidente (Mo) de chaque phase de chargement du modèle",
+    )
 
 
 class RebuildResponse(BaseModel):
@@ -5,6 +5,15 @@ Ce package fournit les outils pour générer des embeddings vectoriels
 multilingues en utilisant le modèle E5.
 """
 
-from .embeddings import E5Embeddings, get_embeddings_model
+from .embeddings import E5Embeddings, env_flag, get_embeddings_model
+from .cache import EmbeddingCache, QueryEmbeddingCache
+from .microbatch import QueryMicroBatcher
 
-__all__ = ["E5Embeddings", "get_embeddings_model"]
+__all__ = [
+    "E5Embeddings",
+    "get_embeddings_model",
+    "env_flag",
+    "EmbeddingCache",
+    "QueryEmbeddingCache",
+    "QueryMicroBatcher",
+]
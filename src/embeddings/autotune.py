@@ -0,0 +1,336 @@
+"""
+Autotuning du débit d'encodage des embeddings.
+
+Les meilleures valeurs de batch_size, de regroupement par longueur et de
+torch.set_num_threads dépendent de la machine. Ce module chronomètre
+E5Embeddings sur une grille de configurations avec un échantillon de vrais
+chunks, puis enregistre la meilleure dans un fichier de profil lu
+automatiquement par get_embeddings_model.
+
+Usage (depuis le répertoire src/):
+    python -m embeddings.autotune [--samples 256] [--batch-sizes 8,16,32,64] [--threads 4,8,16]
+"""
+
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import json
+import logging
+import os
+import platform
+import time
+
+import torch
+
+from .embeddings import PROJECT_ROOT
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Fichier de profil par défaut (surchargé par EMBEDDINGS_PROFILE_PATH)
+DEFAULT_PROFILE_PATH = "data/embeddings_profile.json"
+
+DEFAULT_BATCH_SIZES = (8, 16, 32, 64)
+
+
+def default_thread_counts() -> List[int]:
+    """
+    Retourne les nombres de threads à évaluer (puissances de 2 jusqu'au nombre de coeurs).
+
+    Returns:
+        List[int]: Nombres de threads candidats
+    """
+    cpu_count = os.cpu_count() or 1
+    counts = []
+    threads = 1
+    while threads < cpu_count:
+        counts.append(threads)
+        threads *= 2
+    counts.append(cpu_count)
+    return counts
+
+
+def get_profile_path() -> Path:
+    """
+    Retourne le chemin du fichier de profil.
+
+    Un chemin relatif est résolu par rapport à la racine du projet.
+
+    Returns:
+        Path: Chemin du profil (EMBEDDINGS_PROFILE_PATH ou défaut)
+    """
+    path = Path(os.getenv("EMBEDDINGS_PROFILE_PATH") or DEFAULT_PROFILE_PATH)
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    return path
+
+
+def load_profile(path: Optional[Path] = None) -> Optional[Dict[str, Any]]:
+    """
+    Charge le profil d'autotuning s'il existe.
+
+    Args:
+        path: Chemin du profil (défaut: get_profile_path())
+
+    Returns:
+        dict: Profil, ou None s'il n'existe pas ou est illisible
+    """
+    path = path or get_profile_path()
+    if not path.exists():
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"⚠️  Profil d'embeddings illisible ({path}): {e}")
+        return None
+
+
+def save_profile(profile: Dict[str, Any], path: Optional[Path] = None) -> Path:
+    """
+    Enregistre le profil d'autotuning.
+
+    Args:
+        profile: Profil (voir autotune)
+        path: Chemin du profil (défaut: get_profile_path())
+
+    Returns:
+        Path: Chemin du fichier écrit
+    """
+    path = path or get_profile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def benchmark_config(
+    embeddings,
+    texts: List[str],
+    batch_size: int,
+    num_threads: int,
+    sort_by_length: bool,
+) -> float:
+    """
+    Mesure le débit d'encodage pour une configuration.
+
+    Args:
+        embeddings: Instance E5Embeddings (modifiée temporairement)
+        texts: Textes de l'échantillon
+        batch_size: Taille des batchs
+        num_threads: Nombre de threads torch
+        sort_by_length: Regroupement des batchs par longueur
+
+    Returns:
+        float: Débit en textes par seconde
+    """
+    torch.set_num_threads(num_threads)
+    embeddings.batch_size = batch_size
+    embeddings.sort_by_length = sort_by_length
+
+    started_at = time.perf_counter()
+    embeddings._embed_texts(texts, prefix="passage: ")
+    return len(texts) / (time.perf_counter() - started_at)
+
+
+def autotune(
+    embeddings,
+    texts: List[str],
+    batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+    thread_counts: Optional[Sequence[int]] = None,
+    sort_options: Sequence[bool] = (False, True),
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """
+    Évalue une grille de configurations et retourne le profil de la meilleure.
+
+    Un premier encodage (non chronométré) sert de warmup. La configuration
+    de l'instance est restaurée à la fin.
+
+    Args:
+        embeddings: Instance E5Embeddings à évaluer
+        texts: Échantillon de chunks réels
+        batch_sizes: Tailles de batch candidates
+        thread_counts: Nombres de threads candidats (défaut: puissances de 2)
+        sort_options: Valeurs candidates du regroupement par longueur
+        verbose: Si True, affiche le débit de chaque configuration
+
+    Returns:
+        dict: Profil (machine, modèle, meilleure configuration, résultats)
+    """
+    thread_counts = list(thread_counts or default_thread_counts())
+    initial = (embeddings.batch_size, embeddings.sort_by_length, torch.get_num_threads())
+
+    embeddings._embed_texts(texts[: max(batch_sizes)], prefix="passage: ")
+
+    results = []
+    try:
+        for num_threads in thread_counts:
+            for batch_size in batch_sizes:
+                for sort_by_length in sort_options:
+                    throughput = benchmark_config(
+                        embeddings, texts, batch_size, num_threads, sort_by_length
+                    )
+                    results.append(
+                        {
+                            "batch_size": batch_size,
+                            "num_threads": num_threads,
+                            "sort_by_length": sort_by_length,
+                            "texts_per_second": round(throughput, 2),
+                        }
+                    )
+                    if verbose:
+                        logger.info(
+                            f"   threads={num_threads:<3} batch={batch_size:<4} "
+                            f"tri={'oui' if sort_by_length else 'non'}: "
+                            f"{throughput:.1f} textes/s"
+                        )
+    finally:
+        embeddings.batch_size, embeddings.sort_by_length = initial[0], initial[1]
+        torch.set_num_threads(initial[2])
+
+    best = max(results, key=lambda r: r["texts_per_second"])
+    return {
+        "model_id": embeddings.model_id,
+        "backend": embeddings.backend,
+        "precision": embeddings.precision,
+        "device": embeddings.device,
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "num_samples": len(texts),
+        "created_at": datetime.now().isoformat(),
+        "best": {key: best[key] for key in ("batch_size", "num_threads", "sort_by_length")},
+        "best_texts_per_second": best["texts_per_second"],
+        "results": results,
+    }
+
+
+def profile_options(profile: Dict[str, Any], model_id: str) -> Dict[str, Any]:
+    """
+    Extrait les options de E5Embeddings d'un profil.
+
+    Le profil n'est appliqué que s'il a été mesuré pour le même modèle, sur
+    la même machine et avec le même nombre de CPU. Un profil d'un autre
+    modèle (ex: modèle de la cascade) est ignoré silencieusement.
+
+    Args:
+        profile: Profil chargé
+        model_id: Modèle demandé
+
+    Returns:
+        dict: Options (batch_size, num_threads, sort_by_length), vide si le
+            profil concerne un autre modèle ou une autre machine
+    """
+    if profile.get("model_id") != model_id:
+        return {}
+    measured_on = (profile.get("host"), profile.get("cpu_count"))
+    current = (platform.node(), os.cpu_count())
+    if measured_on != current:
+        logger.warning(
+            f"⚠️  Profil d'embeddings mesuré sur {measured_on[0]} "
+            f"({measured_on[1]} CPU), ignoré sur {current[0]} ({current[1]} CPU)"
+        )
+        return {}
+    return dict(profile.get("best", {}))
+
+
+def _load_sample_texts(num_samples: int, embeddings) -> List[str]:
+    """
+    Charge un échantillon de chunks réels (index FAISS existant, sinon MongoDB).
+
+    Args:
+        num_samples: Nombre de chunks souhaité
+        embeddings: Modèle d'embeddings (requis pour ouvrir l'index)
+
+    Returns:
+        List[str]: Textes des chunks
+    """
+    index_path = Path(os.getenv("FAISS_INDEX_PATH", "data/faiss_index"))
+    if not index_path.is_absolute():
+        index_path = PROJECT_ROOT / index_path
+
+    if index_path.exists():
+        from vectors import load_vector_store
+
+        vector_store = load_vector_store(str(index_path), embeddings)
+        ids = list(islice(vector_store.index_to_docstore_id.values(), num_samples))
+        return [vector_store.docstore.search(i).page_content for i in ids]
+
+    from chunks.chunks_document import get_mongodb_connection, process_events_to_chunks
+
+    logger.info(f"Aucun index à {index_path}: échantillon chargé depuis MongoDB")
+    client, events_collection = get_mongodb_connection()
+    try:
+        chunks = process_events_to_chunks(events_collection, limit=num_samples)
+    finally:
+        client.close()
+    return [chunk.page_content for chunk in chunks[:num_samples]]
+
+
+def _parse_ints(value: Optional[str]) -> Optional[List[int]]:
+    """Convertit une liste "8,16,32" en entiers."""
+    return [int(v) for v in value.split(",")] if value else None
+
+
+def main():
+    """
+    Mesure les configurations candidates et enregistre le profil le plus rapide.
+    """
+    from dotenv import load_dotenv
+
+    from .embeddings import E5Embeddings, get_embeddings_options_from_env
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Autotuning du débit d'encodage des embeddings"
+    )
+    parser.add_argument("--samples", type=int, default=256, help="Nombre de chunks évalués")
+    parser.add_argument("--batch-sizes", help="Tailles de batch (ex: 8,16,32,64)")
+    parser.add_argument("--threads", help="Nombres de threads (ex: 4,8,16)")
+    parser.add_argument("--output", help="Fichier de profil (défaut: EMBEDDINGS_PROFILE_PATH)")
+    args = parser.parse_args()
+
+    logger.info("=" * 70)
+    logger.info("AUTOTUNING DES EMBEDDINGS")
+    logger.info("=" * 70)
+
+    # Options de l'environnement, sans le profil existant ni le pool de workers
+    options = get_embeddings_options_from_env()
+    options.pop("workers", None)
+    embeddings = E5Embeddings(
+        model_id=os.getenv("EMBEDDINGS_MODEL", "intfloat/multilingual-e5-large"),
+        device=os.getenv("EMBEDDINGS_DEVICE") or None,
+        **options,
+    )
+
+    texts = _load_sample_texts(args.samples, embeddings)
+    logger.info(f"Échantillon: {len(texts)} chunks")
+
+    profile = autotune(
+        embeddings,
+        texts,
+        batch_sizes=_parse_ints(args.batch_sizes) or DEFAULT_BATCH_SIZES,
+        thread_counts=_parse_ints(args.threads),
+        verbose=True,
+    )
+    path = save_profile(profile, Path(args.output) if args.output else None)
+
+    best = profile["best"]
+    logger.info("\n" + "=" * 70)
+    logger.info(
+        f"✓ Meilleure configuration: batch_size={best['batch_size']}, "
+        f"threads={best['num_threads']}, tri={'oui' if best['sort_by_length'] else 'non'} "
+        f"({profile['best_texts_per_second']:.1f} textes/s)"
+    )
+    logger.info(f"✓ Profil enregistré dans: {path}")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+Benchmark reproductible des embeddings.
+
+Mesure, pour chaque combinaison de backend, de précision, de taille de batch
+et de distribution de longueurs de textes:
+- le débit de embed_documents (documents/s et tokens/s)
+- la latence de embed_query (p50, p95, p99 en millisecondes), comparée à
+  celle du chemin générique des batchs (max_length des documents)
+
+Le corpus est synthétique et généré à partir d'une graine, afin que les
+résultats (JSON) soient comparables d'un commit ou d'une machine à l'autre.
+
+Usage (depuis le répertoire src/):
+    python -m embeddings.benchmark [--backends torch,onnx] [--precisions fp32,int8]
+        [--batch-sizes 8,32] [--distributions short,mixed,long] [--output bench.json]
+"""
+
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+import numpy as np
+import torch
+
+from .embeddings import PROJECT_ROOT, E5Embeddings
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Répertoire des rapports de benchmark
+DEFAULT_OUTPUT_DIR = PROJECT_ROOT / "data" / "benchmarks"
+
+# Distributions de longueurs (en mots): (moyenne, écart-type) d'une loi normale
+# tronquée, ou None pour un mélange représentatif des chunks d'événements
+LENGTH_DISTRIBUTIONS = {
+    "short": (20, 5),
+    "medium": (80, 20),
+    "long": (300, 50),
+    "mixed": None,
+}
+
+_WORDS = (
+    "concert jazz festival exposition atelier spectacle théâtre danse musique "
+    "cinéma conférence visite guidée patrimoine marché gratuit famille enfants "
+    "Toulouse Montpellier Nîmes Perpignan Carcassonne Albi samedi dimanche soir "
+    "juin juillet août septembre place salle musée parc médiathèque réservation "
+    "découverte création artiste compagnie orchestre chorale balade nature"
+).split()
+
+
+def make_corpus(num_texts: int, distribution: str, seed: int = 0) -> List[str]:
+    """
+    Génère un corpus synthétique reproductible.
+
+    Args:
+        num_texts: Nombre de textes
+        distribution: Nom de la distribution de longueurs (LENGTH_DISTRIBUTIONS)
+        seed: Graine du générateur
+
+    Returns:
+        List[str]: Textes générés
+
+    Raises:
+        ValueError: Si la distribution est inconnue
+    """
+    if distribution not in LENGTH_DISTRIBUTIONS:
+        raise ValueError(f"Distribution de longueurs inconnue: {distribution}")
+
+    rng = random.Random(f"{seed}-{distribution}")
+    params = LENGTH_DISTRIBUTIONS[distribution]
+    texts = []
+    for _ in range(num_texts):
+        if params is None:
+            # Mélange: majorité de chunks moyens, quelques descriptions longues
+            mean, std = rng.choice([(20, 5), (80, 20), (80, 20), (300, 50)])
+        else:
+            mean, std = params
+        length = max(1, int(rng.gauss(mean, std)))
+        texts.append(" ".join(rng.choice(_WORDS) for _ in range(length)))
+    return texts
+
+
+def percentiles_ms(latencies: Sequence[float]) -> Dict[str, float]:
+    """
+    Calcule les percentiles de latence.
+
+    Args:
+        latencies: Latences en secondes
+
+    Returns:
+        dict: p50, p95, p99 et moyenne en millisecondes
+    """
+    values = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(values.mean()), 3),
+    }
+
+
+def benchmark_documents(embeddings: E5Embeddings, texts: List[str]) -> Dict[str, float]:
+    """
+    Mesure le débit d'encodage des documents.
+
+    Args:
+        embeddings: Modèle d'embeddings (sans cache)
+        texts: Documents à encoder
+
+    Returns:
+        dict: Durée, documents/s et tokens/s (tokens réels, hors padding)
+    """
+    num_tokens = sum(embeddings._token_lengths([f"passage: {t}" for t in texts]))
+
+    started_at = time.perf_counter()
+    embeddings.embed_documents_array(texts)
+    seconds = time.perf_counter() - started_at
+
+    return {
+        "seconds": round(seconds, 4),
+        "num_tokens": num_tokens,
+        "docs_per_second": round(len(texts) / seconds, 2),
+        "tokens_per_second": round(num_tokens / seconds, 2),
+    }
+
+
+def benchmark_queries(
+    embeddings: E5Embeddings, queries: List[str], fast_path: bool = True
+) -> Dict[str, float]:
+    """
+    Mesure la latence d'encodage des requêtes, requête par requête.
+
+    Args:
+        embeddings: Modèle d'embeddings (sans cache de requêtes)
+        queries: Requêtes à encoder
+        fast_path: Si True, mesure embed_query (chemin rapide des requêtes);
+            sinon, le chemin générique des batchs de documents
+
+    Returns:
+        dict: Percentiles de latence en millisecondes
+    """
+    latencies = []
+    for query in queries:
+        started_at = time.perf_counter()
+        if fast_path:
+            embeddings.embed_query(query)
+        else:
+            embeddings._encode_batch([f"query: {query}"])
+        latencies.append(time.perf_counter() - started_at)
+    return percentiles_ms(latencies)
+
+
+def environment_info() -> Dict[str, Any]:
+    """
+    Décrit la machine et la version du code mesurées.
+
+    Returns:
+        dict: Commit git, machine, CPU, versions de Python et de torch
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "commit": commit,
+        "host": platform.node(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "torch_threads": torch.get_num_threads(),
+        "python": sys.version.split()[0],
+        "torch": torch.__version__,
+    }
+
+
+def run_benchmark(
+    model_id: str,
+    backends: Sequence[str] = ("torch",),
+    precisions: Sequence[str] = ("fp32",),
+    batch_sizes: Sequence[int] = (32,),
+    distributions: Sequence[str] = ("mixed",),
+    num_texts: int = 256,
+    num_queries: int = 100,
+    seed: int = 0,
+    device: Optional[str] = None,
+    onnx_path: Optional[str] = None,
+    verbose: bool = False,
+) -> Dict[str, Any]:
+    """
+    Exécute le benchmark sur toute la grille de configurations.
+
+    Une configuration indisponible (ex: backend ONNX non exporté, bf16 avec
+    ONNX) est enregistrée avec son erreur au lieu d'interrompre le benchmark.
+    La précision effective est aussi enregistrée (bf16 sans support matériel
+    est exécuté en fp32).
+
+    Args:
+        model_id: Identifiant du modèle
+        backends: Backends évalués ('torch', 'onnx')
+        precisions: Précisions évaluées ('fp32', 'int8', 'bf16')
+        batch_sizes: Tailles de batch évaluées pour embed_documents
+        distributions: Distributions de longueurs (LENGTH_DISTRIBUTIONS)
+        num_texts: Nombre de documents par distribution
+        num_queries: Nombre de requêtes pour la latence de embed_query
+        seed: Graine du corpus
+        device: Device (auto-détecté si None)
+        onnx_path: Répertoire du modèle ONNX exporté
+        verbose: Si True, affiche chaque résultat
+
+    Returns:
+        dict: Paramètres, environnement et résultats (sérialisable en JSON)
+    """
+    corpora = {name: make_corpus(num_texts, name, seed) for name in distributions}
+    queries = make_corpus(num_queries, "short", seed)
+
+    results: List[Dict[str, Any]] = []
+    for backend in backends:
+        for precision in precisions:
+            config = {"backend": backend, "precision": precision}
+            try:
+                embeddings = E5Embeddings(
+                    model_id=model_id,
+                    device=device,
+                    backend=backend,
+                    precision=precision,
+                    onnx_path=onnx_path,
+                )
+                embeddings.warmup()
+            except (ImportError, FileNotFoundError, ValueError) as e:
+                logger.warning(f"⚠️  Configuration {config} indisponible: {e}")
+                results.append({**config, "error": str(e)})
+                continue
+
+            # Précision effective (ex: bf16 remplacé par fp32 sans support natif)
+            config["effective_precision"] = embeddings.precision
+            config["device"] = embeddings.device
+
+            query_paths = (("embed_query", True), ("embed_query_batch_path", False))
+            for task, fast_path in query_paths:
+                latency = benchmark_queries(embeddings, queries, fast_path=fast_path)
+                results.append({**config, "task": task, **latency})
+                if verbose:
+                    logger.info(
+                        f"   {backend}/{precision} {task}: "
+                        f"p50={latency['p50_ms']:.1f} ms, p95={latency['p95_ms']:.1f} ms, "
+                        f"p99={latency['p99_ms']:.1f} ms"
+                    )
+
+            for distribution, texts in corpora.items():
+                for batch_size in batch_sizes:
+                    embeddings.batch_size = batch_size
+                    throughput = benchmark_documents(embeddings, texts)
+                    results.append(
+                        {
+                            **config,
+                            "task": "embed_documents",
+                            "distribution": distribution,
+                            "batch_size": batch_size,
+                            **throughput,
+                        }
+                    )
+                    if verbose:
+                        logger.info(
+                            f"   {backend}/{precision} {distribution:<6} "
+                            f"batch={batch_size:<4}: "
+                            f"{throughput['docs_per_second']:.1f} docs/s, "
+                            f"{throughput['tokens_per_second']:.0f} tokens/s"
+                        )
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "model_id": model_id,
+        "parameters": {
+            "backends": list(backends),
+            "precisions": list(precisions),
+            "batch_sizes": list(batch_sizes),
+            "distributions": list(distributions),
+            "num_texts": num_texts,
+            "num_queries": num_queries,
+            "seed": seed,
+        },
+        "environment": environment_info(),
+        "results": results,
+    }
+
+
+def _parse_list(value: str) -> List[str]:
+    """Convertit une liste "a,b,c" en liste de chaînes."""
+    return [v.strip() for v in value.split(",") if v.strip()]
+
+
+def main():
+    """
+    Exécute le benchmark et écrit les résultats au format JSON.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Benchmark des embeddings E5")
+    parser.add_argument(
+        "--model-id",
+        default=os.getenv("EMBEDDINGS_MODEL", "intfloat/multilingual-e5-large"),
+        help="Identifiant du modèle HuggingFace",
+    )
+    parser.add_argument("--backends", default="torch", help="Backends (ex: torch,onnx)")
+    parser.add_argument("--precisions", default="fp32", help="Précisions (ex: fp32,int8,bf16)")
+    parser.add_argument("--batch-sizes", default="8,32", help="Tailles de batch (ex: 8,32)")
+    parser.add_argument(
+        "--distributions",
+        default="short,mixed,long",
+        help=f"Distributions de longueurs ({', '.join(LENGTH_DISTRIBUTIONS)})",
+    )
+    parser.add_argument("--num-texts", type=int, default=256, help="Documents par distribution")
+    parser.add_argument("--num-queries", type=int, default=100, help="Requêtes mesurées")
+    parser.add_argument("--seed", type=int, default=0, help="Graine du corpus")
+    parser.add_argument("--output", help="Fichier JSON (défaut: data/benchmarks/)")
+    args = parser.parse_args()
+
+    logger.info("=" * 70)
+    logger.info("BENCHMARK DES EMBEDDINGS")
+    logger.info("=" * 70)
+
+    report = run_benchmark(
+        model_id=args.model_id,
+        backends=_parse_list(args.backends),
+        precisions=_parse_list(args.precisions),
+        batch_sizes=[int(v) for v in _parse_list(args.batch_sizes)],
+        distributions=_parse_list(args.distributions),
+        num_texts=args.num_texts,
+        num_queries=args.num_queries,
+        seed=args.seed,
+        device=os.getenv("EMBEDDINGS_DEVICE") or None,
+        onnx_path=os.getenv("EMBEDDINGS_ONNX_PATH"),
+        verbose=True,
+    )
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        commit = report["environment"]["commit"] or "nocommit"
+        output = DEFAULT_OUTPUT_DIR / f"{platform.node()}_{commit}_{timestamp}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+
+    logger.info("\n" + "=" * 70)
+    logger.info(f"✓ Résultats écrits dans: {output}")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
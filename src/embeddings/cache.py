@@ -0,0 +1,237 @@
+"""
+Caches d'embeddings.
+
+- EmbeddingCache: cache persistant adressé par contenu. Chaque vecteur est
+  stocké (float32) dans une base SQLite sous une clé sha256(model_id,
+  précision, préfixe, max_length, texte). Un texte inchangé depuis la
+  dernière construction de l'index n'est donc jamais ré-encodé.
+- QueryEmbeddingCache: cache LRU en mémoire des embeddings de requêtes,
+  borné en taille et optionnellement en durée de vie (TTL).
+"""
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de paramètres par requête SQLite (limite historique: 999)
+_SQLITE_CHUNK_SIZE = 500
+
+
+class EmbeddingCache:
+    """
+    Cache SQLite clé → vecteur float32, avec compteurs de hits/misses.
+
+    La connexion est ouverte à la première utilisation: instancier le cache
+    (ex: dans l'API, qui n'encode pas de documents) ne crée aucun fichier.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Chemin du fichier SQLite (créé si nécessaire)
+        """
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(namespace: str, text: str) -> bytes:
+        """
+        Calcule la clé d'un texte dans un espace de noms (modèle, préfixe...).
+
+        Args:
+            namespace: Identifiant des paramètres d'encodage
+            text: Texte encodé
+
+        Returns:
+            bytes: Empreinte sha256 (32 octets)
+        """
+        return hashlib.sha256(f"{namespace}\x00{text}".encode("utf-8")).digest()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre (une seule fois) la connexion SQLite et crée la table."""
+        if self._connection is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key BLOB PRIMARY KEY, dim INTEGER NOT NULL, vector BLOB NOT NULL)"
+            )
+        return self._connection
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Récupère les vecteurs présents dans le cache.
+
+        Les compteurs hits/misses sont mis à jour pour chaque clé demandée.
+
+        Args:
+            keys: Clés recherchées
+
+        Returns:
+            dict: Clé → vecteur float32, pour les clés trouvées uniquement
+        """
+        found: Dict[bytes, np.ndarray] = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            connection = self._connect()
+            for i in range(0, len(unique_keys), _SQLITE_CHUNK_SIZE):
+                chunk = unique_keys[i : i + _SQLITE_CHUNK_SIZE]
+                placeholders = ",".join("?" * len(chunk))
+                rows = connection.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    chunk,
+                )
+                for key, blob in rows:
+                    found[bytes(key)] = np.frombuffer(blob, dtype=np.float32)
+
+            hits = sum(1 for key in keys if key in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+
+        return found
+
+    def put_many(self, items: Iterable[tuple]) -> None:
+        """
+        Enregistre des vecteurs dans le cache.
+
+        Args:
+            items: Couples (clé, vecteur)
+        """
+        rows = [
+            (key, int(vector.shape[0]), np.asarray(vector, dtype=np.float32).tobytes())
+            for key, vector in items
+        ]
+        if not rows:
+            return
+
+        with self._lock:
+            connection = self._connect()
+            connection.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dim, vector) VALUES (?, ?, ?)",
+                rows,
+            )
+            connection.commit()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Retourne les statistiques d'utilisation du cache.
+
+        Returns:
+            dict: hits, misses et taux de hits
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite si elle est ouverte."""
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class QueryEmbeddingCache:
+    """
+    Cache LRU thread-safe requête → embedding normalisé.
+
+    Les requêtes populaires (ex: "concert jazz Toulouse") évitent ainsi
+    entièrement le forward du modèle.
+    """
+
+    def __init__(self, capacity: int, ttl: Optional[float] = None):
+        """
+        Args:
+            capacity: Nombre maximal de requêtes conservées
+            ttl: Durée de vie d'une entrée en secondes (illimitée si None)
+        """
+        self.capacity = capacity
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """
+        Retourne l'embedding d'une requête s'il est en cache et non expiré.
+
+        Args:
+            query: Texte de la requête
+
+        Returns:
+            np.ndarray: Embedding en cache, ou None
+        """
+        with self._lock:
+            entry = self._entries.get(query)
+            if entry is not None:
+                vector, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._entries.move_to_end(query)
+                    self.hits += 1
+                    return vector
+                del self._entries[query]
+
+            self.misses += 1
+            return None
+
+    def put(self, query: str, vector: np.ndarray) -> None:
+        """
+        Ajoute (ou rafraîchit) l'embedding d'une requête.
+
+        L'entrée la moins récemment utilisée est évincée si la capacité
+        est atteinte.
+
+        Args:
+            query: Texte de la requête
+            vector: Embedding normalisé
+        """
+        with self._lock:
+            self._entries[query] = (vector, time.monotonic())
+            self._entries.move_to_end(query)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Vide le cache (les compteurs sont conservés)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques d'utilisation du cache.
+
+        Returns:
+            dict: hits, misses, taux de hits, taille, capacité et TTL
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size": len(self._entries),
+                "capacity": self.capacity,
+                "ttl": self.ttl,
+            }
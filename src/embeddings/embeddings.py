@@ -6,12 +6,19 @@ des vecteurs d'embeddings multilingues de haute qualité.
 Utilise le modèle intfloat/multilingual-e5-large avec average pooling.
 """
 
-from typing import List, Optional
+from collections import Counter
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 import os
 import logging
+import queue
+import threading
+import time
 
 import torch
-from transformers import AutoTokenizer, AutoModel
+from torch.ao.quantization import quantize_dynamic
+from transformers import AutoConfig, AutoTokenizer, AutoModel
 import numpy as np
 from langchain_core.embeddings import Embeddings
 
@@ -21,6 +28,41 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Racine du projet (src/embeddings/embeddings.py → racine), base des chemins
+# relatifs (profil, index, exports ONNX, benchmarks)
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+# Précisions d'inférence supportées par E5Embeddings
+SUPPORTED_PRECISIONS = ("fp32", "int8", "bf16")
+# Nombre de textes encodés par étape de iter_embed_documents
+STREAM_CHUNK_SIZE = 1024
+# Nombre de batchs tokenisés à l'avance en mode pipeline
+TOKENIZATION_PREFETCH = 2
+# Longueurs de séquences (en tokens) parcourues par E5Embeddings.warmup
+WARMUP_SEQUENCE_LENGTHS = (16, 128, 512)
+
+
+def is_bf16_supported(device: str) -> bool:
+    """
+    Indique si le device exécute efficacement des calculs en bfloat16.
+
+    Sur CPU, le support natif (AVX512-BF16 / AMX) est détecté via oneDNN;
+    sans lui, PyTorch émule le bfloat16 et l'inférence serait plus lente.
+
+    Args:
+        device: Device cible ('cuda', 'mps', 'cpu')
+
+    Returns:
+        bool: True si le bfloat16 est supporté nativement
+    """
+    if device == "cuda":
+        return torch.cuda.is_available() and torch.cuda.is_bf16_supported()
+    if device == "cpu":
+        try:
+            return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+        except (AttributeError, RuntimeError):
+            return False
+    return False
+
 
 class E5Embeddings(Embeddings):
     """
@@ -33,7 +75,7 @@ class E5Embeddings(Embeddings):
     - Support multilingue (100+ langues)
     - Average pooling avec masking
     - Normalisation L2
-    - Traitement par batch
+    - Traitement par batch (optionnellement regroupé par longueur de tokens)
     """
 
     def __init__(
@@ -42,6 +84,22 @@ class E5Embeddings(Embeddings):
         device: Optional[str] = None,
         batch_size: int = 32,
         max_length: int = 512,
+        sort_by_length: bool = False,
+        max_tokens_per_batch: Optional[int] = None,
+        backend: str = "torch",
+        onnx_path: Optional[str] = None,
+        precision: str = "fp32",
+        cache_path: Optional[str] = None,
+        query_cache_size: int = 0,
+        query_cache_ttl: Optional[float] = None,
+        workers: int = 1,
+        threads_per_worker: Optional[int] = None,
+        pipelined_tokenization: bool = False,
+        mmap_weights: bool = False,
+        lazy_load: bool = False,
+        num_threads: Optional[int] = None,
+        query_max_length: Optional[int] = None,
+        query_buffer: bool = False,
     ):
         """
         Initialise le modèle E5 pour les embeddings.
@@ -51,10 +109,71 @@ class E5Embeddings(Embeddings):
             device: Device à utiliser ('cuda', 'mps', 'cpu'). Auto-détecté si None
             batch_size: Taille des batchs pour le traitement
             max_length: Longueur maximale des séquences
+            sort_by_length: Si True, trie les textes par longueur de tokens avant
+                le découpage en batchs pour limiter le padding
+            max_tokens_per_batch: Budget de tokens (padding inclus) par batch.
+                Si défini, les batchs sont construits selon ce budget au lieu
+                d'un nombre fixe de textes (batch_size est alors ignoré)
+            backend: Moteur d'inférence ('torch' ou 'onnx')
+            onnx_path: Répertoire du modèle exporté pour le backend 'onnx'
+                (défaut: data/onnx/<model_id>)
+            precision: Précision d'inférence ('fp32', 'int8' ou 'bf16'). 'int8'
+                applique une quantification dynamique des couches Linear (CPU
+                uniquement); 'bf16' charge les poids en bfloat16 (si le device
+                le supporte) avec pooling et normalisation en fp32. Valider
+                l'impact avec embeddings.precision_check
+            cache_path: Fichier SQLite du cache persistant des embeddings de
+                documents (désactivé si None)
+            query_cache_size: Capacité du cache LRU des embeddings de requêtes
+                (désactivé si 0)
+            query_cache_ttl: Durée de vie en secondes des entrées du cache de
+                requêtes (illimitée si None)
+            workers: Nombre de processus encodant les documents en parallèle,
+                chacun avec sa propre copie du modèle (CPU uniquement)
+            threads_per_worker: Threads torch par processus worker
+                (défaut: nombre de coeurs / workers)
+            pipelined_tokenization: Si True, un thread tokenise les batchs
+                suivants pendant le forward du batch courant
+            mmap_weights: Si True, les poids sont lus depuis le fichier
+                safetensors mappé en mémoire et partagés entre processus
+                (backend torch en fp32 sur CPU uniquement)
+            lazy_load: Si True, le tokenizer et le modèle ne sont chargés qu'à
+                la première utilisation (ou par load() / warmup())
+            num_threads: Nombre de threads torch du processus
+                (torch.set_num_threads; inchangé si None)
+            query_max_length: Longueur maximale des requêtes (les requêtes
+                plus longues sont tronquées; défaut: max_length). Les
+                requêtes dépassent rarement 32 tokens: 64 réduit le coût
+                des requêtes longues au prix de leur troncature
+            query_buffer: Si True, les entrées des requêtes sont copiées dans
+                des tenseurs préalloués sur le device (backend torch)
         """
         self.model_id = model_id
         self.batch_size = batch_size
         self.max_length = max_length
+        self.query_max_length = min(query_max_length or max_length, max_length)
+        self.sort_by_length = sort_by_length
+        self.max_tokens_per_batch = max_tokens_per_batch
+        self.backend = backend
+        self.precision = precision
+        self.pipelined_tokenization = pipelined_tokenization
+        # Textes reçus / textes distincts encodés (voir dedup_stats)
+        self._dedup_counts = {"texts": 0, "embedded": 0}
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.cache = None
+        if cache_path:
+            from .cache import EmbeddingCache
+
+            self.cache = EmbeddingCache(cache_path)
+
+        self.query_cache = None
+        if query_cache_size > 0:
+            from .cache import QueryEmbeddingCache
+
+            self.query_cache = QueryEmbeddingCache(
+                capacity=query_cache_size, ttl=query_cache_ttl
+            )
 
         # Détection automatique du device
         # Traiter les chaînes vides comme None
@@ -68,15 +187,216 @@ class E5Embeddings(Embeddings):
         else:
             self.device = device
 
-        logger.info(f"Initialisation du modèle {model_id} sur {self.device}")
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Backend d'embeddings inconnu: {backend}")
+        if precision not in SUPPORTED_PRECISIONS:
+            raise ValueError(f"Précision d'embeddings inconnue: {precision}")
+
+        # La quantification dynamique int8 n'est disponible que sur CPU
+        if precision == "int8" and self.device != "cpu":
+            logger.warning(
+                f"⚠️  La précision int8 s'exécute sur CPU (device {self.device} ignoré)"
+            )
+            self.device = "cpu"
+
+        if precision == "bf16":
+            if backend == "onnx":
+                raise ValueError(
+                    "La précision bf16 n'est pas disponible avec le backend ONNX"
+                )
+            if not is_bf16_supported(self.device):
+                logger.warning(
+                    f"⚠️  bfloat16 non supporté nativement sur {self.device}: "
+                    "utilisation de fp32"
+                )
+                precision = self.precision = "fp32"
+
+        if backend == "onnx" and self.device != "cpu":
+            logger.warning(
+                f"⚠️  Le backend ONNX s'exécute sur CPU (device {self.device} ignoré)"
+            )
+            self.device = "cpu"
+
+        # Le partage des pages du fichier n'a de sens que si les poids sont
+        # utilisés tels quels (pas de conversion, de quantification ni de copie GPU)
+        if mmap_weights and (
+            backend != "torch" or precision != "fp32" or self.device != "cpu"
+        ):
+            logger.warning(
+                "⚠️  Chargement mmap réservé au backend torch fp32 sur CPU: "
+                "chargement standard"
+            )
+            mmap_weights = False
+        self.mmap_weights = mmap_weights
+        self.onnx_path = onnx_path
+
+        # Durée et mémoire résidente de chaque phase de chargement
+        self.load_metrics: Dict[str, Dict[str, float]] = {}
+        self.tokenizer = None
+        self.model = None
+        self.onnx_encoder = None
+        self._loaded = False
+        # Un seul chargement si plusieurs threads appellent load() (lazy_load)
+        self._load_lock = threading.Lock()
+
+        # Tenseurs d'entrée préalloués des requêtes (créés par load())
+        self.query_buffer = query_buffer and backend == "torch"
+        self._query_input_ids: Optional[torch.Tensor] = None
+        self._query_attention_mask: Optional[torch.Tensor] = None
+        self._query_lock = threading.Lock()
+
+        # Pool de processus pour les documents (créé à la première utilisation)
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        self._worker_pool = None
+        if workers > 1 and self.device != "cpu":
+            logger.warning(
+                f"⚠️  Le pool de workers n'est disponible que sur CPU "
+                f"(device {self.device}): encodage dans un seul processus"
+            )
+            self.workers = 1
+        self._worker_config = {
+            "model_id": model_id,
+            "device": self.device,
+            "batch_size": batch_size,
+            "max_length": max_length,
+            "query_max_length": query_max_length,
+            "sort_by_length": sort_by_length,
+            "max_tokens_per_batch": max_tokens_per_batch,
+            "backend": backend,
+            "onnx_path": onnx_path,
+            "precision": precision,
+            "pipelined_tokenization": pipelined_tokenization,
+            "mmap_weights": mmap_weights,
+        }
+
+        if not lazy_load:
+            self.load()
 
-        # Chargement du modèle et du tokenizer
-        self.tokenizer = AutoTokenizer.from_pretrained(model_id)
-        self.model = AutoModel.from_pretrained(model_id)
-        self.model.to(self.device)
-        self.model.eval()
+    def _record_phase(self, phase: str, started_at: float, rss_before: float) -> None:
+        """
+        Enregistre la durée et la mémoire résidente d'une phase de chargement.
+
+        Args:
+            phase: Nom de la phase ('tokenizer', 'model', 'warmup')
+            started_at: Instant de début (time.perf_counter)
+            rss_before: Mémoire résidente (Mo) au début de la phase
+        """
+        from .loading import resident_memory_mb
+
+        rss_after = resident_memory_mb()
+        self.load_metrics[phase] = {
+            "seconds": round(time.perf_counter() - started_at, 3),
+            "rss_mb": round(rss_after, 1),
+            "rss_delta_mb": round(rss_after - rss_before, 1),
+        }
+
+    def load(self) -> None:
+        """
+        Charge le tokenizer et le modèle (si ce n'est pas déjà fait).
+
+        Les durées et la mémoire résidente de chaque phase sont enregistrées
+        dans load_metrics. Les appels concurrents attendent le premier chargement.
+        """
+        if self._loaded:
+            return
+        with self._load_lock:
+            if not self._loaded:
+                self._load()
+
+    def _load(self) -> None:
+        """Charge le tokenizer et le modèle (appelé sous _load_lock)."""
+        from .loading import load_model_mmap, resident_memory_mb
+
+        logger.info(
+            f"Initialisation du modèle {self.model_id} sur {self.device} "
+            f"(backend: {self.backend}, précision: {self.precision})"
+        )
 
-        logger.info("✓ Modèle chargé avec succès (dimension: 1024)")
+        # Chargement du tokenizer
+        started_at, rss_before = time.perf_counter(), resident_memory_mb()
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+        self._record_phase("tokenizer", started_at, rss_before)
+
+        # Chargement du modèle
+        started_at, rss_before = time.perf_counter(), resident_memory_mb()
+        if self.backend == "onnx":
+            from .onnx_backend import OnnxEncoder, default_onnx_dir
+
+            self.onnx_encoder = OnnxEncoder(
+                self.onnx_path or default_onnx_dir(self.model_id),
+                precision=self.precision,
+            )
+        else:
+            if self.mmap_weights:
+                try:
+                    self.model = load_model_mmap(self.model_id)
+                except Exception as e:
+                    # Fichiers absents, safetensors ou état du modèle incompatibles
+                    logger.warning(
+                        f"⚠️  Chargement mmap impossible ({type(e).__name__}: {e}): "
+                        "chargement standard"
+                    )
+                    self.model = None
+                    self.mmap_weights = False
+
+            if self.model is None:
+                # bf16: poids chargés directement en bfloat16 (mémoire divisée par 2)
+                model_kwargs = (
+                    {"dtype": torch.bfloat16} if self.precision == "bf16" else {}
+                )
+                self.model = AutoModel.from_pretrained(self.model_id, **model_kwargs)
+                self.model.to(self.device)
+                self.model.eval()
+
+            if self.precision == "int8":
+                # Poids int8, activations quantifiées dynamiquement à l'exécution
+                self.model = quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+        self._record_phase("model", started_at, rss_before)
+
+        if self.query_buffer:
+            shape = (1, self.query_max_length)
+            self._query_input_ids = torch.zeros(
+                shape, dtype=torch.long, device=self.device
+            )
+            self._query_attention_mask = torch.ones(
+                shape, dtype=torch.long, device=self.device
+            )
+
+        self._loaded = True
+        logger.info(
+            f"✓ Modèle chargé avec succès (dimension: 1024, "
+            f"{self.load_metrics['model']['seconds']:.1f} s, "
+            f"mmap: {'oui' if self.mmap_weights else 'non'})"
+        )
+
+    def warmup(self, lengths: Tuple[int, ...] = WARMUP_SEQUENCE_LENGTHS) -> None:
+        """
+        Exécute un forward sur des séquences de longueurs représentatives.
+
+        Charge le modèle si nécessaire, puis déclenche les allocations et
+        l'initialisation des noyaux de calcul avant la première vraie requête.
+
+        Args:
+            lengths: Longueurs de séquences (en tokens) à parcourir
+        """
+        from .loading import resident_memory_mb
+
+        self.load()
+        started_at, rss_before = time.perf_counter(), resident_memory_mb()
+        for length in lengths:
+            length = min(length, self.max_length)
+            # Environ un token par mot: la troncature borne la longueur réelle
+            text = "query: " + " ".join(["événement"] * length)
+            self._encode_batch([text])
+        # Chemin rapide des requêtes (longueurs courtes)
+        self._encode_query("événement culturel")
+        self._record_phase("warmup", started_at, rss_before)
+        logger.info(
+            f"✓ Warmup terminé ({self.load_metrics['warmup']['seconds']:.2f} s)"
+        )
 
     @staticmethod
     def average_pool(
@@ -108,6 +428,258 @@ class E5Embeddings(Embeddings):
         # Moyenne = Somme / Nombre de tokens
         return sum_embeddings / num_tokens
 
+    def _token_lengths(self, texts: List[str]) -> List[int]:
+        """
+        Calcule la longueur en tokens (après troncature) de chaque texte.
+
+        Args:
+            texts: Liste de textes (déjà préfixés)
+
+        Returns:
+            List[int]: Nombre de tokens de chaque texte
+        """
+        encoded = self.tokenizer(
+            texts,
+            max_length=self.max_length,
+            truncation=True,
+            padding=False,
+        )
+        return [len(ids) for ids in encoded["input_ids"]]
+
+    def _make_batches(self, texts: List[str]) -> List[List[int]]:
+        """
+        Découpe les textes en batchs d'indices.
+
+        Sans tri, les batchs suivent l'ordre d'entrée. Avec `sort_by_length`,
+        les textes sont triés par longueur de tokens afin que chaque batch
+        regroupe des séquences de longueurs voisines (moins de padding).
+
+        Avec `max_tokens_per_batch`, un batch est fermé dès que son coût après
+        padding (nombre de textes × longueur maximale) dépasserait le budget.
+        Un texte plus long que le budget forme un batch à lui seul.
+
+        Args:
+            texts: Liste de textes (déjà préfixés)
+
+        Returns:
+            List[List[int]]: Indices (dans `texts`) de chaque batch
+        """
+        order = list(range(len(texts)))
+        needs_lengths = self.max_tokens_per_batch is not None or (
+            self.sort_by_length and len(texts) > 1
+        )
+
+        if needs_lengths:
+            lengths = self._token_lengths(texts)
+            if self.sort_by_length:
+                order.sort(key=lambda i: lengths[i])
+
+        if self.max_tokens_per_batch is None:
+            return [
+                order[i : i + self.batch_size]
+                for i in range(0, len(order), self.batch_size)
+            ]
+
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_max = 0
+        for i in order:
+            longest = max(current_max, lengths[i])
+            if current and (len(current) + 1) * longest > self.max_tokens_per_batch:
+                batches.append(current)
+                current, longest = [], lengths[i]
+            current.append(i)
+            current_max = longest
+
+        if current:
+            batches.append(current)
+
+        return batches
+
+    def _tokenize_batch(self, batch_texts: List[str]) -> Dict[str, Any]:
+        """
+        Tokenise un batch de textes au format attendu par le backend.
+
+        Args:
+            batch_texts: Textes du batch (déjà préfixés)
+
+        Returns:
+            dict: Tenseurs du tokenizer (numpy pour ONNX, torch sinon)
+        """
+        return self.tokenizer(
+            batch_texts,
+            max_length=self.max_length,
+            padding=True,
+            truncation=True,
+            return_tensors="np" if self.backend == "onnx" else "pt",
+        )
+
+    def _forward_batch(self, batch_dict: Dict[str, Any]) -> np.ndarray:
+        """
+        Calcule les embeddings d'un batch déjà tokenisé (forward, pooling,
+        normalisation).
+
+        Args:
+            batch_dict: Sortie de _tokenize_batch
+
+        Returns:
+            np.ndarray: Embeddings normalisés du batch [batch, embedding_dim]
+        """
+        if self.backend == "onnx":
+            # Le graphe ONNX inclut pooling et normalisation
+            return self.onnx_encoder(
+                batch_dict["input_ids"], batch_dict["attention_mask"]
+            )
+
+        # Déplacer les tenseurs sur le device approprié
+        batch_dict = {k: v.to(self.device) for k, v in batch_dict.items()}
+
+        # Calcul des embeddings (sans calcul de gradient)
+        with torch.no_grad():
+            outputs = self.model(**batch_dict)
+
+        # Pooling moyen avec masking (toujours en fp32, même si le modèle est en bf16)
+        embeddings = self.average_pool(
+            outputs.last_hidden_state.float(), batch_dict["attention_mask"]
+        )
+
+        # Normalisation L2 (recommandé pour la similarité cosinus)
+        embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+
+        # Déplacer sur CPU et convertir en numpy
+        return embeddings.cpu().numpy()
+
+    def _encode_batch(self, batch_texts: List[str]) -> np.ndarray:
+        """
+        Encode un batch de textes (tokenisation, forward, pooling, normalisation).
+
+        Args:
+            batch_texts: Textes du batch (déjà préfixés)
+
+        Returns:
+            np.ndarray: Embeddings normalisés du batch [batch, embedding_dim]
+        """
+        return self._forward_batch(self._tokenize_batch(batch_texts))
+
+    def _encode_query(self, text: str) -> np.ndarray:
+        """
+        Encode une requête seule, sans la machinerie des batchs.
+
+        Une séquence unique n'a pas de padding: la tokenisation est limitée à
+        query_max_length, le masque n'intervient pas dans le pooling (simple
+        moyenne) et le forward s'exécute sous torch.inference_mode. Avec
+        query_buffer, les identifiants de tokens sont copiés dans un tenseur
+        préalloué sur le device au lieu d'allouer de nouveaux tenseurs.
+
+        Args:
+            text: Texte de la requête (sans préfixe)
+
+        Returns:
+            np.ndarray: Embedding normalisé de la requête [embedding_dim]
+        """
+        encoded = self.tokenizer(
+            [f"query: {text}"],
+            max_length=self.query_max_length,
+            truncation=True,
+            return_tensors="np" if self.backend == "onnx" else "pt",
+        )
+
+        if self.backend == "onnx":
+            return self.onnx_encoder(encoded["input_ids"], encoded["attention_mask"])[0]
+
+        # Le verrou ne protège que les tenseurs préalloués partagés
+        lock = self._query_lock if self._query_input_ids is not None else nullcontext()
+        with lock, torch.inference_mode():
+            if self._query_input_ids is not None:
+                length = encoded["input_ids"].shape[1]
+                input_ids = self._query_input_ids[:, :length]
+                input_ids.copy_(encoded["input_ids"])
+                attention_mask = self._query_attention_mask[:, :length]
+            else:
+                input_ids = encoded["input_ids"].to(self.device)
+                attention_mask = encoded["attention_mask"].to(self.device)
+
+            outputs = self.model(input_ids=input_ids, attention_mask=attention_mask)
+            # Pooling moyen (fp32) puis normalisation L2
+            embedding = outputs.last_hidden_state[0].float().mean(dim=0)
+            embedding = torch.nn.functional.normalize(embedding, p=2, dim=0)
+            return embedding.cpu().numpy()
+
+    def _encode_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode des requêtes (tronquées à query_max_length).
+
+        Une requête seule passe par le chemin rapide _encode_query; plusieurs
+        requêtes (ex: micro-batching de l'API) sont encodées par batchs.
+
+        Args:
+            texts: Textes des requêtes (sans préfixe)
+
+        Returns:
+            np.ndarray: Embeddings normalisés [n_texts, embedding_dim]
+        """
+        if len(texts) == 1:
+            return self._encode_query(texts[0])[None, :]
+
+        prefixed_texts = [f"query: {text}" for text in texts]
+        all_embeddings = []
+        for i in range(0, len(prefixed_texts), self.batch_size):
+            batch_dict = self.tokenizer(
+                prefixed_texts[i : i + self.batch_size],
+                max_length=self.query_max_length,
+                padding=True,
+                truncation=True,
+                return_tensors="np" if self.backend == "onnx" else "pt",
+            )
+            all_embeddings.append(self._forward_batch(batch_dict))
+        return np.vstack(all_embeddings)
+
+    def _iter_tokenized_batches(
+        self, batches_texts: List[List[str]]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Tokenise les batchs dans un thread de fond, avec une file bornée.
+
+        Le tokenizer rapide (Rust) libère le GIL: la tokenisation du batch
+        suivant se fait donc en parallèle du forward du batch courant.
+
+        Args:
+            batches_texts: Textes de chaque batch (déjà préfixés)
+
+        Yields:
+            dict: Batchs tokenisés, dans l'ordre
+        """
+        tokenized: queue.Queue = queue.Queue(maxsize=TOKENIZATION_PREFETCH)
+        stop = threading.Event()
+
+        def produce():
+            for batch_texts in batches_texts:
+                try:
+                    item = self._tokenize_batch(batch_texts)
+                except Exception as e:
+                    item = e
+                # Attente bornée pour pouvoir s'arrêter si le consommateur abandonne
+                while not stop.is_set():
+                    try:
+                        tokenized.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set() or isinstance(item, Exception):
+                    return
+
+        thread = threading.Thread(target=produce, name="e5-tokenizer", daemon=True)
+        thread.start()
+        try:
+            for _ in batches_texts:
+                item = tokenized.get()
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
     def _embed_texts(self, texts: List[str], prefix: str = "passage: ") -> np.ndarray:
         """
         Génère les embeddings pour une liste de textes.
@@ -116,6 +688,10 @@ class E5Embeddings(Embeddings):
         - "passage: " pour les documents à indexer
         - "query: " pour les requêtes de recherche
 
+        Les embeddings sont toujours retournés dans l'ordre d'entrée, même
+        lorsque les batchs sont regroupés par longueur. Les requêtes
+        ("query: ") passent par _encode_queries.
+
         Args:
             texts: Liste de textes à encoder
             prefix: Préfixe à ajouter aux textes (requis pour E5)
@@ -123,49 +699,301 @@ class E5Embeddings(Embeddings):
         Returns:
             np.ndarray: Matrice numpy des embeddings [n_texts, embedding_dim]
         """
+        self.load()
+
+        if prefix == "query: ":
+            return self._encode_queries(texts)
+
         # Ajouter le préfixe requis par E5
         prefixed_texts = [f"{prefix}{text}" for text in texts]
 
-        all_embeddings = []
+        batches = self._make_batches(prefixed_texts)
 
         # Traiter par batch pour l'efficacité
-        for i in range(0, len(prefixed_texts), self.batch_size):
-            batch_texts = prefixed_texts[i : i + self.batch_size]
+        if self.pipelined_tokenization and len(batches) > 1:
+            batches_texts = [[prefixed_texts[i] for i in batch] for batch in batches]
+            all_embeddings = [
+                self._forward_batch(batch_dict)
+                for batch_dict in self._iter_tokenized_batches(batches_texts)
+            ]
+        else:
+            all_embeddings = [
+                self._encode_batch([prefixed_texts[i] for i in batch])
+                for batch in batches
+            ]
 
-            # Tokenisation
-            batch_dict = self.tokenizer(
-                batch_texts,
-                max_length=self.max_length,
-                padding=True,
-                truncation=True,
-                return_tensors="pt",
+        # Concaténer tous les batches
+        embeddings = np.vstack(all_embeddings)
+
+        # Batchs triés par longueur: replacer chaque ligne à sa position d'origine
+        if self.sort_by_length:
+            order = np.concatenate([np.asarray(batch) for batch in batches])
+            restored = np.empty_like(embeddings)
+            restored[order] = embeddings
+            embeddings = restored
+
+        return embeddings
+
+    def _embed_documents_parallel(
+        self, texts: List[str], prefix: str = "passage: "
+    ) -> np.ndarray:
+        """
+        Encode les documents avec le pool de processus s'il est activé.
+
+        Les petits volumes (un seul batch) restent encodés dans le processus
+        courant, le coût de démarrage des workers n'étant pas rentable.
+
+        Args:
+            texts: Liste de textes à encoder
+            prefix: Préfixe à ajouter aux textes (requis pour E5)
+
+        Returns:
+            np.ndarray: Matrice numpy des embeddings [n_texts, embedding_dim]
+        """
+        if self.workers <= 1 or len(texts) <= self.batch_size:
+            return self._embed_texts(texts, prefix=prefix)
+
+        if self._worker_pool is None:
+            from .pool import EmbeddingWorkerPool
+
+            self._worker_pool = EmbeddingWorkerPool(
+                self._worker_config,
+                workers=self.workers,
+                threads_per_worker=self.threads_per_worker,
             )
-            # Déplacer les tenseurs sur le device approprié
-            batch_dict = {k: v.to(self.device) for k, v in batch_dict.items()}
+        return self._worker_pool.embed(texts, prefix=prefix)
+
+    def close(self) -> None:
+        """Arrête le pool de processus workers s'il a été démarré."""
+        if self._worker_pool is not None:
+            self._worker_pool.close()
+            self._worker_pool = None
+
+    def _cache_namespace(self, prefix: str) -> str:
+        """
+        Identifie les paramètres qui influencent un embedding (clé de cache).
+
+        Args:
+            prefix: Préfixe E5 utilisé
+
+        Returns:
+            str: Espace de noms du cache
+        """
+        namespace = "|".join(
+            (self.model_id, self.backend, self.precision, prefix, str(self.max_length))
+        )
+        if self.backend == "onnx":
+            namespace += f"|{self._onnx_fingerprint()}"
+        return namespace
+
+    def _onnx_fingerprint(self) -> str:
+        """
+        Identifie le fichier ONNX utilisé (chemin, taille, date de modification).
+
+        Un ré-export du modèle change l'empreinte: les vecteurs calculés avec
+        l'ancien fichier ne sont plus servis par le cache.
+
+        Returns:
+            str: Empreinte du modèle ONNX
+        """
+        from .onnx_backend import default_onnx_dir, onnx_model_path
+
+        path = onnx_model_path(
+            self.onnx_path or default_onnx_dir(self.model_id), self.precision
+        )
+        try:
+            stat = path.stat()
+        except OSError:
+            return str(path)
+        return f"{path}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _embed_texts_cached(
+        self, texts: List[str], prefix: str = "passage: "
+    ) -> np.ndarray:
+        """
+        Génère les embeddings en ne calculant que les textes absents du cache.
 
-            # Calcul des embeddings (sans calcul de gradient)
-            with torch.no_grad():
-                outputs = self.model(**batch_dict)
+        Args:
+            texts: Liste de textes à encoder
+            prefix: Préfixe à ajouter aux textes (requis pour E5)
 
-            # Pooling moyen avec masking
-            embeddings = self.average_pool(
-                outputs.last_hidden_state, batch_dict["attention_mask"]
+        Returns:
+            np.ndarray: Matrice numpy des embeddings [n_texts, embedding_dim]
+        """
+        if self.cache is None or not texts:
+            return self._embed_documents_parallel(texts, prefix=prefix)
+
+        namespace = self._cache_namespace(prefix)
+        keys = [self.cache.make_key(namespace, text) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        computed = None
+        if missing:
+            computed = self._embed_documents_parallel(
+                [texts[i] for i in missing], prefix=prefix
+            )
+            self.cache.put_many(
+                (keys[i], computed[row]) for row, i in enumerate(missing)
             )
 
-            # Normalisation L2 (recommandé pour la similarité cosinus)
-            embeddings = torch.nn.functional.normalize(embeddings, p=2, dim=1)
+        dimension = computed.shape[1] if computed is not None else len(
+            next(iter(cached.values()))
+        )
+        embeddings = np.empty((len(texts), dimension), dtype=np.float32)
+        for i, key in enumerate(keys):
+            if key in cached:
+                embeddings[i] = cached[key]
+        if computed is not None:
+            embeddings[missing] = computed
 
-            # Déplacer sur CPU et convertir en numpy
-            all_embeddings.append(embeddings.cpu().numpy())
+        logger.info(
+            f"Cache d'embeddings: {len(texts) - len(missing)} hits, "
+            f"{len(missing)} misses"
+        )
+        return embeddings
 
-        # Concaténer tous les batches
-        return np.vstack(all_embeddings)
+    def _embed_documents_dedup(
+        self,
+        texts: List[str],
+        shared: Optional[Dict[str, np.ndarray]] = None,
+        remaining: Optional[Counter] = None,
+    ) -> np.ndarray:
+        """
+        Encode des documents en n'encodant qu'une fois chaque texte distinct.
+
+        Les chunks identiques (ex: même description pour toutes les dates
+        d'un événement récurrent) reçoivent tous le vecteur calculé pour leur
+        première occurrence.
+
+        Args:
+            texts: Liste de textes à encoder
+            shared: Vecteurs des textes déjà encodés dans une tranche
+                précédente et encore attendus (mis à jour sur place)
+            remaining: Nombre d'occurrences de chaque texte à partir de cette
+                tranche (mis à jour sur place). Sans lui, aucun vecteur n'est
+                conservé dans shared
+
+        Returns:
+            np.ndarray: Matrice float32 C-contiguë [n_texts, embedding_dim]
+        """
+        shared = {} if shared is None else shared
+
+        # Position de chaque texte distinct qui reste à encoder
+        positions: Dict[str, int] = {}
+        for text in texts:
+            if text not in shared and text not in positions:
+                positions[text] = len(positions)
+
+        self._dedup_counts["texts"] += len(texts)
+        self._dedup_counts["embedded"] += len(positions)
+
+        if positions:
+            computed = self._embed_texts_cached(list(positions), prefix="passage: ")
+            computed = np.asarray(computed, dtype=np.float32)
+            if len(positions) == len(texts):
+                embeddings = np.ascontiguousarray(computed)
+            else:
+                rows = np.asarray([positions.get(text, 0) for text in texts])
+                embeddings = computed[rows]
+                for i, text in enumerate(texts):
+                    if text not in positions:
+                        embeddings[i] = shared[text]
+        else:
+            embeddings = np.vstack([shared[text] for text in texts])
+
+        if remaining is not None:
+            for text in texts:
+                remaining[text] -= 1
+            for text in set(texts):
+                if remaining[text] <= 0:
+                    shared.pop(text, None)
+                    del remaining[text]
+                elif text in positions:
+                    shared[text] = computed[positions[text]].copy()
+
+        return embeddings
+
+    def dedup_stats(self) -> Dict[str, float]:
+        """
+        Retourne les statistiques de déduplication des documents.
+
+        Returns:
+            dict: Textes reçus, textes distincts encodés, doublons et taux de
+                doublons (dedup_ratio)
+        """
+        texts = self._dedup_counts["texts"]
+        embedded = self._dedup_counts["embedded"]
+        return {
+            "texts": texts,
+            "embedded": embedded,
+            "duplicates": texts - embedded,
+            "dedup_ratio": (texts - embedded) / texts if texts else 0.0,
+        }
+
+    def embed_documents_array(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode une liste de documents et retourne directement la matrice numpy.
+
+        Évite la conversion en listes Python de embed_documents (plusieurs Go
+        de mémoire temporaire pour 100k chunks): la matrice peut être ajoutée
+        telle quelle à un index FAISS (voir vectors.create_vector_store).
+        Les textes identiques ne sont encodés qu'une fois.
+
+        Args:
+            texts: Liste de textes à encoder
+
+        Returns:
+            np.ndarray: Matrice float32 C-contiguë [n_texts, embedding_dim]
+        """
+        if not texts:
+            return np.empty((0, self.embedding_dimension()), dtype=np.float32)
+        return self._embed_documents_dedup(texts)
+
+    def embedding_dimension(self) -> int:
+        """
+        Retourne la dimension des embeddings, lue dans la configuration du modèle.
+
+        Returns:
+            int: Dimension des vecteurs (hidden_size)
+        """
+        return AutoConfig.from_pretrained(self.model_id).hidden_size
+
+    def iter_embed_documents(
+        self, texts: List[str], chunk_size: int = STREAM_CHUNK_SIZE
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        Encode les documents par tranches successives (générateur).
+
+        Seule une tranche de vecteurs est en mémoire à la fois: l'appelant
+        (ex: construction de l'index FAISS) peut consommer les vecteurs au
+        fil de l'eau, quelle que soit la taille du corpus. Le tri par
+        longueur, le cache et le pool de workers s'appliquent au sein de
+        chaque tranche. Un texte déjà encodé dans une tranche précédente
+        n'est pas ré-encodé: seuls les vecteurs des textes répétés sont
+        conservés, jusqu'à leur dernière occurrence.
+
+        Args:
+            texts: Liste de textes à encoder
+            chunk_size: Nombre de textes par tranche
+
+        Yields:
+            Tuple[int, np.ndarray]: (position du premier texte de la tranche,
+                matrice float32 [taille de la tranche, embedding_dim])
+        """
+        remaining = Counter(texts)
+        shared: Dict[str, np.ndarray] = {}
+        for offset in range(0, len(texts), chunk_size):
+            yield offset, self._embed_documents_dedup(
+                texts[offset : offset + chunk_size], shared, remaining
+            )
 
     def embed_documents(self, texts: List[str]) -> List[List[float]]:
         """
         Encode une liste de documents (interface LangChain).
 
-        Utilise le préfixe "passage: " pour les documents.
+        Utilise le préfixe "passage: " pour les documents. Si un cache est
+        configuré, seuls les textes absents du cache sont encodés.
 
         Args:
             texts: Liste de textes à encoder
@@ -173,8 +1001,34 @@ class E5Embeddings(Embeddings):
         Returns:
             List[List[float]]: Liste d'embeddings (liste de listes de floats)
         """
-        embeddings = self._embed_texts(texts, prefix="passage: ")
-        return embeddings.tolist()
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode plusieurs requêtes en un seul passage dans le modèle.
+
+        Les requêtes présentes dans le cache LRU (s'il est activé) ne sont
+        pas ré-encodées; les autres sont encodées ensemble puis mises en cache.
+
+        Args:
+            texts: Textes des requêtes
+
+        Returns:
+            np.ndarray: Embeddings des requêtes [n_texts, embedding_dim]
+        """
+        if self.query_cache is None:
+            # Pour les requêtes, E5 recommande le préfixe "query: "
+            return self._embed_texts(texts, prefix="query: ")
+
+        vectors: List[Optional[np.ndarray]] = [self.query_cache.get(t) for t in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            computed = self._embed_texts([texts[i] for i in missing], prefix="query: ")
+            for row, i in enumerate(missing):
+                vectors[i] = computed[row]
+                self.query_cache.put(texts[i], computed[row])
+
+        return np.vstack(vectors)
 
     def embed_query(self, text: str) -> List[float]:
         """
@@ -182,6 +1036,7 @@ class E5Embeddings(Embeddings):
 
         Utilise le préfixe "query: " pour les requêtes (différent des documents).
         Cette distinction améliore la qualité de la recherche sémantique.
+        Les requêtes répétées sont servies par le cache LRU s'il est activé.
 
         Args:
             text: Texte de la requête
@@ -189,30 +1044,179 @@ class E5Embeddings(Embeddings):
         Returns:
             List[float]: Embedding de la requête (liste de floats)
         """
-        # Pour les requêtes, E5 recommande le préfixe "query: "
-        embeddings = self._embed_texts([text], prefix="query: ")
-        return embeddings[0].tolist()
+        return self.embed_queries([text])[0].tolist()
+
+
+def env_flag(name: str, default: Optional[bool] = None) -> Optional[bool]:
+    """
+    Lit une variable d'environnement booléenne ("1", "true", "yes" ou "on").
+
+    Args:
+        name: Nom de la variable
+        default: Valeur retournée si la variable n'est pas définie
+
+    Returns:
+        Optional[bool]: Valeur de la variable, ou default si elle n'est pas définie
+    """
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_embeddings_options_from_env(prefix: str = "EMBEDDINGS_") -> Dict[str, Any]:
+    """
+    Lit les options avancées du modèle d'embeddings depuis l'environnement.
+
+    Seules les variables définies sont retournées, afin de conserver les
+    valeurs par défaut de E5Embeddings pour les autres options.
+
+    Variables reconnues (préfixe EMBEDDINGS_ par défaut):
+        EMBEDDINGS_SORT_BY_LENGTH: Regroupe les batchs par longueur de tokens
+        EMBEDDINGS_MAX_TOKENS_PER_BATCH: Budget de tokens par batch
+        EMBEDDINGS_BACKEND: Moteur d'inférence ('torch' ou 'onnx')
+        EMBEDDINGS_ONNX_PATH: Répertoire du modèle ONNX exporté
+        EMBEDDINGS_PRECISION: Précision d'inférence ('fp32', 'int8' ou 'bf16')
+        EMBEDDINGS_CACHE_PATH: Fichier SQLite du cache persistant des embeddings
+        EMBEDDINGS_QUERY_CACHE_SIZE: Capacité du cache LRU des requêtes
+        EMBEDDINGS_QUERY_CACHE_TTL: Durée de vie (secondes) des requêtes en cache
+        EMBEDDINGS_WORKERS: Nombre de processus d'encodage des documents
+        EMBEDDINGS_THREADS_PER_WORKER: Threads torch par processus worker
+        EMBEDDINGS_PIPELINED_TOKENIZATION: Tokenise en parallèle du forward
+        EMBEDDINGS_MMAP: Poids mappés en mémoire depuis les safetensors
+        EMBEDDINGS_LAZY_LOAD: Chargement du modèle à la première utilisation
+        EMBEDDINGS_NUM_THREADS: Nombre de threads torch
+        EMBEDDINGS_QUERY_MAX_LENGTH: Longueur maximale des requêtes (tokens)
+        EMBEDDINGS_QUERY_BUFFER: Entrées des requêtes dans des tenseurs préalloués
+
+    Args:
+        prefix: Préfixe des variables (ex: "CASCADE_EMBEDDINGS_" pour le petit
+            modèle de la cascade, configuré indépendamment du modèle principal)
+
+    Returns:
+        Dict[str, Any]: Arguments nommés à transmettre à E5Embeddings
+    """
+    options: Dict[str, Any] = {}
+
+    sort_by_length = env_flag(f"{prefix}SORT_BY_LENGTH")
+    if sort_by_length is not None:
+        options["sort_by_length"] = sort_by_length
+
+    max_tokens_per_batch = os.getenv(f"{prefix}MAX_TOKENS_PER_BATCH")
+    if max_tokens_per_batch:
+        options["max_tokens_per_batch"] = int(max_tokens_per_batch)
+
+    backend = os.getenv(f"{prefix}BACKEND")
+    if backend:
+        options["backend"] = backend.strip().lower()
+
+    onnx_path = os.getenv(f"{prefix}ONNX_PATH")
+    if onnx_path:
+        options["onnx_path"] = onnx_path
+
+    precision = os.getenv(f"{prefix}PRECISION")
+    if precision:
+        options["precision"] = precision.strip().lower()
+
+    cache_path = os.getenv(f"{prefix}CACHE_PATH")
+    if cache_path:
+        options["cache_path"] = cache_path
+
+    query_cache_size = os.getenv(f"{prefix}QUERY_CACHE_SIZE")
+    if query_cache_size:
+        options["query_cache_size"] = int(query_cache_size)
+
+    query_cache_ttl = os.getenv(f"{prefix}QUERY_CACHE_TTL")
+    if query_cache_ttl:
+        options["query_cache_ttl"] = float(query_cache_ttl)
+
+    workers = os.getenv(f"{prefix}WORKERS")
+    if workers:
+        options["workers"] = int(workers)
+
+    threads_per_worker = os.getenv(f"{prefix}THREADS_PER_WORKER")
+    if threads_per_worker:
+        options["threads_per_worker"] = int(threads_per_worker)
+
+    pipelined_tokenization = env_flag(f"{prefix}PIPELINED_TOKENIZATION")
+    if pipelined_tokenization is not None:
+        options["pipelined_tokenization"] = pipelined_tokenization
+
+    mmap_weights = env_flag(f"{prefix}MMAP")
+    if mmap_weights is not None:
+        options["mmap_weights"] = mmap_weights
+
+    lazy_load = env_flag(f"{prefix}LAZY_LOAD")
+    if lazy_load is not None:
+        options["lazy_load"] = lazy_load
+
+    num_threads = os.getenv(f"{prefix}NUM_THREADS")
+    if num_threads:
+        options["num_threads"] = int(num_threads)
+
+    query_max_length = os.getenv(f"{prefix}QUERY_MAX_LENGTH")
+    if query_max_length:
+        options["query_max_length"] = int(query_max_length)
+
+    query_buffer = env_flag(f"{prefix}QUERY_BUFFER")
+    if query_buffer is not None:
+        options["query_buffer"] = query_buffer
+
+    return options
 
 
 def get_embeddings_model(
-    model_id: Optional[str] = None, device: Optional[str] = None, batch_size: int = 32
+    model_id: Optional[str] = None,
+    device: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    use_profile: bool = False,
+    env_prefix: str = "EMBEDDINGS_",
+    **kwargs: Any,
 ) -> E5Embeddings:
     """
     Factory function pour créer une instance du modèle d'embeddings E5.
 
+    Les options sont prises, par priorité croissante, dans le profil
+    d'autotuning (avec use_profile, voir embeddings.autotune), les variables
+    d'environnement puis les arguments.
+
     Args:
         model_id: Identifiant du modèle (par défaut depuis .env ou multilingual-e5-large)
         device: Device à utiliser (auto-détecté si None)
-        batch_size: Taille des batchs pour le traitement
+        batch_size: Taille des batchs pour le traitement (défaut: profil, sinon 32)
+        use_profile: Applique le profil d'autotuning (construction de l'index);
+            il fixe notamment le nombre de threads torch du processus
+        env_prefix: Préfixe des variables d'environnement des options (voir
+            get_embeddings_options_from_env)
+        **kwargs: Options supplémentaires de E5Embeddings (prioritaires sur les
+            variables d'environnement, voir get_embeddings_options_from_env)
 
     Returns:
         E5Embeddings: Instance du modèle d'embeddings configuré
     """
+    from .autotune import get_profile_path, load_profile, profile_options
+
     if model_id is None:
         model_id = os.getenv("EMBEDDINGS_MODEL", "intfloat/multilingual-e5-large")
 
+    options: Dict[str, Any] = {}
+    profile = load_profile() if use_profile else None
+    if profile is not None:
+        options.update(profile_options(profile, model_id))
+        if options:
+            logger.info(f"Profil d'embeddings appliqué ({get_profile_path()}): {options}")
+    options.update(get_embeddings_options_from_env(env_prefix))
+    options.update(kwargs)
+
+    if batch_size is None:
+        batch_size = options.pop("batch_size", 32)
+    else:
+        options.pop("batch_size", None)
+
     logger.info(f"Initialisation du modèle d'embeddings: {model_id}")
-    return E5Embeddings(model_id=model_id, device=device, batch_size=batch_size)
+    return E5Embeddings(
+        model_id=model_id, device=device, batch_size=batch_size, **options
+    )
 
 
 def main():
@@ -0,0 +1,191 @@
+"""
+Chargement du modèle d'embeddings depuis des safetensors mappés en mémoire.
+
+Avec AutoModel.from_pretrained, chaque processus (workers de l'API, pool
+d'encodage) copie les ~2 Go de poids dans sa mémoire privée. Ici, les
+tenseurs du modèle pointent directement sur le fichier safetensors mappé
+(mmap copy-on-write): les pages sont partagées via le cache du système
+entre tous les processus qui chargent le même fichier.
+
+Le module fournit aussi la mesure de la mémoire résidente utilisée pour les
+métriques de chargement (voir E5Embeddings.load_metrics).
+"""
+
+from pathlib import Path
+from typing import Dict, List
+import json
+import logging
+import mmap
+import os
+import resource
+import struct
+import sys
+
+import torch
+from transformers import AutoConfig, AutoModel
+from transformers.modeling_utils import no_init_weights
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+SAFETENSORS_FILENAME = "model.safetensors"
+SAFETENSORS_INDEX_FILENAME = "model.safetensors.index.json"
+
+# Types safetensors → types torch
+_SAFETENSORS_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def resident_memory_mb() -> float:
+    """
+    Retourne la mémoire résidente (RSS) du processus courant en Mo.
+
+    Sous Linux, la valeur courante est lue dans /proc; ailleurs, le pic de
+    mémoire résidente est utilisé à défaut.
+
+    Returns:
+        float: Mémoire résidente en Mo
+    """
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss est en octets sur macOS, en Ko ailleurs
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def resolve_safetensors_files(model_id: str) -> List[Path]:
+    """
+    Trouve le ou les fichiers safetensors d'un modèle (local ou HuggingFace).
+
+    Args:
+        model_id: Répertoire local ou identifiant HuggingFace du modèle
+
+    Returns:
+        List[Path]: Fichiers safetensors (plusieurs si le modèle est découpé)
+
+    Raises:
+        FileNotFoundError: Si le modèle n'est pas disponible en safetensors
+    """
+    if os.path.isdir(model_id):
+        base = Path(model_id)
+        if (base / SAFETENSORS_FILENAME).exists():
+            return [base / SAFETENSORS_FILENAME]
+        index_path = base / SAFETENSORS_INDEX_FILENAME
+        if not index_path.exists():
+            raise FileNotFoundError(f"Aucun fichier safetensors dans {model_id}")
+        with open(index_path, "r", encoding="utf-8") as f:
+            shards = sorted(set(json.load(f)["weight_map"].values()))
+        return [base / shard for shard in shards]
+
+    from huggingface_hub import hf_hub_download
+    from huggingface_hub.utils import EntryNotFoundError
+
+    try:
+        return [Path(hf_hub_download(model_id, SAFETENSORS_FILENAME))]
+    except EntryNotFoundError:
+        pass
+
+    try:
+        index_path = hf_hub_download(model_id, SAFETENSORS_INDEX_FILENAME)
+    except EntryNotFoundError as e:
+        raise FileNotFoundError(
+            f"Le modèle {model_id} n'est pas disponible en safetensors"
+        ) from e
+    with open(index_path, "r", encoding="utf-8") as f:
+        shards = sorted(set(json.load(f)["weight_map"].values()))
+    return [Path(hf_hub_download(model_id, shard)) for shard in shards]
+
+
+def load_safetensors_mmap(path: Path) -> Dict[str, torch.Tensor]:
+    """
+    Ouvre un fichier safetensors sans copier les poids en mémoire.
+
+    Chaque tenseur est une vue sur le fichier mappé en copy-on-write: les
+    pages ne sont lues qu'à l'usage et restent partagées entre processus
+    tant qu'elles ne sont pas modifiées.
+
+    Args:
+        path: Chemin du fichier safetensors
+
+    Returns:
+        dict: Nom du paramètre → tenseur adossé au fichier
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    # Format: longueur de l'en-tête (u64 little-endian), en-tête JSON, données
+    header_size = struct.unpack("<Q", buffer[:8])[0]
+    header = json.loads(buffer[8 : 8 + header_size])
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _SAFETENSORS_DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        count = (end - start) // dtype.itemsize
+        if count == 0:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        tensors[name] = torch.frombuffer(
+            buffer, dtype=dtype, count=count, offset=data_start + start
+        ).reshape(info["shape"])
+    return tensors
+
+
+def load_model_mmap(model_id: str) -> torch.nn.Module:
+    """
+    Charge un modèle HuggingFace dont les poids sont mappés en mémoire.
+
+    Le modèle est construit sans initialisation des poids, puis ses
+    paramètres sont remplacés (assign=True) par les tenseurs du fichier.
+
+    Args:
+        model_id: Répertoire local ou identifiant HuggingFace du modèle
+
+    Returns:
+        torch.nn.Module: Modèle en mode évaluation
+
+    Raises:
+        FileNotFoundError: Si le modèle n'est pas disponible en safetensors
+        ValueError: Si des poids du modèle sont absents du fichier
+    """
+    state_dict: Dict[str, torch.Tensor] = {}
+    for path in resolve_safetensors_files(model_id):
+        state_dict.update(load_safetensors_mmap(path))
+
+    config = AutoConfig.from_pretrained(model_id)
+    with no_init_weights():
+        model = AutoModel.from_config(config)
+
+    # Les checkpoints de modèles de tâche préfixent les poids (ex: "roberta.")
+    prefix = f"{model.base_model_prefix}."
+    state_dict = {
+        key[len(prefix) :] if key.startswith(prefix) else key: tensor
+        for key, tensor in state_dict.items()
+    }
+
+    missing, _ = model.load_state_dict(state_dict, strict=False, assign=True)
+    # La tête de pooling n'est pas utilisée par E5 (average pooling)
+    missing = [key for key in missing if not key.startswith("pooler.")]
+    if missing:
+        raise ValueError(f"Poids absents du fichier safetensors: {missing[:5]}")
+
+    return model.eval()
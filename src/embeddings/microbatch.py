@@ -0,0 +1,180 @@
+"""
+Micro-batching asynchrone des embeddings de requêtes.
+
+Sous charge, chaque requête /search encode sa question seule (batch de 1),
+ce qui exploite mal les multiplications matricielles du CPU. Ce module
+regroupe les requêtes concurrentes pendant au plus N millisecondes (ou
+jusqu'à M requêtes), les encode en un seul forward, puis renvoie chaque
+embedding à l'appelant qui l'attend.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+
+import numpy as np
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Erreur renvoyée aux requêtes en attente quand la tâche de fond s'arrête
+WORKER_STOPPED = "Tâche de micro-batching arrêtée"
+
+
+def _fail_batch(
+    batch: Iterable[Tuple[str, asyncio.Future]], error: BaseException
+) -> None:
+    """
+    Fait échouer les requêtes encore en attente d'un batch.
+
+    Args:
+        batch: Couples (texte, future) des appelants
+        error: Exception renvoyée à chaque appelant
+    """
+    for _, future in batch:
+        if not future.done() and not future.get_loop().is_closed():
+            future.set_exception(error)
+
+
+class QueryMicroBatcher:
+    """
+    Regroupe les appels concurrents à embed_query en batchs.
+
+    Le modèle n'est appelé que par une seule tâche de fond, dans un thread
+    séparé: la boucle asyncio reste libre d'accepter de nouvelles requêtes
+    pendant le forward, qui constitueront le batch suivant.
+    """
+
+    def __init__(self, embeddings: Any, max_batch_size: int = 16, max_wait_ms: float = 5.0):
+        """
+        Args:
+            embeddings: Modèle d'embeddings exposant embed_queries (E5Embeddings)
+            max_batch_size: Nombre maximal de requêtes par forward
+            max_wait_ms: Délai maximal d'attente (ms) après la première requête
+                d'un batch avant de lancer le forward
+        """
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.queries = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    def _ensure_worker(self) -> None:
+        """Démarre la tâche de fond dans la boucle courante si nécessaire."""
+        if self._worker is None or self._worker.done():
+            # Les requêtes restées dans la file de l'ancienne tâche n'auraient
+            # jamais de réponse: elles échouent avant le remplacement de la file
+            self._fail_queued(RuntimeError(WORKER_STOPPED))
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    def _fail_queued(self, error: BaseException) -> None:
+        """
+        Vide la file et fait échouer les requêtes qui y attendaient.
+
+        Args:
+            error: Exception renvoyée à chaque appelant
+        """
+        if self._queue is None:
+            return
+        queued = []
+        while not self._queue.empty():
+            queued.append(self._queue.get_nowait())
+        _fail_batch(queued, error)
+
+    async def embed_query(self, text: str) -> List[float]:
+        """
+        Encode une requête en la joignant au prochain batch.
+
+        Args:
+            text: Texte de la requête
+
+        Returns:
+            List[float]: Embedding de la requête
+        """
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future))
+        return await future
+
+    async def _collect_batch(self) -> List[Tuple[str, asyncio.Future]]:
+        """
+        Attend une première requête puis complète le batch jusqu'au délai
+        maximal ou à la taille maximale.
+
+        Returns:
+            list: Couples (texte, future) du batch
+        """
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait_ms / 1000.0
+
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+            except asyncio.CancelledError:
+                _fail_batch(batch, RuntimeError(WORKER_STOPPED))
+                raise
+
+        return batch
+
+    async def _run(self) -> None:
+        """Boucle de fond: collecte, encode et distribue les résultats."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect_batch()
+            texts = [text for text, _ in batch]
+
+            try:
+                vectors: np.ndarray = await loop.run_in_executor(
+                    None, self.embeddings.embed_queries, texts
+                )
+            except asyncio.CancelledError:
+                _fail_batch(batch, RuntimeError(WORKER_STOPPED))
+                raise
+            except Exception as e:
+                logger.error(f"❌ Erreur lors de l'encodage d'un batch de requêtes: {e}")
+                _fail_batch(batch, e)
+                continue
+
+            self.batches += 1
+            self.queries += len(batch)
+            for (_, future), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector.tolist())
+
+    async def stop(self) -> None:
+        """Arrête la tâche de fond (à appeler à l'arrêt de l'application)."""
+        if self._worker is not None and not self._worker.done():
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+        self._worker = None
+        self._fail_queued(RuntimeError(WORKER_STOPPED))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques de regroupement.
+
+        Returns:
+            dict: Nombre de batchs, de requêtes et taille moyenne des batchs
+        """
+        return {
+            "batches": self.batches,
+            "queries": self.queries,
+            "mean_batch_size": self.queries / self.batches if self.batches else 0.0,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+        }
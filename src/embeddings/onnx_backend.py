@@ -0,0 +1,370 @@
+"""
+Backend ONNX Runtime pour le modèle d'embeddings E5.
+
+Ce module permet d'exporter une seule fois le modèle E5 (transformer +
+average pooling + normalisation L2) au format ONNX, puis d'exécuter
+l'inférence via onnxruntime avec les optimisations de graphe activées.
+
+Usage (depuis le répertoire src/):
+    python -m embeddings.onnx_backend [--model-id ID] [--output DIR] [--int8] [--no-verify]
+
+Dépendances optionnelles: onnx, onnxruntime (groupe "onnx" du pyproject).
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse
+import logging
+import os
+
+import numpy as np
+import torch
+from transformers import AutoModel
+
+from .embeddings import PROJECT_ROOT, E5Embeddings
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Noms des fichiers ONNX dans le répertoire d'export (par précision)
+ONNX_MODEL_FILENAME = "model.onnx"
+ONNX_INT8_MODEL_FILENAME = "model.int8.onnx"
+# Nom de la sortie du graphe ONNX (embeddings poolés et normalisés)
+ONNX_OUTPUT_NAME = "sentence_embedding"
+
+
+def default_onnx_dir(model_id: str) -> str:
+    """
+    Retourne le répertoire d'export ONNX par défaut pour un modèle.
+
+    Args:
+        model_id: Identifiant du modèle HuggingFace
+
+    Returns:
+        str: Chemin du répertoire (ex: data/onnx/intfloat__multilingual-e5-large)
+    """
+    return os.path.join("data", "onnx", model_id.replace("/", "__"))
+
+
+def resolve_onnx_dir(onnx_dir: str) -> Path:
+    """
+    Résout un répertoire ONNX relatif par rapport à la racine du projet.
+
+    Comme pour FAISS_INDEX_PATH dans l'API, un chemin relatif ne dépend pas
+    du répertoire courant (l'API est lancée depuis src/).
+
+    Args:
+        onnx_dir: Chemin absolu ou relatif à la racine du projet
+
+    Returns:
+        Path: Chemin absolu du répertoire
+    """
+    path = Path(onnx_dir)
+    if not path.is_absolute():
+        path = PROJECT_ROOT / path
+    return path
+
+
+def onnx_model_path(onnx_dir: str, precision: str = "fp32") -> Path:
+    """
+    Retourne le chemin du fichier ONNX d'une précision dans un répertoire d'export.
+
+    Args:
+        onnx_dir: Répertoire d'export (absolu ou relatif à la racine du projet)
+        precision: 'int8' pour le modèle quantifié, sinon modèle fp32
+
+    Returns:
+        Path: Chemin absolu du fichier .onnx
+    """
+    filename = ONNX_INT8_MODEL_FILENAME if precision == "int8" else ONNX_MODEL_FILENAME
+    return resolve_onnx_dir(onnx_dir) / filename
+
+
+def _import_onnxruntime():
+    """
+    Importe onnxruntime avec un message explicite s'il n'est pas installé.
+
+    Returns:
+        module: Module onnxruntime
+
+    Raises:
+        ImportError: Si onnxruntime n'est pas installé
+    """
+    try:
+        import onnxruntime
+    except ImportError as e:
+        raise ImportError(
+            "Le backend ONNX nécessite onnxruntime. "
+            "Installez-le avec: uv sync --extra onnx"
+        ) from e
+    return onnxruntime
+
+
+class E5PoolingModule(torch.nn.Module):
+    """
+    Module exportable regroupant le transformer et la tête de pooling E5.
+
+    Produit directement les embeddings moyennés et normalisés (L2), afin que
+    le graphe ONNX remplace l'intégralité du forward de E5Embeddings.
+    """
+
+    def __init__(self, model: torch.nn.Module):
+        """
+        Args:
+            model: Modèle transformer HuggingFace (AutoModel)
+        """
+        super().__init__()
+        self.model = model
+
+    def forward(
+        self, input_ids: torch.Tensor, attention_mask: torch.Tensor
+    ) -> torch.Tensor:
+        outputs = self.model(input_ids=input_ids, attention_mask=attention_mask)
+        embeddings = E5Embeddings.average_pool(
+            outputs.last_hidden_state, attention_mask
+        )
+        return torch.nn.functional.normalize(embeddings, p=2, dim=1)
+
+
+class OnnxEncoder:
+    """
+    Session onnxruntime encapsulant le graphe E5 exporté.
+
+    Appelable avec les tenseurs numpy du tokenizer, retourne les embeddings
+    normalisés en float32.
+    """
+
+    def __init__(
+        self,
+        onnx_dir: str,
+        num_threads: Optional[int] = None,
+        precision: str = "fp32",
+    ):
+        """
+        Charge le graphe ONNX avec les optimisations maximales.
+
+        Args:
+            onnx_dir: Répertoire contenant model.onnx (et model.int8.onnx)
+            num_threads: Nombre de threads intra-op (défaut onnxruntime si None)
+            precision: 'fp32' (model.onnx) ou 'int8' (model.int8.onnx)
+
+        Raises:
+            FileNotFoundError: Si le fichier ONNX n'existe pas
+        """
+        ort = _import_onnxruntime()
+
+        model_path = onnx_model_path(onnx_dir, precision)
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"Modèle ONNX introuvable: {model_path}. "
+                "Exportez-le d'abord avec: make export-onnx"
+            )
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+
+        self.model_path = model_path
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+
+    def __call__(self, input_ids: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        """
+        Exécute le graphe ONNX sur un batch tokenisé.
+
+        Args:
+            input_ids: Identifiants de tokens [batch, seq_len]
+            attention_mask: Masque d'attention [batch, seq_len]
+
+        Returns:
+            np.ndarray: Embeddings normalisés [batch, embedding_dim]
+        """
+        feeds = {
+            "input_ids": np.asarray(input_ids, dtype=np.int64),
+            "attention_mask": np.asarray(attention_mask, dtype=np.int64),
+        }
+        return self.session.run([ONNX_OUTPUT_NAME], feeds)[0]
+
+
+def export_onnx_model(
+    model_id: str = "intfloat/multilingual-e5-large",
+    onnx_dir: Optional[str] = None,
+    opset_version: int = 18,
+    verbose: bool = False,
+) -> Path:
+    """
+    Exporte le modèle E5 (transformer + pooling + normalisation) au format ONNX.
+
+    Args:
+        model_id: Identifiant du modèle HuggingFace
+        onnx_dir: Répertoire de sortie (défaut: data/onnx/<model_id>)
+        opset_version: Version de l'opset ONNX
+        verbose: Si True, affiche des informations de progression
+
+    Returns:
+        Path: Chemin du fichier model.onnx créé
+    """
+    output_dir = resolve_onnx_dir(onnx_dir or default_onnx_dir(model_id))
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model_path = output_dir / ONNX_MODEL_FILENAME
+
+    if verbose:
+        logger.info(f"Export ONNX du modèle {model_id} vers: {model_path}")
+
+    model = AutoModel.from_pretrained(model_id)
+    module = E5PoolingModule(model).eval()
+
+    # Entrées d'exemple avec padding pour tracer le chemin masqué
+    input_ids = torch.ones((2, 8), dtype=torch.long)
+    attention_mask = torch.ones((2, 8), dtype=torch.long)
+    attention_mask[1, 4:] = 0
+
+    with torch.no_grad():
+        torch.onnx.export(
+            module,
+            (input_ids, attention_mask),
+            str(model_path),
+            input_names=["input_ids", "attention_mask"],
+            output_names=[ONNX_OUTPUT_NAME],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                ONNX_OUTPUT_NAME: {0: "batch"},
+            },
+            opset_version=opset_version,
+        )
+
+    if verbose:
+        logger.info("✓ Modèle ONNX exporté avec succès")
+
+    return model_path
+
+
+def quantize_onnx_model(onnx_dir: str, verbose: bool = False) -> Path:
+    """
+    Quantifie dynamiquement (poids int8) un modèle ONNX déjà exporté.
+
+    Args:
+        onnx_dir: Répertoire contenant model.onnx
+        verbose: Si True, affiche des informations de progression
+
+    Returns:
+        Path: Chemin du fichier model.int8.onnx créé
+    """
+    _import_onnxruntime()
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    output_dir = resolve_onnx_dir(onnx_dir)
+    source_path = output_dir / ONNX_MODEL_FILENAME
+    target_path = output_dir / ONNX_INT8_MODEL_FILENAME
+
+    if verbose:
+        logger.info(f"Quantification int8 du modèle ONNX vers: {target_path}")
+
+    quantize_dynamic(str(source_path), str(target_path), weight_type=QuantType.QInt8)
+
+    if verbose:
+        logger.info("✓ Modèle ONNX int8 créé avec succès")
+
+    return target_path
+
+
+def compare_backends(
+    reference: E5Embeddings, candidate: E5Embeddings, texts: List[str]
+) -> Dict[str, float]:
+    """
+    Compare les embeddings de deux instances E5Embeddings sur les mêmes textes.
+
+    Args:
+        reference: Instance de référence (ex: backend torch fp32)
+        candidate: Instance à évaluer (ex: backend ONNX)
+        texts: Textes de test
+
+    Returns:
+        dict: Similarité cosinus minimale/moyenne et écart absolu maximal
+    """
+    expected = reference._embed_texts(texts, prefix="passage: ")
+    actual = candidate._embed_texts(texts, prefix="passage: ")
+
+    # Les vecteurs sont normalisés: le produit scalaire est la similarité cosinus
+    cosine = np.sum(expected * actual, axis=1)
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "max_abs_diff": float(np.abs(expected - actual).max()),
+    }
+
+
+def main():
+    """
+    Exporte le modèle d'embeddings en ONNX puis vérifie l'écart avec PyTorch.
+    """
+    from dotenv import load_dotenv
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Exporte le modèle d'embeddings E5 au format ONNX"
+    )
+    parser.add_argument(
+        "--model-id",
+        default=os.getenv("EMBEDDINGS_MODEL", "intfloat/multilingual-e5-large"),
+        help="Identifiant du modèle HuggingFace",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.getenv("EMBEDDINGS_ONNX_PATH"),
+        help="Répertoire de sortie (défaut: data/onnx/<model_id>)",
+    )
+    parser.add_argument(
+        "--int8",
+        action="store_true",
+        help="Produit aussi model.int8.onnx (quantification dynamique des poids)",
+    )
+    parser.add_argument(
+        "--no-verify",
+        action="store_true",
+        help="Ne pas comparer les sorties ONNX et PyTorch après l'export",
+    )
+    args = parser.parse_args()
+
+    logger.info("=" * 70)
+    logger.info("EXPORT ONNX DU MODÈLE D'EMBEDDINGS")
+    logger.info("=" * 70)
+
+    onnx_dir = args.output or default_onnx_dir(args.model_id)
+    export_onnx_model(model_id=args.model_id, onnx_dir=onnx_dir, verbose=True)
+    if args.int8:
+        quantize_onnx_model(onnx_dir, verbose=True)
+
+    if args.no_verify:
+        return
+
+    logger.info("\nVérification de l'écart numérique ONNX / PyTorch...")
+    texts = [
+        "Concert de jazz au Capitole de Toulouse.",
+        "Exposition d'art contemporain à Montpellier tout le mois de juin.",
+        "Atelier découverte de la poterie pour enfants.",
+    ]
+    reference = E5Embeddings(model_id=args.model_id, device="cpu")
+    candidate = E5Embeddings(
+        model_id=args.model_id, device="cpu", backend="onnx", onnx_path=onnx_dir
+    )
+    report = compare_backends(reference, candidate, texts)
+
+    logger.info(f"   Similarité cosinus min: {report['min_cosine']:.6f}")
+    logger.info(f"   Similarité cosinus moyenne: {report['mean_cosine']:.6f}")
+    logger.info(f"   Écart absolu max: {report['max_abs_diff']:.2e}")
+
+    logger.info("\n" + "=" * 70)
+    logger.info("✓ EXPORT TERMINÉ AVEC SUCCÈS")
+    logger.info("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Pool de processus pour l'encodage des documents lors de la construction de l'index.
+
+Au-delà d'environ 8 threads, le parallélisme intra-op de PyTorch ne passe
+plus bien à l'échelle. Ce module répartit les textes entre N processus,
+chacun avec sa propre copie du modèle et un nombre de threads limité
+(torch.set_num_threads), puis reconstitue les vecteurs dans l'ordre.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+import logging
+import multiprocessing
+import os
+
+import numpy as np
+import torch
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Nombre de shards par worker: des shards plus petits équilibrent la charge
+# lorsque les longueurs de textes varient d'un shard à l'autre
+SHARDS_PER_WORKER = 4
+
+# Modèle chargé dans chaque processus worker (initialisé par _init_worker)
+_worker_model = None
+
+
+def default_threads_per_worker(workers: int) -> int:
+    """
+    Répartit les coeurs disponibles entre les workers.
+
+    Args:
+        workers: Nombre de processus
+
+    Returns:
+        int: Nombre de threads torch par processus (au moins 1)
+    """
+    return max(1, (os.cpu_count() or 1) // workers)
+
+
+def split_shards(num_texts: int, num_shards: int) -> List[range]:
+    """
+    Découpe [0, num_texts) en shards contigus de tailles équilibrées.
+
+    Args:
+        num_texts: Nombre de textes
+        num_shards: Nombre de shards souhaité
+
+    Returns:
+        List[range]: Plages d'indices, dans l'ordre, sans shard vide
+    """
+    num_shards = max(1, min(num_shards, num_texts))
+    size, remainder = divmod(num_texts, num_shards)
+    shards = []
+    start = 0
+    for i in range(num_shards):
+        end = start + size + (1 if i < remainder else 0)
+        if end > start:
+            shards.append(range(start, end))
+        start = end
+    return shards
+
+
+def _init_worker(config: Dict[str, Any], num_threads: int) -> None:
+    """
+    Initialise un processus worker: threads torch puis chargement du modèle.
+
+    Args:
+        config: Arguments de E5Embeddings pour la copie du modèle
+        num_threads: Nombre de threads intra-op du worker
+    """
+    global _worker_model
+
+    torch.set_num_threads(num_threads)
+
+    from .embeddings import E5Embeddings
+
+    _worker_model = E5Embeddings(**config)
+
+
+def _encode_shard(texts: List[str], prefix: str) -> np.ndarray:
+    """
+    Encode un shard de textes dans le processus worker.
+
+    Args:
+        texts: Textes du shard
+        prefix: Préfixe E5
+
+    Returns:
+        np.ndarray: Embeddings du shard [len(texts), embedding_dim]
+    """
+    return _worker_model._embed_texts(texts, prefix=prefix)
+
+
+class EmbeddingWorkerPool:
+    """
+    Pool de processus encodant des textes avec une copie du modèle par worker.
+
+    Les processus sont créés (méthode spawn) à la première utilisation puis
+    réutilisés jusqu'à close().
+    """
+
+    def __init__(
+        self,
+        config: Dict[str, Any],
+        workers: int,
+        threads_per_worker: Optional[int] = None,
+    ):
+        """
+        Args:
+            config: Arguments de E5Embeddings transmis à chaque worker
+            workers: Nombre de processus
+            threads_per_worker: Threads torch par processus (défaut: coeurs / workers)
+        """
+        self.config = config
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or default_threads_per_worker(
+            workers
+        )
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Démarre les processus workers si nécessaire."""
+        if self._executor is None:
+            logger.info(
+                f"Démarrage de {self.workers} workers d'embeddings "
+                f"({self.threads_per_worker} threads chacun)"
+            )
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.config, self.threads_per_worker),
+            )
+        return self._executor
+
+    def embed(self, texts: List[str], prefix: str = "passage: ") -> np.ndarray:
+        """
+        Encode les textes en parallèle et retourne les vecteurs dans l'ordre.
+
+        Args:
+            texts: Textes à encoder
+            prefix: Préfixe E5
+
+        Returns:
+            np.ndarray: Embeddings [len(texts), embedding_dim]
+        """
+        shards = split_shards(len(texts), self.workers * SHARDS_PER_WORKER)
+        executor = self._get_executor()
+
+        # executor.map conserve l'ordre des shards
+        results = executor.map(
+            _encode_shard,
+            [[texts[i] for i in shard] for shard in shards],
+            [prefix] * len(shards),
+        )
+        return np.vstack(list(results))
+
+    def close(self) -> None:
+        """Arrête les processus workers."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
@@ -0,0 +1,255 @@
+"""
+Contrôle de non-régression d'une précision d'inférence réduite (int8, bf16).
+
+Ce module compare un modèle d'embeddings de référence (fp32) et un modèle
+candidat (ex: EMBEDDINGS_PRECISION=int8) sur un jeu de requêtes de référence:
+- dérive cosinus des embeddings de requêtes (candidat vs fp32)
+- dérive cosinus des passages ré-encodés par rapport aux vecteurs de l'index
+- recouvrement des top-k dans l'index FAISS existant (candidat vs fp32)
+
+Usage (depuis le répertoire src/):
+    python -m embeddings.precision_check [--precision int8] [--k 10] [--output rapport.json]
+"""
+
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import json
+import logging
+import os
+import sys
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from .embeddings import PROJECT_ROOT, E5Embeddings
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Jeu de questions de référence (questions RAGAS)
+DEFAULT_QUERIES_PATH = PROJECT_ROOT / "tests" / "ragas_data" / "ragas_test_questions.json"
+
+# Seuils d'acceptation par défaut
+DEFAULT_MIN_COSINE = 0.98
+DEFAULT_MIN_OVERLAP = 0.8
+
+
+def load_reference_queries(path: Path = DEFAULT_QUERIES_PATH) -> List[str]:
+    """
+    Charge les questions de référence depuis le jeu de test RAGAS.
+
+    Args:
+        path: Chemin du fichier JSON (clé "test_cases" avec des "question")
+
+    Returns:
+        List[str]: Liste des questions
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [case["question"] for case in data.get("test_cases", []) if case.get("question")]
+
+
+def _cosine_stats(expected: np.ndarray, actual: np.ndarray) -> Dict[str, float]:
+    """
+    Calcule la similarité cosinus ligne à ligne entre deux matrices.
+
+    Args:
+        expected: Vecteurs de référence [n, dim]
+        actual: Vecteurs candidats [n, dim]
+
+    Returns:
+        dict: Similarités cosinus minimale et moyenne
+    """
+    norms = np.linalg.norm(expected, axis=1) * np.linalg.norm(actual, axis=1)
+    cosine = np.sum(expected * actual, axis=1) / np.maximum(norms, 1e-12)
+    return {"min_cosine": float(cosine.min()), "mean_cosine": float(cosine.mean())}
+
+
+def _stored_passages(vector_store: FAISS, sample_size: int) -> Optional[tuple]:
+    """
+    Récupère un échantillon de passages et leurs vecteurs stockés dans l'index.
+
+    Args:
+        vector_store: Vector store FAISS existant
+        sample_size: Nombre maximal de passages
+
+    Returns:
+        tuple: (textes, vecteurs stockés) ou None si l'index ne permet pas
+            de reconstruire les vecteurs
+    """
+    ids = list(islice(vector_store.index_to_docstore_id.items(), sample_size))
+    texts = []
+    vectors = []
+    try:
+        for faiss_id, docstore_id in ids:
+            document = vector_store.docstore.search(docstore_id)
+            texts.append(document.page_content)
+            vectors.append(vector_store.index.reconstruct(int(faiss_id)))
+    except RuntimeError:
+        return None
+
+    if not texts:
+        return None
+    return texts, np.vstack(vectors)
+
+
+def check_precision(
+    reference: E5Embeddings,
+    candidate: E5Embeddings,
+    queries: List[str],
+    vector_store: Optional[FAISS] = None,
+    k: int = 10,
+    sample_size: int = 200,
+    min_cosine: float = DEFAULT_MIN_COSINE,
+    min_overlap: float = DEFAULT_MIN_OVERLAP,
+) -> Dict[str, Any]:
+    """
+    Mesure la dégradation d'un modèle candidat par rapport à la référence fp32.
+
+    Args:
+        reference: Modèle de référence (fp32)
+        candidate: Modèle évalué (ex: int8)
+        queries: Requêtes de référence
+        vector_store: Index FAISS existant (optionnel, active les métriques top-k)
+        k: Nombre de résultats comparés pour le recouvrement top-k
+        sample_size: Nombre de passages ré-encodés depuis l'index
+        min_cosine: Similarité cosinus minimale acceptée pour les requêtes
+        min_overlap: Recouvrement top-k moyen minimal accepté
+
+    Returns:
+        dict: Rapport contenant les métriques et le verdict ("passed")
+    """
+    reference_queries = reference._embed_texts(queries, prefix="query: ")
+    candidate_queries = candidate._embed_texts(queries, prefix="query: ")
+
+    report: Dict[str, Any] = {
+        "reference_precision": reference.precision,
+        "candidate_precision": candidate.precision,
+        "candidate_backend": candidate.backend,
+        "num_queries": len(queries),
+        "queries": _cosine_stats(reference_queries, candidate_queries),
+    }
+
+    passed = report["queries"]["min_cosine"] >= min_cosine
+
+    if vector_store is not None:
+        k = min(k, vector_store.index.ntotal)
+        _, reference_ids = vector_store.index.search(
+            reference_queries.astype(np.float32), k
+        )
+        _, candidate_ids = vector_store.index.search(
+            candidate_queries.astype(np.float32), k
+        )
+        overlaps = [
+            len(set(ref_row) & set(cand_row)) / k
+            for ref_row, cand_row in zip(reference_ids, candidate_ids)
+        ]
+        report["top_k"] = {
+            "k": k,
+            "mean_overlap": float(np.mean(overlaps)),
+            "min_overlap": float(np.min(overlaps)),
+        }
+        passed = passed and report["top_k"]["mean_overlap"] >= min_overlap
+
+        stored = _stored_passages(vector_store, sample_size)
+        if stored is not None:
+            texts, stored_vectors = stored
+            candidate_passages = candidate._embed_texts(texts, prefix="passage: ")
+            report["passages"] = {
+                "num_passages": len(texts),
+                **_cosine_stats(stored_vectors, candidate_passages),
+            }
+
+    report["thresholds"] = {"min_cosine": min_cosine, "min_overlap": min_overlap}
+    report["passed"] = bool(passed)
+    return report
+
+
+def main():
+    """
+    Compare la précision configurée à la référence fp32 sur l'index existant.
+
+    Le code de sortie est 1 si la dégradation dépasse les seuils.
+    """
+    from dotenv import load_dotenv
+
+    from .embeddings import get_embeddings_model
+
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(
+        description="Vérifie la dégradation d'une précision réduite des embeddings"
+    )
+    parser.add_argument(
+        "--precision",
+        default=os.getenv("EMBEDDINGS_PRECISION", "int8"),
+        help="Précision à évaluer (défaut: EMBEDDINGS_PRECISION ou int8)",
+    )
+    parser.add_argument("--k", type=int, default=10, help="Taille du top-k comparé")
+    parser.add_argument(
+        "--queries",
+        default=str(DEFAULT_QUERIES_PATH),
+        help="Fichier JSON des questions de référence",
+    )
+    parser.add_argument("--output", help="Fichier JSON où écrire le rapport")
+    args = parser.parse_args()
+
+    logger.info("=" * 70)
+    logger.info(f"CONTRÔLE DE PRÉCISION: fp32 vs {args.precision}")
+    logger.info("=" * 70)
+
+    queries = load_reference_queries(Path(args.queries))
+    logger.info(f"Requêtes de référence: {len(queries)}")
+
+    reference = get_embeddings_model(precision="fp32", device="cpu")
+    candidate = get_embeddings_model(precision=args.precision, device="cpu")
+
+    vector_store = None
+    index_path = Path(os.getenv("FAISS_INDEX_PATH", "data/faiss_index"))
+    if not index_path.is_absolute():
+        index_path = PROJECT_ROOT / index_path
+
+    if index_path.exists():
+        from vectors import load_vector_store
+
+        vector_store = load_vector_store(str(index_path), reference)
+    else:
+        logger.warning(f"⚠️  Aucun index trouvé à {index_path}: top-k non évalué")
+
+    report = check_precision(reference, candidate, queries, vector_store, k=args.k)
+
+    logger.info(
+        f"Requêtes - cosinus min: {report['queries']['min_cosine']:.4f}, "
+        f"moyen: {report['queries']['mean_cosine']:.4f}"
+    )
+    if "passages" in report:
+        logger.info(
+            f"Passages - cosinus min: {report['passages']['min_cosine']:.4f}, "
+            f"moyen: {report['passages']['mean_cosine']:.4f}"
+        )
+    if "top_k" in report:
+        logger.info(
+            f"Top-{report['top_k']['k']} - recouvrement moyen: "
+            f"{report['top_k']['mean_overlap']:.2%}, "
+            f"min: {report['top_k']['min_overlap']:.2%}"
+        )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        logger.info(f"Rapport écrit dans: {args.output}")
+
+    if report["passed"]:
+        logger.info("✅ Précision validée: pas de dégradation significative")
+    else:
+        logger.error("❌ Dégradation au-delà des seuils: ne pas déployer cette précision")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -9,7 +9,8 @@ Ce module orchestre l'ensemble du processus :
 4. Sauvegarde et test de recherche
 """
 
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
+from pathlib import Path
 import os
 import logging
 from datetime import datetime, timezone, timedelta
@@ -18,12 +19,23 @@ from dotenv import load_dotenv
 from langchain_community.vectorstores import FAISS
 from pymongo import MongoClient
 
-from embeddings import get_embeddings_model
+from embeddings import env_flag, get_embeddings_model
 from vectors import (
+    RecallEvaluator,
+    build_cascade_index,
     create_vector_store,
+    get_search_params,
+    get_search_params_from_env,
     save_vector_store,
     search_similar_documents,
     delete_vector_store,
+    save_cascade_index,
+)
+from vectors.quantization import (
+    EXACT_VECTORS_FILENAME,
+    ExactRescorer,
+    bytes_per_vector,
+    load_exact_vectors,
 )
 from chunks.chunks_document import get_mongodb_connection, process_events_to_chunks
 
@@ -132,6 +144,7 @@ def save_last_update_metadata(
     months_back: int,
     total_chunks: int,
     total_events: int,
+    embedding_stats: Optional[Dict[str, Any]] = None,
     verbose: bool = False
 ) -> None:
     """
@@ -142,6 +155,7 @@ def save_last_update_metadata(
         months_back: Nombre de mois en arrière recherchés
         total_chunks: Nombre total de chunks créés
         total_events: Nombre total d'événements traités
+        embedding_stats: Statistiques de l'étape d'embeddings (cache, etc.)
         verbose: Si True, affiche des informations de progression
     """
     load_dotenv()
@@ -166,6 +180,7 @@ def save_last_update_metadata(
             "embeddings_model": os.getenv("EMBEDDINGS_MODEL", "intfloat/multilingual-e5-large"),
             "chunk_size": int(os.getenv("CHUNK_SIZE", "500")),
             "chunk_overlap": int(os.getenv("CHUNK_OVERLAP", "100")),
+            "embedding_stats": embedding_stats or {},
         }
 
         if verbose:
@@ -176,6 +191,19 @@ def save_last_update_metadata(
             logger.info(f"Mois recherchés: {months_back}")
             logger.info(f"Événements traités: {total_events}")
             logger.info(f"Chunks créés: {total_chunks}")
+            if embedding_stats and "dedup" in embedding_stats:
+                dedup_stats = embedding_stats["dedup"]
+                logger.info(
+                    f"Déduplication: {dedup_stats['embedded']} textes distincts "
+                    f"encodés ({dedup_stats['dedup_ratio']:.1%} de doublons)"
+                )
+            if embedding_stats and "cache" in embedding_stats:
+                cache_stats = embedding_stats["cache"]
+                logger.info(
+                    f"Cache d'embeddings: {cache_stats['hits']} hits, "
+                    f"{cache_stats['misses']} misses "
+                    f"({cache_stats['hit_rate']:.1%})"
+                )
 
         # Insérer le document (on garde l'historique)
         last_update_collection.insert_one(metadata)
@@ -191,6 +219,28 @@ def save_last_update_metadata(
             client.close()
 
 
+def _create_recall_evaluator(embeddings, k: int) -> Optional[RecallEvaluator]:
+    """
+    Prépare la mesure du rappel@k de l'index réduit ou quantifié sur les questions RAGAS.
+
+    Args:
+        embeddings: Modèle d'embeddings (E5Embeddings)
+        k: Nombre de résultats comparés
+
+    Returns:
+        RecallEvaluator: Évaluateur, ou None si les questions sont introuvables
+    """
+    from embeddings.precision_check import load_reference_queries
+
+    try:
+        queries = load_reference_queries()
+    except FileNotFoundError:
+        logger.warning("⚠️  Questions de référence introuvables: rappel de l'index non mesuré")
+        return None
+
+    return RecallEvaluator(embeddings.embed_queries(queries), k=k)
+
+
 def create_vector_store_pipeline(
     save_path: Optional[str] = None,
     mongodb_query: Optional[Dict[str, Any]] = None,
@@ -199,9 +249,17 @@ def create_vector_store_pipeline(
     chunk_overlap: int = 100,
     model_id: Optional[str] = None,
     device: Optional[str] = None,
-    batch_size: int = 32,
+    batch_size: Optional[int] = None,
     verbose: bool = False,
-) -> FAISS:
+    pca_dim: Optional[int] = None,
+    pca_recall_k: int = 10,
+    cascade_model_id: Optional[str] = None,
+    index_factory: Optional[str] = None,
+    search_params: Optional[Dict[str, int]] = None,
+    quantization: Optional[str] = None,
+    keep_exact_vectors: bool = False,
+    docstore_backend: str = "pickle",
+) -> Tuple[FAISS, int, Dict[str, Any]]:
     """
     Pipeline complet: MongoDB → chunks → embeddings → FAISS.
 
@@ -213,11 +271,27 @@ def create_vector_store_pipeline(
         chunk_overlap: Chevauchement entre chunks
         model_id: Identifiant du modèle d'embeddings
         device: Device à utiliser ('cuda', 'mps', 'cpu')
-        batch_size: Taille des batchs pour les embeddings
+        batch_size: Taille des batchs pour les embeddings (défaut: profil
+            d'autotuning, sinon 32)
         verbose: Si True, affiche des informations de progression
+        pca_dim: Dimension de l'index après réduction PCA (pas de réduction si None)
+        pca_recall_k: k utilisé pour le rappel de l'index réduit ou quantifié
+            (questions RAGAS)
+        cascade_model_id: Petit modèle E5 de l'index compact de la recherche
+            en cascade (pas d'index compact si None, voir vectors.cascade)
+        index_factory: Description FAISS de l'index (ex: "IVF1024,Flat",
+            "HNSW32"); index exact si None (voir vectors.index_factory)
+        search_params: Paramètres de recherche enregistrés avec l'index
+            (nprobe, efSearch)
+        quantization: Encodage des vecteurs stockés ("fp16", "sq8", "sq4",
+            "opq<M>"), voir vectors.quantization
+        keep_exact_vectors: Si True (et save_path fourni), conserve les vecteurs
+            exacts avec l'index pour le reclassement des résultats
+        docstore_backend: Format du docstore sauvegardé ("pickle" ou "sqlite",
+            voir vectors.docstore)
 
     Returns:
-        FAISS: Instance du vector store créé
+        tuple: (vector store créé, nombre de chunks, statistiques d'embeddings)
 
     Raises:
         ValueError: Si aucun chunk n'a pu être créé
@@ -264,19 +338,147 @@ def create_vector_store_pipeline(
             logger.info(f"      Nombre de chunks: {len(chunks)}")
             logger.info(f"      Modèle: {model_id or 'intfloat/multilingual-e5-large'}")
             logger.info(f"      Device: {device or 'auto-détecté'}")
-            logger.info(f"      Batch size: {batch_size}")
+            logger.info(f"      Batch size: {batch_size or 'profil / 32'}")
             logger.info("      Cette étape peut prendre plusieurs minutes...")
 
         embeddings = get_embeddings_model(
-            model_id=model_id, device=device, batch_size=batch_size
+            model_id=model_id, device=device, batch_size=batch_size, use_profile=True
         )
-        vector_store = create_vector_store(chunks, embeddings, verbose=verbose)
+
+        # PCA / quantification: top-k exact en pleine dimension des questions de
+        # référence, calculé pendant la construction pour mesurer le rappel de l'index
+        recall_evaluator = None
+        if pca_dim or quantization:
+            recall_evaluator = _create_recall_evaluator(embeddings, pca_recall_k)
+
+        exact_vectors_path = None
+        if keep_exact_vectors and save_path:
+            exact_vectors_path = str(Path(save_path) / EXACT_VECTORS_FILENAME)
+
+        try:
+            vector_store = create_vector_store(
+                chunks,
+                embeddings,
+                verbose=verbose,
+                pca_dim=pca_dim,
+                recall_evaluator=recall_evaluator,
+                index_factory=index_factory,
+                search_params=search_params,
+                quantization=quantization,
+                exact_vectors_path=exact_vectors_path,
+            )
+        finally:
+            # Libère les processus workers (EMBEDDINGS_WORKERS > 1)
+            embeddings.close()
+
+        embedding_stats: Dict[str, Any] = {"dedup": embeddings.dedup_stats()}
+        if verbose:
+            dedup_stats = embedding_stats["dedup"]
+            logger.info(
+                f"      Déduplication: {dedup_stats['embedded']} textes distincts "
+                f"encodés pour {dedup_stats['texts']} chunks "
+                f"({dedup_stats['dedup_ratio']:.1%} de doublons)"
+            )
+        if embeddings.cache is not None:
+            embedding_stats["cache"] = embeddings.cache.stats()
+            if verbose:
+                logger.info(
+                    f"      Cache d'embeddings: {embedding_stats['cache']['hits']} hits, "
+                    f"{embedding_stats['cache']['misses']} misses "
+                    f"({embedding_stats['cache']['hit_rate']:.1%})"
+                )
+
+        if pca_dim:
+            embedding_stats["pca"] = {"dimension": pca_dim}
+            if recall_evaluator is not None:
+                embedding_stats["pca"]["recall"] = recall_evaluator.report(
+                    vector_store.index
+                )
+            if verbose:
+                logger.info(f"      Réduction PCA: {pca_dim} dimensions")
+                for name, value in embedding_stats["pca"].get("recall", {}).items():
+                    logger.info(f"      {name} (vs pleine dimension): {value:.2%}")
+
+        if index_factory:
+            embedding_stats["index"] = {
+                "factory": index_factory,
+                "search_params": get_search_params(vector_store.index),
+            }
+            if verbose:
+                logger.info(
+                    f"      Index FAISS: {index_factory} "
+                    f"({embedding_stats['index']['search_params']})"
+                )
+
+        if quantization:
+            embedding_stats["quantization"] = {
+                "encoding": quantization,
+                "bytes_per_vector": bytes_per_vector(vector_store.index),
+            }
+            if recall_evaluator is not None:
+                embedding_stats["quantization"]["recall"] = recall_evaluator.report(
+                    vector_store.index
+                )
+                exact_vectors = (
+                    load_exact_vectors(save_path) if exact_vectors_path else None
+                )
+                if exact_vectors is not None:
+                    embedding_stats["quantization"]["rescored_recall"] = (
+                        recall_evaluator.report(
+                            ExactRescorer(vector_store, exact_vectors)
+                        )
+                    )
+            if verbose:
+                logger.info(
+                    f"      Quantification: {quantization} "
+                    f"({embedding_stats['quantization']['bytes_per_vector']} octets/vecteur)"
+                )
+                for key in ("recall", "rescored_recall"):
+                    for name, value in embedding_stats["quantization"].get(key, {}).items():
+                        label = "reclassé" if key == "rescored_recall" else "quantifié"
+                        logger.info(f"      {name} {label} (vs exact): {value:.2%}")
+
+        # 3.5. Index compact de la recherche en cascade (mêmes chunks, même ordre)
+        cascade_index = None
+        if cascade_model_id:
+            if verbose:
+                logger.info(
+                    f"\n[3.5/4] Index de cascade avec le modèle {cascade_model_id}..."
+                )
+            small_embeddings = get_embeddings_model(
+                model_id=cascade_model_id,
+                device=device,
+                batch_size=batch_size,
+                env_prefix="CASCADE_EMBEDDINGS_",
+            )
+            try:
+                cascade_index = build_cascade_index(
+                    [chunk.page_content for chunk in chunks], small_embeddings
+                )
+            finally:
+                small_embeddings.close()
+            embedding_stats["cascade"] = {
+                "model_id": cascade_model_id,
+                "dimension": cascade_index.d,
+            }
+            if verbose:
+                logger.info(
+                    f"      Index de cascade: {cascade_index.ntotal} vecteurs, "
+                    f"{cascade_index.d} dimensions"
+                )
 
         # 4. Sauvegarde du vector store
         if save_path:
             if verbose:
                 logger.info("\n[4/4] Sauvegarde du vector store...")
-            save_vector_store(vector_store, save_path, verbose=verbose)
+            save_vector_store(
+                vector_store,
+                save_path,
+                verbose=verbose,
+                docstore_backend=docstore_backend,
+            )
+            if cascade_index is not None:
+                save_cascade_index(cascade_index, save_path, cascade_model_id)
         else:
             if verbose:
                 logger.info("\n[4/4] Sauvegarde ignorée (aucun chemin spécifié)")
@@ -286,7 +488,7 @@ def create_vector_store_pipeline(
             logger.info("✓ PIPELINE TERMINÉ AVEC SUCCÈS")
             logger.info("=" * 70)
 
-        return vector_store, len(chunks)
+        return vector_store, len(chunks), embedding_stats
 
     finally:
         client.close()
@@ -323,7 +525,17 @@ def main():
 
     model_id = os.getenv("EMBEDDINGS_MODEL", "intfloat/multilingual-e5-large")
     device = os.getenv("EMBEDDINGS_DEVICE") or None  # None = auto-détection
-    batch_size = int(os.getenv("EMBEDDINGS_BATCH_SIZE", "32"))
+    # Sans EMBEDDINGS_BATCH_SIZE: profil d'autotuning, sinon 32
+    batch_size = os.getenv("EMBEDDINGS_BATCH_SIZE")
+    batch_size = int(batch_size) if batch_size else None
+    pca_dim = os.getenv("FAISS_PCA_DIM")
+    pca_dim = int(pca_dim) if pca_dim else None
+    pca_recall_k = int(os.getenv("FAISS_PCA_RECALL_K", "10"))
+    cascade_model_id = os.getenv("CASCADE_EMBEDDINGS_MODEL") or None
+    index_factory = os.getenv("FAISS_INDEX_FACTORY") or None
+    quantization = os.getenv("FAISS_QUANTIZATION") or None
+    docstore_backend = os.getenv("FAISS_DOCSTORE", "pickle")
+    keep_exact_vectors = env_flag("FAISS_KEEP_EXACT_VECTORS", False)
 
     try:
         logger.info("=" * 70)
@@ -360,13 +572,21 @@ def main():
         logger.info("Démarrage du pipeline de création du vector store...")
 
         # Exécution du pipeline complet
-        vector_store, total_chunks = create_vector_store_pipeline(
+        vector_store, total_chunks, embedding_stats = create_vector_store_pipeline(
             save_path=save_path,
             limit=limit,
             model_id=model_id,
             device=device,
             batch_size=batch_size,
             verbose=True,
+            pca_dim=pca_dim,
+            pca_recall_k=pca_recall_k,
+            cascade_model_id=cascade_model_id,
+            index_factory=index_factory,
+            search_params=get_search_params_from_env(),
+            quantization=quantization,
+            keep_exact_vectors=keep_exact_vectors,
+            docstore_backend=docstore_backend,
         )
 
         # Sauvegarde des métadonnées de mise à jour
@@ -390,6 +610,7 @@ def main():
             months_back=months_back,
             total_chunks=total_chunks,
             total_events=total_events,
+            embedding_stats=embedding_stats,
             verbose=True
         )
 
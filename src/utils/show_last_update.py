@@ -130,6 +130,25 @@ def show_last_update(verbose: bool = True) -> dict:
                 f"   Chunk overlap: "
                 f"{last_execution.get('chunk_overlap', 'N/A')}"
             )
+            dedup_stats = last_execution.get("embedding_stats", {}).get("dedup")
+            if dedup_stats:
+                logger.info(
+                    f"   Déduplication: {dedup_stats.get('embedded', 0):,} textes "
+                    f"distincts encodés pour {dedup_stats.get('texts', 0):,} chunks "
+                    f"({dedup_stats.get('dedup_ratio', 0.0):.1%} de doublons)"
+                )
+            cache_stats = last_execution.get("embedding_stats", {}).get("cache")
+            if cache_stats:
+                logger.info(
+                    f"   Cache d'embeddings: {cache_stats.get('hits', 0):,} hits, "
+                    f"{cache_stats.get('misses', 0):,} misses "
+                    f"({cache_stats.get('hit_rate', 0.0):.1%})"
+                )
+            pca_stats = last_execution.get("embedding_stats", {}).get("pca")
+            if pca_stats:
+                logger.info(f"   Réduction PCA: {pca_stats.get('dimension')} dimensions")
+                for name, value in pca_stats.get("recall", {}).items():
+                    logger.info(f"   {name} (vs pleine dimension): {value:.1%}")
             logger.info("")
             logger.info("📈 Historique:")
             logger.info(f"   Total d'exécutions: {total_executions}")
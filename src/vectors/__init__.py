@@ -7,23 +7,68 @@ dans des bases vectorielles FAISS, ainsi qu'un serveur interactif de recherche.
 
 from .vectors import (
     create_vector_store,
+    create_vector_store_from_batches,
     save_vector_store,
     load_vector_store,
+    read_index_mmap,
     search_similar_documents,
     add_documents_to_vector_store,
     delete_vector_store,
     get_vector_store_stats,
 )
-
+from .reduction import RecallEvaluator, build_pca_index
+from .index_factory import (
+    create_factory_index,
+    get_search_params,
+    get_search_params_from_env,
+    set_search_params,
+)
+from .docstore import SQLiteDocstore, load_docstore, save_docstore
+from .filtering import FilteredSearcher, MetadataIndex
+from .intervals import DateIntervalIndex
+from .quantization import (
+    ExactRescorer,
+    ExactVectorWriter,
+    load_exact_vectors,
+    quantization_factory,
+)
+from .cascade import (
+    CascadeRetriever,
+    build_cascade_index,
+    load_cascade_index,
+    save_cascade_index,
+)
 from .server import VectorStoreServer
 
 __all__ = [
     "create_vector_store",
+    "create_vector_store_from_batches",
     "save_vector_store",
     "load_vector_store",
+    "read_index_mmap",
     "search_similar_documents",
     "add_documents_to_vector_store",
     "delete_vector_store",
     "get_vector_store_stats",
+    "RecallEvaluator",
+    "build_pca_index",
+    "create_factory_index",
+    "get_search_params",
+    "get_search_params_from_env",
+    "set_search_params",
+    "SQLiteDocstore",
+    "load_docstore",
+    "save_docstore",
+    "FilteredSearcher",
+    "MetadataIndex",
+    "DateIntervalIndex",
+    "ExactRescorer",
+    "ExactVectorWriter",
+    "load_exact_vectors",
+    "quantization_factory",
+    "CascadeRetriever",
+    "build_cascade_index",
+    "load_cascade_index",
+    "save_cascade_index",
     "VectorStoreServer",
 ]
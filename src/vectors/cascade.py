@@ -0,0 +1,288 @@
+"""
+Recherche en cascade: petit modèle E5 pour les candidats, e5-large pour le classement.
+
+Un index compact est construit avec un petit modèle E5 (ex:
+multilingual-e5-small, 384 dimensions) sur les mêmes chunks, dans le même
+ordre que l'index principal: la position d'un vecteur est donc la même dans
+les deux index. À la requête:
+
+1. le petit modèle encode la requête et l'index compact retourne quelques
+   centaines de candidats;
+2. les candidats sont reclassés avec les vecteurs e5-large déjà stockés dans
+   l'index principal (aucune recherche sur tout l'index principal).
+
+Le reclassement nécessite l'embedding e5-large de la requête. Il est évité
+lorsque le petit modèle est sans ambiguïté (écart de similarité d'au moins
+skip_margin entre ses deux premiers candidats): l'encodage e5-large n'est
+alors payé que pour les requêtes ambiguës. Une requête reclassée coûte plus
+cher qu'une recherche directe (deux encodages au lieu d'un): la cascade n'est
+plus rapide que si la part de requêtes reclassées (stats()["rescore_rate"])
+reste faible. Une marge plus grande améliore la qualité du classement au prix
+de la latence; skip_margin=None reclasse toujours (plus lent que la recherche
+directe, utile pour mesurer la qualité du petit modèle).
+
+L'index compact est sauvegardé dans le répertoire de l'index principal
+(cascade.faiss et cascade.json).
+"""
+
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import logging
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+CASCADE_INDEX_FILENAME = "cascade.faiss"
+CASCADE_INFO_FILENAME = "cascade.json"
+# Nombre de candidats retournés par le petit modèle
+DEFAULT_CASCADE_CANDIDATES = 200
+# Écart cosinus entre les deux premiers candidats au-delà duquel e5-large est évité
+DEFAULT_CASCADE_SKIP_MARGIN = 0.02
+
+
+def build_cascade_index(texts: List[str], embeddings: Embeddings) -> faiss.Index:
+    """
+    Encode les chunks avec le petit modèle et construit l'index compact.
+
+    Args:
+        texts: Textes des chunks, dans l'ordre de l'index principal
+        embeddings: Petit modèle d'embeddings (ex: E5Embeddings e5-small)
+
+    Returns:
+        faiss.Index: Index plat (IndexFlatL2) aligné sur l'index principal
+    """
+    if getattr(type(embeddings), "iter_embed_documents", None) is not None:
+        batches = embeddings.iter_embed_documents(texts)
+    else:
+        batches = [(0, np.asarray(embeddings.embed_documents(texts), dtype=np.float32))]
+
+    index = None
+    for _, vectors in batches:
+        if index is None:
+            index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    return index
+
+
+def save_cascade_index(index: faiss.Index, save_path: str, model_id: str) -> None:
+    """
+    Sauvegarde l'index compact dans le répertoire de l'index principal.
+
+    Args:
+        index: Index compact
+        save_path: Répertoire de l'index principal
+        model_id: Petit modèle utilisé pour l'index compact
+    """
+    path = Path(save_path)
+    path.mkdir(parents=True, exist_ok=True)
+    faiss.write_index(index, str(path / CASCADE_INDEX_FILENAME))
+    with open(path / CASCADE_INFO_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(
+            {"model_id": model_id, "num_vectors": index.ntotal, "dimension": index.d},
+            f,
+            indent=2,
+        )
+
+
+def load_cascade_index(load_path: str) -> Optional[Tuple[faiss.Index, Dict[str, Any]]]:
+    """
+    Charge l'index compact s'il a été construit.
+
+    Args:
+        load_path: Répertoire de l'index principal
+
+    Returns:
+        tuple: (index compact, informations: model_id, num_vectors, dimension),
+            ou None si aucun index compact n'existe
+    """
+    path = Path(load_path)
+    if not (path / CASCADE_INDEX_FILENAME).exists():
+        return None
+    with open(path / CASCADE_INFO_FILENAME, "r", encoding="utf-8") as f:
+        info = json.load(f)
+    return faiss.read_index(str(path / CASCADE_INDEX_FILENAME)), info
+
+
+def _stored_vectors(index: faiss.Index, ids: np.ndarray, query: np.ndarray):
+    """
+    Relit les vecteurs stockés dans l'index principal pour les candidats.
+
+    Si l'index applique une transformation (PCA), la requête est transformée
+    de la même façon, afin que les distances soient celles de l'index.
+
+    Args:
+        index: Index principal
+        ids: Positions des candidats
+        query: Vecteur de la requête [1, dimension d'origine]
+
+    Returns:
+        tuple: (vecteurs des candidats, requête dans l'espace de l'index)
+    """
+    if isinstance(index, faiss.IndexPreTransform):
+        for i in range(index.chain.size()):
+            query = index.chain.at(i).apply(query)
+        index = faiss.downcast_index(index.index)
+    return index.reconstruct_batch(ids), query
+
+
+def _ensure_direct_map(index: faiss.Index) -> None:
+    """
+    Construit la table de correspondance position → liste d'un index IVF.
+
+    La relecture des vecteurs par position (reclassement) en a besoin. Elle
+    modifie l'index: elle est construite une fois au chargement, jamais
+    pendant une requête (recherches concurrentes sur le même index).
+
+    Args:
+        index: Index principal
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.no():
+        ivf.make_direct_map()
+
+
+class CascadeRetriever:
+    """
+    Recherche en deux étapes: candidats du petit modèle, classement e5-large.
+
+    Les scores retournés sont des distances L2 (comme similarity_search_with_score):
+    après reclassement, ce sont exactement celles de l'index principal.
+    """
+
+    def __init__(
+        self,
+        vector_store: FAISS,
+        small_embeddings: Embeddings,
+        small_index: faiss.Index,
+        candidates: int = DEFAULT_CASCADE_CANDIDATES,
+        skip_margin: Optional[float] = DEFAULT_CASCADE_SKIP_MARGIN,
+    ):
+        """
+        Args:
+            vector_store: Vector store principal (vecteurs e5-large et documents)
+            small_embeddings: Petit modèle d'embeddings (requêtes de l'étape 1)
+            small_index: Index compact aligné sur l'index principal
+            candidates: Nombre de candidats de l'étape 1
+            skip_margin: Écart minimal de similarité cosinus entre les deux
+                premiers candidats pour garder le classement du petit modèle
+                (toujours reclasser si None, plus lent qu'une recherche directe)
+
+        Raises:
+            ValueError: Si l'index compact n'est pas aligné sur l'index principal
+        """
+        if small_index.ntotal != vector_store.index.ntotal:
+            raise ValueError(
+                f"Index de cascade désaligné: {small_index.ntotal} vecteurs "
+                f"(index principal: {vector_store.index.ntotal})"
+            )
+        _ensure_direct_map(vector_store.index)
+        self.vector_store = vector_store
+        self.small_embeddings = small_embeddings
+        self.small_index = small_index
+        self.candidates = candidates
+        self.skip_margin = skip_margin
+        self.num_queries = 0
+        self.num_rescored = 0
+
+    def retrieve(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Étape 1: candidats de l'index compact.
+
+        Args:
+            query: Texte de la requête
+
+        Returns:
+            tuple: (positions des candidats, distances dans l'index compact)
+        """
+        self.num_queries += 1
+        vector = np.asarray([self.small_embeddings.embed_query(query)], dtype=np.float32)
+        distances, ids = self.small_index.search(vector, self.candidates)
+        found = ids[0] >= 0
+        return ids[0][found], distances[0][found]
+
+    def is_confident(self, distances: np.ndarray) -> bool:
+        """
+        Indique si le classement du petit modèle peut être gardé tel quel.
+
+        Pour des vecteurs normalisés, distance L2² = 2 - 2 × cosinus: l'écart
+        de similarité entre les deux premiers candidats vaut (d2 - d1) / 2.
+
+        Args:
+            distances: Distances des candidats (ordre croissant)
+
+        Returns:
+            bool: True si le reclassement e5-large peut être évité
+        """
+        if self.skip_margin is None or len(distances) < 2:
+            return False
+        return (distances[1] - distances[0]) / 2 >= self.skip_margin
+
+    def rescore(
+        self, query_vector: List[float], ids: np.ndarray, k: int
+    ) -> List[Tuple[Document, float]]:
+        """
+        Étape 2: reclasse les candidats avec les vecteurs e5-large stockés.
+
+        Args:
+            query_vector: Embedding e5-large de la requête
+            ids: Positions des candidats (étape 1)
+            k: Nombre de résultats
+
+        Returns:
+            list: Couples (document, distance L2) par distance croissante
+        """
+        self.num_rescored += 1
+        query = np.asarray([query_vector], dtype=np.float32)
+        vectors, query = _stored_vectors(self.vector_store.index, ids, query)
+        distances = ((vectors - query) ** 2).sum(axis=1)
+        order = np.argsort(distances, kind="stable")[:k]
+        return self.results(ids[order], distances[order])
+
+    def results(
+        self, ids: np.ndarray, distances: np.ndarray, k: Optional[int] = None
+    ) -> List[Tuple[Document, float]]:
+        """
+        Associe les positions aux documents du vector store principal.
+
+        Args:
+            ids: Positions dans l'index principal
+            distances: Scores associés
+            k: Nombre de résultats (tous si None)
+
+        Returns:
+            list: Couples (document, score)
+        """
+        docstore = self.vector_store.docstore
+        mapping = self.vector_store.index_to_docstore_id
+        return [
+            (docstore.search(mapping[int(i)]), float(distance))
+            for i, distance in list(zip(ids, distances))[:k]
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques de la cascade.
+
+        Returns:
+            dict: Marge, requêtes, requêtes reclassées par e5-large et taux de
+                reclassement
+        """
+        return {
+            "candidates": self.candidates,
+            "skip_margin": self.skip_margin,
+            "queries": self.num_queries,
+            "rescored": self.num_rescored,
+            "rescore_rate": (
+                self.num_rescored / self.num_queries if self.num_queries else 0.0
+            ),
+        }
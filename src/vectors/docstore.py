@@ -0,0 +1,308 @@
+"""
+Docstore SQLite compact, lu à la demande, en remplacement de index.pkl.
+
+LangChain sauvegarde le docstore (un objet Document par chunk) dans
+index.pkl, désérialisé en entier au chargement (allow_dangerous_deserialization)
+et conservé en mémoire sous forme de millions de petits objets Python.
+
+Ici, les chunks sont stockés dans docstore.sqlite, une ligne par position
+FAISS, avec une colonne par champ de extract_metadata:
+
+- page_content est compressé (zlib);
+- les valeurs très répétées (ville, département, région, code postal,
+  statut, mots-clés) sont internées dans une table de chaînes;
+- les champs inconnus sont conservés dans une colonne JSON.
+
+Au chargement, rien n'est lu: seules les lignes des k résultats d'une
+requête sont relues (voir SQLiteDocstore.search).
+"""
+
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import json
+import logging
+import sqlite3
+import threading
+import zlib
+
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+DOCSTORE_FILENAME = "docstore.sqlite"
+
+# Champs de extract_metadata (une colonne chacun, dans le même ordre)
+_COLUMNS = (
+    "event_id",
+    "uid",
+    "title",
+    "city",
+    "department",
+    "region",
+    "postal_code",
+    "latitude",
+    "longitude",
+    "date_debut",
+    "date_fin",
+    "keywords",
+    "conditions",
+    "status",
+)
+# Champs à faible cardinalité, stockés comme identifiants de chaînes internées
+_INTERNED_FIELDS = {"city", "department", "region", "postal_code", "status"}
+# Liste de chaînes internées (JSON des identifiants)
+_LIST_FIELD = "keywords"
+
+
+def _create_schema(connection: sqlite3.Connection) -> None:
+    """Crée les tables du docstore."""
+    columns = ", ".join(_COLUMNS)
+    connection.executescript(
+        f"""
+        CREATE TABLE strings (id INTEGER PRIMARY KEY, value TEXT NOT NULL UNIQUE);
+        CREATE TABLE documents (
+            position INTEGER PRIMARY KEY,
+            doc_id TEXT NOT NULL UNIQUE,
+            content BLOB NOT NULL,
+            {columns},
+            extra TEXT
+        );
+        """
+    )
+
+
+def save_docstore(
+    documents: Docstore, index_to_docstore_id: Dict[int, str], save_path: str
+) -> None:
+    """
+    Écrit le docstore SQLite d'un vector store.
+
+    Args:
+        documents: Docstore source (ex: InMemoryDocstore), interrogé par search
+        index_to_docstore_id: Position FAISS → identifiant du document
+        save_path: Répertoire du vector store
+    """
+    path = Path(save_path) / DOCSTORE_FILENAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.exists():
+        path.unlink()
+
+    strings: Dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in strings:
+            strings[value] = len(strings) + 1
+        return strings[value]
+
+    rows = []
+    for position, doc_id in sorted(index_to_docstore_id.items()):
+        document = documents.search(doc_id)
+        metadata = dict(document.metadata)
+        row: List[Any] = [
+            position,
+            doc_id,
+            zlib.compress(document.page_content.encode("utf-8")),
+        ]
+        for field in _COLUMNS:
+            value = metadata.get(field)
+            # Valeur d'un type inattendu: conservée telle quelle dans extra
+            if field in _INTERNED_FIELDS and not isinstance(value, str):
+                value = None
+            elif field == _LIST_FIELD:
+                if isinstance(value, list) and all(isinstance(k, str) for k in value):
+                    value = json.dumps([intern(k) for k in value])
+                else:
+                    value = None
+            elif field in _INTERNED_FIELDS:
+                value = intern(value)
+            elif not isinstance(value, (str, int, float)) or isinstance(value, bool):
+                value = None
+            if value is not None:
+                del metadata[field]
+            row.append(value)
+        row.append(
+            json.dumps(metadata, ensure_ascii=False, default=str) if metadata else None
+        )
+        rows.append(row)
+
+    connection = sqlite3.connect(str(path))
+    try:
+        _create_schema(connection)
+        connection.executemany(
+            "INSERT INTO strings (id, value) VALUES (?, ?)",
+            [(id_, value) for value, id_ in strings.items()],
+        )
+        placeholders = ",".join("?" * (len(_COLUMNS) + 4))
+        connection.executemany(
+            f"INSERT INTO documents (position, doc_id, content, "
+            f"{', '.join(_COLUMNS)}, extra) VALUES ({placeholders})",
+            rows,
+        )
+        connection.commit()
+    finally:
+        connection.close()
+
+
+class SQLiteDocstore(Docstore):
+    """
+    Docstore en lecture seule adossé à docstore.sqlite.
+
+    Seule la table des chaînes internées est gardée en mémoire (quelques
+    milliers de valeurs); les documents sont relus à la demande.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Fichier docstore.sqlite
+        """
+        self.path = path
+        self._connection = sqlite3.connect(
+            f"file:{path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+        self._strings = dict(self._connection.execute("SELECT id, value FROM strings"))
+
+    def _execute(self, sql: str, params: tuple = ()) -> List[tuple]:
+        """Exécute une requête (connexion partagée entre threads)."""
+        with self._lock:
+            return self._connection.execute(sql, params).fetchall()
+
+    def _to_document(self, row: tuple) -> Document:
+        """Reconstruit un Document à partir d'une ligne de la table documents."""
+        doc_id, content, *values, extra = row
+        values = dict(zip(_COLUMNS, values))
+        metadata: Dict[str, Any] = {}
+        for field in _COLUMNS:
+            value = values[field]
+            if value is None:
+                continue
+            if field in _INTERNED_FIELDS:
+                value = self._strings[value]
+            elif field == _LIST_FIELD:
+                value = [self._strings[k] for k in json.loads(value)]
+            metadata[field] = value
+        if extra:
+            metadata.update(json.loads(extra))
+        return Document(
+            id=doc_id,
+            page_content=zlib.decompress(content).decode("utf-8"),
+            metadata=metadata,
+        )
+
+    def search(self, search: str) -> Union[str, Document]:
+        """
+        Relit un document par son identifiant.
+
+        Args:
+            search: Identifiant du document
+
+        Returns:
+            Document: Document trouvé, ou message d'erreur (convention LangChain)
+        """
+        rows = self._execute(
+            f"SELECT doc_id, content, {', '.join(_COLUMNS)}, extra "
+            "FROM documents WHERE doc_id = ?",
+            (search,),
+        )
+        if not rows:
+            return f"ID {search} not found."
+        return self._to_document(rows[0])
+
+    def iter_metadata(self, fields: Iterable[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """
+        Parcourt quelques champs de métadonnées de tous les documents.
+
+        Seules les colonnes demandées sont lues (ex: pour construire les index
+        de filtrage), sans décompresser les contenus.
+
+        Args:
+            fields: Champs de extract_metadata à lire
+
+        Yields:
+            tuple: (position FAISS, métadonnées restreintes aux champs présents)
+        """
+        fields = [field for field in fields if field in _COLUMNS]
+        rows = self._execute(
+            f"SELECT {', '.join(['position'] + fields)} FROM documents ORDER BY position"
+        )
+        for position, *values in rows:
+            metadata = {}
+            for field, value in zip(fields, values):
+                if value is None:
+                    continue
+                if field in _INTERNED_FIELDS:
+                    value = self._strings[value]
+                elif field == _LIST_FIELD:
+                    value = [self._strings[k] for k in json.loads(value)]
+                metadata[field] = value
+            yield position, metadata
+
+    def __len__(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM documents")[0][0]
+
+    def close(self) -> None:
+        """Ferme la connexion SQLite."""
+        self._connection.close()
+
+
+class PositionMapping(Mapping):
+    """
+    Position FAISS → identifiant du document, lue dans docstore.sqlite.
+
+    Remplace le dict index_to_docstore_id de LangChain sans le charger.
+    """
+
+    def __init__(self, docstore: SQLiteDocstore):
+        """
+        Args:
+            docstore: Docstore SQLite du vector store
+        """
+        self.docstore = docstore
+
+    def __getitem__(self, position: int) -> str:
+        rows = self.docstore._execute(
+            "SELECT doc_id FROM documents WHERE position = ?", (int(position),)
+        )
+        if not rows:
+            raise KeyError(position)
+        return rows[0][0]
+
+    def __iter__(self) -> Iterator[int]:
+        rows = self.docstore._execute("SELECT position FROM documents ORDER BY position")
+        return (position for (position,) in rows)
+
+    def __len__(self) -> int:
+        return len(self.docstore)
+
+    def items(self) -> List[Tuple[int, str]]:
+        """Couples (position, identifiant), lus en une seule requête."""
+        return self.docstore._execute(
+            "SELECT position, doc_id FROM documents ORDER BY position"
+        )
+
+    def values(self) -> List[str]:
+        """Identifiants des documents par position, lus en une seule requête."""
+        return [doc_id for _, doc_id in self.items()]
+
+
+def load_docstore(load_path: str) -> Optional[SQLiteDocstore]:
+    """
+    Ouvre le docstore SQLite d'un vector store, s'il existe.
+
+    Args:
+        load_path: Répertoire du vector store
+
+    Returns:
+        SQLiteDocstore: Docstore ouvert, ou None (docstore pickle de LangChain)
+    """
+    path = Path(load_path) / DOCSTORE_FILENAME
+    if not path.exists():
+        return None
+    return SQLiteDocstore(str(path))
@@ -0,0 +1,350 @@
+"""
+Recherche vectorielle filtrée par métadonnées (ville, département, mots-clés, statut).
+
+Un index inversé est construit au chargement du vector store: pour chaque
+champ filtrable et chaque valeur, la liste triée des positions FAISS des
+chunks concernés. Un filtre (valeurs d'un même champ combinées par OU,
+champs combinés par ET) est traduit en bitmap sur les positions FAISS.
+
+La stratégie de recherche dépend de la sélectivité du filtre (part des
+chunks retenus):
+
+- filtre sélectif: pré-filtrage, la bitmap est transmise à FAISS
+  (IDSelectorBitmap) qui ne calcule les distances que des chunks retenus;
+- filtre large: post-filtrage, FAISS retourne k / sélectivité candidats
+  (avec une marge) dont on garde les k premiers qui passent le filtre. Si
+  le filtre en a écarté trop, la recherche est refaite en pré-filtrage.
+
+Les index PQ à plat (ex: FAISS_QUANTIZATION=opq<M>) n'acceptent pas de
+sélecteur: ils sont toujours post-filtrés, et la reprise parcourt alors tous
+les candidats de l'index.
+
+Une fenêtre de dates (voir intervals.DateIntervalIndex) est combinée au
+filtre de métadonnées par ET, avec le même choix de stratégie.
+
+Sur un index quantifié dont les vecteurs exacts sont conservés, les
+candidats filtrés sont reclassés par leur distance exacte (voir
+quantization.ExactRescorer), comme les recherches sans filtre.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+import math
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from .docstore import SQLiteDocstore
+from .quantization import ExactRescorer
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Champs de extract_metadata filtrables
+FILTER_FIELDS = ("city", "department", "keywords", "status")
+# Sélectivité en dessous de laquelle le pré-filtrage est utilisé
+DEFAULT_PREFILTER_SELECTIVITY = 0.2
+# Marge de sur-échantillonnage du post-filtrage
+POSTFILTER_OVERFETCH = 2.0
+
+
+def iter_vector_store_metadata(
+    vector_store: FAISS, fields: Iterable[str]
+) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Parcourt les métadonnées des chunks d'un vector store, par position FAISS.
+
+    Avec un docstore SQLite, seules les colonnes demandées sont lues.
+
+    Args:
+        vector_store: Vector store chargé
+        fields: Champs utiles (les autres peuvent être omis)
+
+    Yields:
+        tuple: (position FAISS, métadonnées)
+    """
+    docstore = vector_store.docstore
+    if isinstance(docstore, SQLiteDocstore):
+        yield from docstore.iter_metadata(fields)
+        return
+    for position, doc_id in vector_store.index_to_docstore_id.items():
+        yield position, docstore.search(doc_id).metadata
+
+
+def _normalize(value: Any) -> str:
+    """Normalise une valeur de filtre (casse et espaces ignorés)."""
+    return str(value).strip().casefold()
+
+
+class MetadataIndex:
+    """
+    Index inversé valeur → positions FAISS pour les champs filtrables.
+    """
+
+    def __init__(self, num_vectors: int):
+        """
+        Args:
+            num_vectors: Nombre de vecteurs de l'index FAISS
+        """
+        self.num_vectors = num_vectors
+        self.postings: Dict[str, Dict[str, np.ndarray]] = {}
+
+    @classmethod
+    def from_vector_store(cls, vector_store: FAISS) -> "MetadataIndex":
+        """
+        Construit l'index à partir des métadonnées du docstore.
+
+        Args:
+            vector_store: Vector store chargé
+
+        Returns:
+            MetadataIndex: Index des champs FILTER_FIELDS
+        """
+        rows = iter_vector_store_metadata(vector_store, FILTER_FIELDS)
+        lists: Dict[str, Dict[str, List[int]]] = {field: {} for field in FILTER_FIELDS}
+        for position, metadata in rows:
+            for field in FILTER_FIELDS:
+                values = metadata.get(field)
+                if values is None or values == "":
+                    continue
+                if not isinstance(values, list):
+                    values = [values]
+                for value in {_normalize(v) for v in values}:
+                    lists[field].setdefault(value, []).append(int(position))
+
+        index = cls(vector_store.index.ntotal)
+        index.postings = {
+            field: {
+                value: np.array(positions, dtype=np.int64)
+                for value, positions in values.items()
+            }
+            for field, values in lists.items()
+        }
+        return index
+
+    def mask(self, filters: Dict[str, List[str]]) -> Optional[np.ndarray]:
+        """
+        Calcule la bitmap des positions qui satisfont un filtre.
+
+        Args:
+            filters: Champ → valeurs acceptées (champs sans valeur ignorés)
+
+        Returns:
+            np.ndarray: Bitmap booléenne [num_vectors], ou None sans filtre
+
+        Raises:
+            ValueError: Si un champ n'est pas filtrable
+        """
+        mask = None
+        for field, values in filters.items():
+            if not values:
+                continue
+            if field not in self.postings:
+                raise ValueError(
+                    f"Champ non filtrable: {field} (champs: {', '.join(FILTER_FIELDS)})"
+                )
+            field_mask = np.zeros(self.num_vectors, dtype=bool)
+            for value in values:
+                positions = self.postings[field].get(_normalize(value))
+                if positions is not None:
+                    field_mask[positions] = True
+            mask = field_mask if mask is None else mask & field_mask
+        return mask
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retourne le nombre de valeurs distinctes par champ.
+
+        Returns:
+            dict: Champ → nombre de valeurs indexées
+        """
+        return {field: len(values) for field, values in self.postings.items()}
+
+
+def _search_parameters(index: faiss.Index, selector: faiss.IDSelector):
+    """
+    Paramètres de recherche FAISS avec un sélecteur, adaptés au type d'index.
+
+    Les paramètres nprobe / efSearch courants de l'index sont conservés.
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        return faiss.SearchParametersIVF(sel=selector, nprobe=ivf.nprobe)
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexPreTransform):
+        inner = faiss.downcast_index(inner.index)
+    if isinstance(inner, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(sel=selector, efSearch=inner.hnsw.efSearch)
+    return faiss.SearchParameters(sel=selector)
+
+
+def _accepts_selector(index: faiss.Index) -> bool:
+    """
+    Indique si la recherche de l'index accepte un sélecteur (IDSelector).
+
+    IndexPQ et IndexPQFastScan, éventuellement derrière une OPQ ou une PCA,
+    lèvent une RuntimeError si les paramètres de recherche en contiennent un.
+    """
+    if faiss.try_extract_index_ivf(index) is not None:
+        return True
+    inner = faiss.downcast_index(index)
+    if isinstance(inner, faiss.IndexPreTransform):
+        inner = faiss.downcast_index(inner.index)
+    return not isinstance(inner, (faiss.IndexPQ, faiss.IndexPQFastScan))
+
+
+class FilteredSearcher:
+    """
+    Recherche filtrée avec choix du pré- ou post-filtrage selon la sélectivité.
+
+    Les scores retournés sont des distances L2 (comme similarity_search_with_score).
+    """
+
+    def __init__(
+        self,
+        vector_store: FAISS,
+        metadata_index: MetadataIndex,
+        prefilter_selectivity: float = DEFAULT_PREFILTER_SELECTIVITY,
+        date_index=None,
+        rescorer: Optional[ExactRescorer] = None,
+    ):
+        """
+        Args:
+            vector_store: Vector store principal
+            metadata_index: Index des métadonnées filtrables
+            prefilter_selectivity: Sélectivité en dessous de laquelle le
+                pré-filtrage est utilisé
+            date_index: Index des intervalles de dates (DateIntervalIndex), optionnel
+            rescorer: Reclassement exact des candidats (index quantifié), optionnel
+        """
+        self.vector_store = vector_store
+        self.metadata_index = metadata_index
+        self.date_index = date_index
+        self.rescorer = rescorer
+        self.prefilter_selectivity = prefilter_selectivity
+        self.accepts_selector = _accepts_selector(vector_store.index)
+        self.plans = {"prefilter": 0, "postfilter": 0, "fallback": 0, "empty": 0}
+
+    def plan(self, mask: np.ndarray) -> str:
+        """
+        Choisit la stratégie de recherche d'un filtre.
+
+        Args:
+            mask: Bitmap du filtre
+
+        Returns:
+            str: "empty" (aucun chunk), "prefilter" ou "postfilter"
+        """
+        matches = int(mask.sum())
+        if matches == 0:
+            return "empty"
+        if matches / len(mask) < self.prefilter_selectivity:
+            return "prefilter"
+        return "postfilter"
+
+    def _prefilter(self, query: np.ndarray, mask: np.ndarray, k: int):
+        """Recherche restreinte aux positions de la bitmap."""
+        bitmap = np.packbits(mask, bitorder="little")
+        selector = faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap))
+        params = _search_parameters(self.vector_store.index, selector)
+        distances, ids = self.vector_store.index.search(query, k, params=params)
+        return distances[0], ids[0]
+
+    def _postfilter(
+        self, query: np.ndarray, mask: np.ndarray, k: int, exhaustive: bool = False
+    ):
+        """Recherche sur-échantillonnée (ou exhaustive), puis filtrage des candidats."""
+        selectivity = mask.sum() / len(mask)
+        fetch_k = min(len(mask), math.ceil(k / selectivity * POSTFILTER_OVERFETCH))
+        if exhaustive:
+            fetch_k = len(mask)
+        distances, ids = self.vector_store.index.search(query, fetch_k)
+        keep = (ids[0] >= 0) & mask[np.maximum(ids[0], 0)]
+        return distances[0][keep][:k], ids[0][keep][:k]
+
+    def search(
+        self,
+        embedding: List[float],
+        k: int,
+        filters: Dict[str, List[str]],
+        date_range: Optional[Tuple[int, int]] = None,
+    ) -> List[Tuple[Document, float]]:
+        """
+        Recherche les k chunks les plus proches qui satisfont le filtre.
+
+        Args:
+            embedding: Embedding de la requête
+            k: Nombre de résultats
+            filters: Champ → valeurs acceptées (voir MetadataIndex.mask)
+            date_range: Fenêtre (début, fin) en timestamps, bornes incluses:
+                seuls les événements qui la chevauchent sont retenus
+
+        Returns:
+            list: Couples (document, distance L2, exacte avec rescorer) par
+                distance croissante
+
+        Raises:
+            ValueError: Si date_range est donné sans index de dates
+        """
+        query = np.asarray([embedding], dtype=np.float32)
+        mask = self.metadata_index.mask(filters)
+        if date_range is not None:
+            if self.date_index is None:
+                raise ValueError("Filtre de dates indisponible (index de dates absent)")
+            date_mask = self.date_index.mask(*date_range)
+            mask = date_mask if mask is None else mask & date_mask
+        # Avec reclassement exact: fetch_factor candidats par résultat
+        fetch_k = k * self.rescorer.fetch_factor if self.rescorer else k
+        if mask is None:
+            distances, ids = self.vector_store.index.search(query, fetch_k)
+            distances, ids = distances[0], ids[0]
+        else:
+            plan = self.plan(mask)
+            if plan == "empty":
+                self.plans["empty"] += 1
+                return []
+            if plan == "prefilter" and not self.accepts_selector:
+                plan = "postfilter"
+            if plan == "postfilter":
+                distances, ids = self._postfilter(query, mask, fetch_k)
+                if len(ids) < min(fetch_k, int(mask.sum())):
+                    plan = "fallback"
+            if plan != "postfilter" and self.accepts_selector:
+                distances, ids = self._prefilter(query, mask, fetch_k)
+            elif plan != "postfilter":
+                distances, ids = self._postfilter(query, mask, fetch_k, exhaustive=True)
+            self.plans[plan] += 1
+
+        if self.rescorer is not None:
+            self.rescorer.num_queries += 1
+            distances, ids = self.rescorer.rescore(query[0], ids, k)
+
+        docstore = self.vector_store.docstore
+        mapping = self.vector_store.index_to_docstore_id
+        return [
+            (docstore.search(mapping[int(i)]), float(distance))
+            for i, distance in zip(ids, distances)
+            if i >= 0
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne les statistiques des recherches filtrées.
+
+        Returns:
+            dict: Nombre de recherches par stratégie et valeurs indexées par champ
+        """
+        stats = {
+            "prefilter_selectivity": self.prefilter_selectivity,
+            "plans": dict(self.plans),
+            "indexed_values": self.metadata_index.stats(),
+        }
+        if self.date_index is not None:
+            stats["date_index"] = self.date_index.stats()
+        stats["rescored"] = self.rescorer is not None
+        return stats
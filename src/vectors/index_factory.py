@@ -0,0 +1,219 @@
+"""
+Index FAISS configurables (Flat, IVF, HNSW, PQ...) via une chaîne index_factory.
+
+Par défaut, l'index est exact (IndexFlatL2) et le coût d'une recherche croît
+linéairement avec le nombre de chunks. FAISS_INDEX_FACTORY permet de choisir
+un index approché (ex: "IVF1024,Flat", "HNSW32", "IVF4096,PQ64"), entraîné
+sur un échantillon des vecteurs calculés.
+
+Les paramètres de recherche (nprobe pour IVF, efSearch pour HNSW) sont
+enregistrés à côté de l'index (index_params.json) et réappliqués par
+vectors.load_vector_store.
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+import json
+import logging
+import os
+
+import faiss
+
+from .reduction import PCA_TRAINING_SAMPLES
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+INDEX_PARAMS_FILENAME = "index_params.json"
+# Paramètres de recherche appliqués à la construction (si non précisés)
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+# Points d'entraînement par liste IVF recommandés par FAISS
+TRAINING_POINTS_PER_LIST = 40
+# Nombre maximal de vecteurs conservés pour l'entraînement
+INDEX_TRAINING_MAX_SAMPLES = 100000
+
+
+def create_factory_index(
+    dimension: int, index_factory: str, pca_dim: Optional[int] = None
+) -> faiss.Index:
+    """
+    Crée un index (non entraîné) à partir d'une chaîne index_factory.
+
+    Args:
+        dimension: Dimension des vecteurs
+        index_factory: Description FAISS de l'index (ex: "IVF1024,Flat", "HNSW32")
+        pca_dim: Dimension après réduction PCA, ajoutée en tête de l'index
+
+    Returns:
+        faiss.Index: Index à entraîner (si nécessaire) puis à remplir
+
+    Raises:
+        ValueError: Si la description de l'index est invalide
+    """
+    description = f"PCA{pca_dim},{index_factory}" if pca_dim else index_factory
+    try:
+        return faiss.index_factory(dimension, description, faiss.METRIC_L2)
+    except RuntimeError as e:
+        raise ValueError(f"Index FAISS invalide: {description} ({e})") from e
+
+
+def training_sample_size(index: faiss.Index) -> int:
+    """
+    Nombre de vecteurs à réserver pour l'entraînement d'un index.
+
+    Args:
+        index: Index créé par create_factory_index
+
+    Returns:
+        int: Taille de l'échantillon d'entraînement
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is None:
+        return PCA_TRAINING_SAMPLES
+    return min(
+        max(PCA_TRAINING_SAMPLES, TRAINING_POINTS_PER_LIST * ivf.nlist),
+        INDEX_TRAINING_MAX_SAMPLES,
+    )
+
+
+def _product_quantizer(index: faiss.Index) -> Optional[faiss.ProductQuantizer]:
+    """Retourne le quantifieur produit (PQ, IVF-PQ, éventuellement derrière une OPQ)."""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        index = ivf
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        index = faiss.downcast_index(index.index)
+    return getattr(index, "pq", None)
+
+
+def check_training_sample(index: faiss.Index, num_vectors: int) -> None:
+    """
+    Vérifie que l'échantillon suffit à entraîner l'index.
+
+    Args:
+        index: Index à entraîner
+        num_vectors: Nombre de vecteurs disponibles
+
+    Raises:
+        ValueError: Si le corpus compte moins de vecteurs que de listes IVF,
+            ou que de centroïdes par sous-quantifieur PQ (2^nbits)
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and num_vectors < ivf.nlist:
+        raise ValueError(
+            f"Pas assez de vecteurs ({num_vectors}) pour entraîner un index "
+            f"IVF à {ivf.nlist} listes"
+        )
+    pq = _product_quantizer(index)
+    if pq is not None and num_vectors < pq.ksub:
+        raise ValueError(
+            f"Pas assez de vecteurs ({num_vectors}) pour entraîner un index "
+            f"PQ à {pq.ksub} centroïdes par sous-quantifieur"
+        )
+
+
+def _hnsw_index(index: faiss.Index) -> Optional[faiss.Index]:
+    """Retourne l'index HNSW (éventuellement derrière une PCA), ou None."""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        index = faiss.downcast_index(index.index)
+    return index if isinstance(index, faiss.IndexHNSW) else None
+
+
+def get_search_params(index: faiss.Index) -> Dict[str, int]:
+    """
+    Lit les paramètres de recherche applicables à un index.
+
+    Args:
+        index: Index FAISS
+
+    Returns:
+        dict: nprobe (IVF) et/ou efSearch (HNSW); vide pour un index exact
+    """
+    params = {}
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        params["nprobe"] = ivf.nprobe
+    hnsw = _hnsw_index(index)
+    if hnsw is not None:
+        params["efSearch"] = hnsw.hnsw.efSearch
+    return params
+
+
+def set_search_params(index: faiss.Index, params: Dict[str, int]) -> Dict[str, int]:
+    """
+    Applique les paramètres de recherche qui concernent l'index.
+
+    Args:
+        index: Index FAISS
+        params: nprobe et/ou efSearch (les paramètres sans objet sont ignorés)
+
+    Returns:
+        dict: Paramètres effectifs de l'index (voir get_search_params)
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and params.get("nprobe"):
+        ivf.nprobe = min(int(params["nprobe"]), ivf.nlist)
+    hnsw = _hnsw_index(index)
+    if hnsw is not None and params.get("efSearch"):
+        hnsw.hnsw.efSearch = int(params["efSearch"])
+    return get_search_params(index)
+
+
+def get_search_params_from_env() -> Dict[str, int]:
+    """
+    Lit les paramètres de recherche définis dans l'environnement.
+
+    Variables reconnues:
+        FAISS_NPROBE: Nombre de listes IVF parcourues par recherche
+        FAISS_EF_SEARCH: Taille de la liste de candidats HNSW
+
+    Returns:
+        dict: Paramètres définis (nprobe, efSearch)
+    """
+    params = {}
+    nprobe = os.getenv("FAISS_NPROBE")
+    if nprobe:
+        params["nprobe"] = int(nprobe)
+    ef_search = os.getenv("FAISS_EF_SEARCH")
+    if ef_search:
+        params["efSearch"] = int(ef_search)
+    return params
+
+
+def save_index_params(index: faiss.Index, save_path: str) -> None:
+    """
+    Enregistre le type d'index et ses paramètres de recherche.
+
+    Args:
+        index: Index FAISS sauvegardé
+        save_path: Répertoire du vector store
+    """
+    params: Dict[str, Any] = {
+        "index_type": type(faiss.downcast_index(index)).__name__,
+        "search_params": get_search_params(index),
+    }
+    with open(Path(save_path) / INDEX_PARAMS_FILENAME, "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
+
+
+def load_index_params(load_path: str) -> Optional[Dict[str, Any]]:
+    """
+    Lit les paramètres enregistrés avec un vector store.
+
+    Args:
+        load_path: Répertoire du vector store
+
+    Returns:
+        dict: Type d'index et paramètres de recherche, ou None (index antérieur)
+    """
+    path = Path(load_path) / INDEX_PARAMS_FILENAME
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
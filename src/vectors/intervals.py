@@ -0,0 +1,210 @@
+"""
+Index d'intervalles de dates des événements (date_debut / date_fin).
+
+Chaque chunk daté est représenté par l'intervalle [date_debut, date_fin]
+de son événement (date_fin absente: date_debut). Les intervalles sont
+conservés dans des tableaux numpy triés par début, avec l'ordre des fins:
+
+les chunks qui chevauchent une fenêtre [X, Y] sont ceux dont le début est
+≤ Y (préfixe des débuts triés) et dont la fin est ≥ X (suffixe des fins
+triées), deux bornes trouvées par recherche dichotomique. Seul le plus court
+des deux ensembles est parcouru: pour une date récente, les chunks qui
+commencent avant Y sont presque tout le corpus, mais ceux qui finissent
+après X sont peu nombreux (et inversement pour une date ancienne). Le coût
+reste linéaire si les deux ensembles sont grands (nombreux événements très
+longs autour de la fenêtre).
+
+L'index produit une bitmap sur les positions FAISS (combinable avec les
+filtres de métadonnées, voir filtering.FilteredSearcher) et permet de lister
+les événements d'une journée sans recherche vectorielle.
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import logging
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from .filtering import iter_vector_store_metadata
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Fuseau horaire des dates sans heure (ex: "événements du 14 juillet")
+DEFAULT_TIMEZONE = "Europe/Paris"
+
+
+def parse_timestamp(value: Any) -> Optional[int]:
+    """
+    Convertit une date ISO 8601 des métadonnées en timestamp Unix (secondes).
+
+    Args:
+        value: Date (ex: "2025-11-10T19:00:00+01:00"); sans fuseau: UTC
+
+    Returns:
+        int: Timestamp, ou None si la date est absente ou invalide
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def day_window(
+    start: date, end: Optional[date] = None, tz: str = DEFAULT_TIMEZONE
+) -> Tuple[int, int]:
+    """
+    Fenêtre [début du premier jour, fin du dernier jour] en heure locale.
+
+    Args:
+        start: Premier jour
+        end: Dernier jour inclus (défaut: start)
+        tz: Fuseau horaire des journées
+
+    Returns:
+        tuple: (timestamp de début, timestamp de fin), bornes incluses
+    """
+    zone = ZoneInfo(tz)
+    begin = datetime.combine(start, time.min, tzinfo=zone)
+    finish = datetime.combine((end or start) + timedelta(days=1), time.min, tzinfo=zone)
+    return int(begin.timestamp()), int(finish.timestamp()) - 1
+
+
+class DateIntervalIndex:
+    """
+    Intervalles [début, fin] des chunks datés, triés par début.
+    """
+
+    def __init__(
+        self,
+        num_vectors: int,
+        starts: np.ndarray,
+        ends: np.ndarray,
+        positions: np.ndarray,
+        event_ids: np.ndarray,
+    ):
+        """
+        Args:
+            num_vectors: Nombre de vecteurs de l'index FAISS
+            starts: Débuts (timestamps), triés
+            ends: Fins (timestamps), alignées sur starts
+            positions: Positions FAISS, alignées sur starts
+            event_ids: Identifiants d'événement, alignés sur starts
+        """
+        self.num_vectors = num_vectors
+        self.starts = starts
+        self.ends = ends
+        self.positions = positions
+        self.event_ids = event_ids
+        # Indices (dans les tableaux triés par début) par fin croissante
+        self.end_order = np.argsort(ends, kind="stable")
+        self.sorted_ends = ends[self.end_order]
+
+    @classmethod
+    def from_vector_store(cls, vector_store: FAISS) -> "DateIntervalIndex":
+        """
+        Construit l'index à partir des métadonnées du docstore.
+
+        Un chunk sans event_id est son propre événement (identifiant du
+        document dans le docstore).
+
+        Args:
+            vector_store: Vector store chargé
+
+        Returns:
+            DateIntervalIndex: Index des chunks datés
+        """
+        rows = []
+        fields = ("event_id", "date_debut", "date_fin")
+        mapping = vector_store.index_to_docstore_id
+        for position, metadata in iter_vector_store_metadata(vector_store, fields):
+            start = parse_timestamp(metadata.get("date_debut"))
+            end = parse_timestamp(metadata.get("date_fin"))
+            if start is None and end is None:
+                continue
+            start = start if start is not None else end
+            end = max(end if end is not None else start, start)
+            event_id = metadata.get("event_id") or f"doc:{mapping[int(position)]}"
+            rows.append((start, end, int(position), event_id))
+
+        rows.sort(key=lambda row: row[0])
+        return cls(
+            vector_store.index.ntotal,
+            np.array([row[0] for row in rows], dtype=np.int64),
+            np.array([row[1] for row in rows], dtype=np.int64),
+            np.array([row[2] for row in rows], dtype=np.int64),
+            np.array([row[3] for row in rows], dtype=object),
+        )
+
+    def overlapping(self, start: int, end: int) -> np.ndarray:
+        """
+        Indices (dans les tableaux triés) des intervalles qui chevauchent [start, end].
+
+        Args:
+            start: Début de la fenêtre (timestamp, inclus)
+            end: Fin de la fenêtre (timestamp, inclus)
+
+        Returns:
+            np.ndarray: Indices triés par début d'intervalle
+        """
+        # Débuts ≤ end: préfixe [0, prefix); fins ≥ start: end_order[suffix:]
+        prefix = int(np.searchsorted(self.starts, end, side="right"))
+        suffix = int(np.searchsorted(self.sorted_ends, start, side="left"))
+        if prefix <= len(self.sorted_ends) - suffix:
+            return np.flatnonzero(self.ends[:prefix] >= start)
+        candidates = self.end_order[suffix:]
+        return np.sort(candidates[self.starts[candidates] <= end])
+
+    def mask(self, start: int, end: int) -> np.ndarray:
+        """
+        Bitmap des positions FAISS des chunks qui chevauchent [start, end].
+
+        Args:
+            start: Début de la fenêtre (timestamp, inclus)
+            end: Fin de la fenêtre (timestamp, inclus)
+
+        Returns:
+            np.ndarray: Bitmap booléenne [num_vectors]
+        """
+        mask = np.zeros(self.num_vectors, dtype=bool)
+        mask[self.positions[self.overlapping(start, end)]] = True
+        return mask
+
+    def events(self, start: int, end: int, limit: Optional[int] = None) -> List[int]:
+        """
+        Un chunk par événement qui chevauche [start, end], par date de début.
+
+        Args:
+            start: Début de la fenêtre (timestamp, inclus)
+            end: Fin de la fenêtre (timestamp, inclus)
+            limit: Nombre maximal d'événements
+
+        Returns:
+            list: Positions FAISS (premier chunk de chaque événement)
+        """
+        found = self.overlapping(start, end)
+        _, first = np.unique(self.event_ids[found], return_index=True)
+        first = np.sort(first)[:limit]
+        return [int(p) for p in self.positions[found[first]]]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Retourne la taille de l'index.
+
+        Returns:
+            dict: Chunks datés et événements distincts
+        """
+        return {
+            "dated_chunks": len(self.starts),
+            "events": len(set(self.event_ids.tolist())),
+        }
@@ -0,0 +1,251 @@
+"""
+Quantification des vecteurs stockés (SQ8, SQ4, OPQ + PQ) et reclassement exact.
+
+Par défaut, l'index conserve les vecteurs float32 bruts (4 Ko par chunk en
+dimension 1024), chargés par chaque worker de l'API. Une quantification
+réduit cette empreinte:
+
+    fp16     SQfp16        2 octets / dimension   (÷2)
+    sq8      SQ8           1 octet / dimension    (÷4)
+    sq4      SQ4           1/2 octet / dimension  (÷8)
+    opq<M>   OPQ<M>,PQ<M>  M octets par vecteur   (÷16 pour M = d/4, ex: opq256)
+
+La perte de rappel dépend du corpus: elle est mesurée à la construction
+(rappel@k par rapport à une recherche exacte, voir pipeline.py). Pour la
+compenser, les vecteurs exacts peuvent être conservés sur le disque
+(exact_vectors.npy, mappé en mémoire, donc partagé entre workers via le
+cache du système): l'index quantifié sélectionne fetch_factor × k candidats,
+reclassés avec leurs vecteurs exacts.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+import re
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+EXACT_VECTORS_FILENAME = "exact_vectors.npy"
+# Candidats de l'index quantifié par résultat final
+DEFAULT_RESCORE_FACTOR = 4
+
+_QUANTIZATION_FACTORIES = {"fp16": "SQfp16", "sq8": "SQ8", "sq4": "SQ4"}
+
+
+def quantization_factory(quantization: str) -> str:
+    """
+    Traduit un mode de quantification en description index_factory FAISS.
+
+    Args:
+        quantization: "fp16", "sq8", "sq4" ou "opq<M>" (M sous-quantifieurs,
+            diviseur de la dimension, ex: "opq256")
+
+    Returns:
+        str: Description de l'index (ex: "SQ8", "OPQ256,PQ256")
+
+    Raises:
+        ValueError: Si le mode est inconnu
+    """
+    name = quantization.strip().lower()
+    if name in _QUANTIZATION_FACTORIES:
+        return _QUANTIZATION_FACTORIES[name]
+    match = re.fullmatch(r"opq(\d+)", name)
+    if match:
+        m = int(match.group(1))
+        return f"OPQ{m},PQ{m}"
+    raise ValueError(
+        f"Quantification inconnue: {quantization} (attendu: fp16, sq8, sq4, opq<M>)"
+    )
+
+
+class ExactVectorWriter:
+    """
+    Écrit les vecteurs pleine dimension dans un fichier .npy au fil de la construction.
+
+    Les tranches sont écrites dans un fichier mappé en mémoire: seule la
+    tranche courante est en mémoire.
+    """
+
+    def __init__(self, path: str, num_vectors: int):
+        """
+        Args:
+            path: Fichier .npy à créer
+            num_vectors: Nombre total de vecteurs attendus
+        """
+        self.path = Path(path)
+        self.num_vectors = num_vectors
+        self.num_written = 0
+        self._array = None
+
+    def observe(self, vectors: np.ndarray) -> None:
+        """
+        Ajoute une tranche de vecteurs, dans l'ordre de l'index.
+
+        Args:
+            vectors: Vecteurs pleine dimension de la tranche
+        """
+        if self._array is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._array = np.lib.format.open_memmap(
+                self.path,
+                mode="w+",
+                dtype=np.float32,
+                shape=(self.num_vectors, vectors.shape[1]),
+            )
+        end = self.num_written + len(vectors)
+        self._array[self.num_written : end] = vectors
+        self.num_written = end
+
+    def close(self) -> None:
+        """Écrit les données sur le disque et libère le fichier."""
+        if self._array is not None:
+            self._array.flush()
+            self._array = None
+
+
+def load_exact_vectors(load_path: str) -> Optional[np.ndarray]:
+    """
+    Ouvre les vecteurs exacts conservés avec l'index (mappés en mémoire).
+
+    Args:
+        load_path: Répertoire du vector store
+
+    Returns:
+        np.ndarray: Matrice [n, dimension] en lecture seule, ou None si absente
+    """
+    path = Path(load_path) / EXACT_VECTORS_FILENAME
+    if not path.exists():
+        return None
+    return np.load(path, mmap_mode="r")
+
+
+def bytes_per_vector(index: faiss.Index) -> Optional[int]:
+    """
+    Taille d'un vecteur encodé dans un index plat (quantifié ou non).
+
+    Args:
+        index: Index FAISS
+
+    Returns:
+        int: Octets par vecteur, ou None si l'index n'expose pas de code_size
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        index = faiss.downcast_index(index.index)
+    return getattr(index, "code_size", None)
+
+
+class ExactRescorer:
+    """
+    Recherche sur l'index quantifié, reclassement avec les vecteurs exacts.
+
+    Les scores retournés sont des distances L2 exactes en pleine dimension.
+    """
+
+    def __init__(
+        self,
+        vector_store: FAISS,
+        exact_vectors: np.ndarray,
+        fetch_factor: int = DEFAULT_RESCORE_FACTOR,
+    ):
+        """
+        Args:
+            vector_store: Vector store dont l'index est quantifié
+            exact_vectors: Vecteurs exacts alignés sur l'index [n, dimension]
+            fetch_factor: Candidats de l'index quantifié par résultat final
+
+        Raises:
+            ValueError: Si les vecteurs exacts ne sont pas alignés sur l'index
+        """
+        if len(exact_vectors) != vector_store.index.ntotal:
+            raise ValueError(
+                f"Vecteurs exacts désalignés: {len(exact_vectors)} vecteurs "
+                f"(index: {vector_store.index.ntotal})"
+            )
+        self.vector_store = vector_store
+        self.exact_vectors = exact_vectors
+        self.fetch_factor = fetch_factor
+        self.num_queries = 0
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Recherche reclassée, avec la même signature que faiss.Index.search.
+
+        Args:
+            queries: Vecteurs des requêtes [n_queries, dimension]
+            k: Nombre de résultats par requête
+
+        Returns:
+            tuple: (distances exactes, positions) [n_queries, k], -1 si absent
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        _, candidates = self.vector_store.index.search(queries, k * self.fetch_factor)
+
+        all_distances = np.full((len(queries), k), np.inf, dtype=np.float32)
+        all_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        for row, (query, ids) in enumerate(zip(queries, candidates)):
+            distances, ids = self.rescore(query, ids, k)
+            all_distances[row, : len(ids)] = distances
+            all_ids[row, : len(ids)] = ids
+        return all_distances, all_ids
+
+    def rescore(
+        self, query: np.ndarray, ids: np.ndarray, k: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Reclasse des candidats d'une requête par leur distance exacte.
+
+        Args:
+            query: Vecteur de la requête [dimension]
+            ids: Positions candidates (-1 ignorés)
+            k: Nombre de résultats
+
+        Returns:
+            tuple: (distances L2 exactes, positions) des k meilleurs candidats
+        """
+        # Lecture des lignes du fichier mappé dans l'ordre du disque
+        ids = np.sort(ids[ids >= 0])
+        distances = ((self.exact_vectors[ids] - query) ** 2).sum(axis=1)
+        order = np.argsort(distances, kind="stable")[:k]
+        return distances[order], ids[order]
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: List[float], k: int = 4
+    ) -> List[Tuple[Document, float]]:
+        """
+        Équivalent reclassé de FAISS.similarity_search_with_score_by_vector.
+
+        Args:
+            embedding: Embedding de la requête
+            k: Nombre de résultats
+
+        Returns:
+            list: Couples (document, distance L2 exacte) par distance croissante
+        """
+        self.num_queries += 1
+        distances, ids = self.search(np.asarray([embedding], dtype=np.float32), k)
+        docstore = self.vector_store.docstore
+        mapping = self.vector_store.index_to_docstore_id
+        return [
+            (docstore.search(mapping[int(i)]), float(distance))
+            for i, distance in zip(ids[0], distances[0])
+            if i >= 0
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Retourne les statistiques du reclassement.
+
+        Returns:
+            dict: Facteur de sur-échantillonnage et requêtes reclassées
+        """
+        return {"fetch_factor": self.fetch_factor, "queries": self.num_queries}
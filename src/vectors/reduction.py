@@ -0,0 +1,117 @@
+"""
+Réduction de dimension (PCA) de l'index vectoriel.
+
+La PCA est apprise à la construction de l'index puis intégrée à l'index
+FAISS lui-même (IndexPreTransform): elle est sauvegardée dans le même
+fichier que l'index et appliquée automatiquement aux vecteurs de requête
+lors de la recherche. Le module fournit aussi une mesure du rappel@k de
+l'index réduit par rapport à une recherche exacte en pleine dimension.
+"""
+
+from typing import Dict, List, Optional
+import logging
+
+import faiss
+import numpy as np
+
+# Configuration du logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+)
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de vecteurs utilisés pour apprendre la PCA
+PCA_TRAINING_SAMPLES = 20000
+
+
+def build_pca_index(training_vectors: np.ndarray, output_dim: int) -> faiss.Index:
+    """
+    Apprend une PCA et crée l'index plat réduit correspondant.
+
+    Args:
+        training_vectors: Vecteurs d'apprentissage [n, dimension d'origine]
+        output_dim: Dimension après réduction
+
+    Returns:
+        faiss.Index: Index entraîné (PCA + IndexFlatL2), encore vide
+
+    Raises:
+        ValueError: Si la dimension cible n'est pas inférieure à celle d'origine
+    """
+    input_dim = training_vectors.shape[1]
+    if not 0 < output_dim < input_dim:
+        raise ValueError(
+            f"Dimension PCA invalide: {output_dim} (dimension d'origine: {input_dim})"
+        )
+
+    pca = faiss.PCAMatrix(input_dim, output_dim)
+    index = faiss.IndexPreTransform(pca, faiss.IndexFlatL2(output_dim))
+    index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+    return index
+
+
+class RecallEvaluator:
+    """
+    Calcule le top-k exact en pleine dimension au fil de la construction.
+
+    Les vecteurs des documents sont observés tranche par tranche (sans être
+    conservés): seul le top-k courant de chaque requête est gardé en mémoire.
+    """
+
+    def __init__(self, query_vectors: np.ndarray, k: int = 10):
+        """
+        Args:
+            query_vectors: Embeddings des requêtes de référence [n_queries, dim]
+            k: Nombre de résultats comparés
+        """
+        self.queries = np.ascontiguousarray(query_vectors, dtype=np.float32)
+        self.k = k
+        self.num_vectors = 0
+        self._distances = np.full((len(self.queries), 0), np.inf, dtype=np.float32)
+        self._ids = np.empty((len(self.queries), 0), dtype=np.int64)
+
+    def observe(self, vectors: np.ndarray) -> None:
+        """
+        Met à jour le top-k exact avec une nouvelle tranche de documents.
+
+        Args:
+            vectors: Vecteurs pleine dimension de la tranche, dans l'ordre d'ajout
+        """
+        distances = faiss.pairwise_distances(
+            self.queries, np.ascontiguousarray(vectors, dtype=np.float32)
+        )
+        ids = np.arange(self.num_vectors, self.num_vectors + len(vectors))
+        self.num_vectors += len(vectors)
+
+        all_distances = np.hstack([self._distances, distances])
+        all_ids = np.hstack([self._ids, np.broadcast_to(ids, distances.shape)])
+        keep = min(self.k, all_distances.shape[1])
+        top = np.argsort(all_distances, axis=1, kind="stable")[:, :keep]
+        self._distances = np.take_along_axis(all_distances, top, axis=1)
+        self._ids = np.take_along_axis(all_ids, top, axis=1)
+
+    def report(self, index: faiss.Index, k_values: Optional[List[int]] = None) -> Dict[str, float]:
+        """
+        Mesure le rappel@k d'un index par rapport au top-k exact.
+
+        Args:
+            index: Index évalué (ex: index réduit par PCA)
+            k_values: Valeurs de k à évaluer (défaut: 1, 5 et k)
+
+        Returns:
+            dict: Rappel moyen pour chaque k (clés "recall@k")
+        """
+        k_values = sorted(set(k_values or [1, 5, self.k]))
+        k_values = [k for k in k_values if k <= min(self.k, self.num_vectors)]
+        if not k_values or len(self.queries) == 0:
+            return {}
+
+        _, found = index.search(self.queries, k_values[-1])
+        report = {}
+        for k in k_values:
+            hits = [
+                len(set(expected[:k]) & set(actual[:k])) / k
+                for expected, actual in zip(self._ids, found)
+            ]
+            report[f"recall@{k}"] = float(np.mean(hits))
+        return report
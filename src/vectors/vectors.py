@@ -5,14 +5,34 @@ Ce module gère la création, sauvegarde, chargement et recherche dans l'index F
 Responsabilité unique : opérations sur les vector stores.
 """
 
-from typing import List, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 from pathlib import Path
+import itertools
 import logging
+import pickle
+import uuid
 
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 
+from .docstore import DOCSTORE_FILENAME, PositionMapping, load_docstore, save_docstore
+from .index_factory import (
+    DEFAULT_EF_SEARCH,
+    DEFAULT_NPROBE,
+    check_training_sample,
+    create_factory_index,
+    load_index_params,
+    save_index_params,
+    set_search_params,
+    training_sample_size,
+)
+from .quantization import ExactVectorWriter, quantization_factory
+from .reduction import PCA_TRAINING_SAMPLES, RecallEvaluator, build_pca_index
+
 # Configuration du logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -21,15 +41,39 @@ logger = logging.getLogger(__name__)
 
 
 def create_vector_store(
-    documents: List[Document], embeddings: Embeddings, verbose: bool = False
+    documents: List[Document],
+    embeddings: Embeddings,
+    verbose: bool = False,
+    pca_dim: Optional[int] = None,
+    recall_evaluator: Optional[RecallEvaluator] = None,
+    index_factory: Optional[str] = None,
+    search_params: Optional[Dict[str, int]] = None,
+    quantization: Optional[str] = None,
+    exact_vectors_path: Optional[str] = None,
 ) -> FAISS:
     """
     Crée un vector store FAISS à partir des documents.
 
+    Si le modèle expose iter_embed_documents (ex: E5Embeddings), les vecteurs
+    sont ajoutés à l'index tranche par tranche (mémoire bornée); à défaut,
+    s'il expose embed_documents_array, la matrice float32 est ajoutée en une
+    fois. Dans les deux cas, il n'y a pas de conversion intermédiaire en
+    listes Python. Sinon, la construction est déléguée à LangChain.
+
     Args:
         documents: Liste de documents LangChain à vectoriser
         embeddings: Modèle d'embeddings à utiliser
         verbose: Si True, affiche des informations de progression
+        pca_dim: Dimension après réduction PCA (pas de réduction si None)
+        recall_evaluator: Calcul du top-k exact en pleine dimension, alimenté
+            pendant la construction (voir reduction.RecallEvaluator)
+        index_factory: Description FAISS de l'index (ex: "IVF1024,Flat",
+            "HNSW32"); index exact IndexFlatL2 si None
+        search_params: Paramètres de recherche de l'index (nprobe, efSearch)
+        quantization: Encodage des vecteurs stockés ("fp16", "sq8", "sq4",
+            "opq<M>"), voir vectors.quantization
+        exact_vectors_path: Fichier .npy où conserver les vecteurs exacts
+            (reclassement, voir quantization.ExactRescorer)
 
     Returns:
         FAISS: Instance du vector store créé
@@ -44,8 +88,39 @@ def create_vector_store(
         logger.info(f"Création du vector store pour {len(documents)} documents...")
         logger.info("Génération des embeddings (cela peut prendre du temps)...")
 
-    # Créer le vector store FAISS
-    vector_store = FAISS.from_documents(documents=documents, embedding=embeddings)
+    # Recherche sur la classe: un mock ou un modèle LangChain générique
+    # n'expose pas ces méthodes
+    texts = [doc.page_content for doc in documents]
+    if getattr(type(embeddings), "iter_embed_documents", None) is not None:
+        batches = embeddings.iter_embed_documents(texts)
+    elif getattr(type(embeddings), "embed_documents_array", None) is not None:
+        batches = [(0, embeddings.embed_documents_array(texts))]
+    elif (
+        pca_dim
+        or index_factory
+        or quantization
+        or exact_vectors_path
+        or recall_evaluator is not None
+    ):
+        batches = [(0, np.asarray(embeddings.embed_documents(texts), dtype=np.float32))]
+    else:
+        batches = None
+
+    if batches is not None:
+        vector_store = create_vector_store_from_batches(
+            documents,
+            batches,
+            embeddings,
+            pca_dim=pca_dim,
+            recall_evaluator=recall_evaluator,
+            index_factory=index_factory,
+            search_params=search_params,
+            quantization=quantization,
+            exact_vectors_path=exact_vectors_path,
+        )
+    else:
+        # Créer le vector store FAISS
+        vector_store = FAISS.from_documents(documents=documents, embedding=embeddings)
 
     if verbose:
         logger.info(f"✓ Vector store créé avec {len(documents)} vecteurs")
@@ -53,8 +128,143 @@ def create_vector_store(
     return vector_store
 
 
+def create_vector_store_from_batches(
+    documents: List[Document],
+    batches: Iterable[Tuple[int, np.ndarray]],
+    embeddings: Embeddings,
+    pca_dim: Optional[int] = None,
+    recall_evaluator: Optional[RecallEvaluator] = None,
+    index_factory: Optional[str] = None,
+    search_params: Optional[Dict[str, int]] = None,
+    quantization: Optional[str] = None,
+    exact_vectors_path: Optional[str] = None,
+) -> FAISS:
+    """
+    Crée un vector store FAISS à partir de tranches de vecteurs déjà calculés.
+
+    Produit le même index que FAISS.from_documents (IndexFlatL2, docstore en
+    mémoire), éventuellement précédé d'une PCA, mais chaque tranche est
+    transmise telle quelle à FAISS: seule la tranche courante est en mémoire
+    en plus de l'index.
+
+    Avec index_factory, l'index (IVF, HNSW, PQ...) est entraîné sur les
+    premières tranches (voir index_factory.training_sample_size), qui sont
+    ensuite ajoutées comme les suivantes. quantization est un raccourci pour
+    les index plats quantifiés (ex: "sq8" → "SQ8").
+
+    Args:
+        documents: Documents LangChain, dans l'ordre des vecteurs
+        batches: Tranches (position du premier document, matrice
+            [taille, dimension]), contiguës et dans l'ordre
+        embeddings: Modèle d'embeddings (utilisé pour encoder les requêtes)
+        pca_dim: Dimension après réduction PCA. La PCA est apprise sur les
+            premières tranches (au plus PCA_TRAINING_SAMPLES vecteurs)
+        recall_evaluator: Reçoit chaque tranche en pleine dimension
+        index_factory: Description FAISS de l'index (IndexFlatL2 si None)
+        search_params: Paramètres de recherche (nprobe, efSearch), par défaut
+            DEFAULT_NPROBE et DEFAULT_EF_SEARCH
+        quantization: Encodage des vecteurs stockés (exclusif avec index_factory)
+        exact_vectors_path: Fichier .npy recevant les vecteurs pleine dimension
+
+    Returns:
+        FAISS: Instance du vector store créé
+
+    Raises:
+        ValueError: Si les tranches ne couvrent pas exactement les documents,
+            si elles ne suffisent pas à entraîner l'index, ou si quantization
+            et index_factory sont tous deux fournis
+    """
+    if quantization:
+        if index_factory:
+            raise ValueError(
+                "quantization et index_factory sont exclusifs: décrire l'encodage "
+                "dans index_factory (ex: IVF1024,SQ8)"
+            )
+        index_factory = quantization_factory(quantization)
+
+    batches = iter(batches)
+    index = None
+    exact_writer = (
+        ExactVectorWriter(exact_vectors_path, len(documents))
+        if exact_vectors_path
+        else None
+    )
+
+    # PCA / index_factory: mettre de côté les premières tranches pour l'apprentissage
+    pending = []
+    if pca_dim or index_factory:
+        num_samples = PCA_TRAINING_SAMPLES
+        num_pending = 0
+        for offset, vectors in batches:
+            if index_factory and index is None:
+                index = create_factory_index(vectors.shape[1], index_factory, pca_dim)
+                num_samples = training_sample_size(index)
+            pending.append((offset, vectors))
+            num_pending += len(vectors)
+            if num_pending >= num_samples:
+                break
+        if pending:
+            training = np.vstack([vectors for _, vectors in pending])[:num_samples]
+            if index is None:
+                index = build_pca_index(training, pca_dim)
+            else:
+                check_training_sample(index, len(training))
+                index.train(np.ascontiguousarray(training, dtype=np.float32))
+                set_search_params(
+                    index,
+                    {
+                        "nprobe": DEFAULT_NPROBE,
+                        "efSearch": DEFAULT_EF_SEARCH,
+                        **(search_params or {}),
+                    },
+                )
+
+    for offset, vectors in itertools.chain(pending, batches):
+        if index is None:
+            index = faiss.IndexFlatL2(vectors.shape[1])
+        if offset != index.ntotal:
+            raise ValueError(
+                f"Tranche de vecteurs inattendue à la position {offset} "
+                f"(attendue: {index.ntotal})"
+            )
+        # FAISS attend une matrice float32 C-contiguë (aucune copie si c'est déjà le cas)
+        index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+        if recall_evaluator is not None:
+            recall_evaluator.observe(vectors)
+        if exact_writer is not None:
+            exact_writer.observe(vectors)
+
+    if exact_writer is not None:
+        exact_writer.close()
+
+    num_vectors = index.ntotal if index is not None else 0
+    if num_vectors != len(documents):
+        raise ValueError(
+            f"Nombre de vecteurs ({num_vectors}) différent du nombre "
+            f"de documents ({len(documents)})"
+        )
+
+    ids = [doc.id or str(uuid.uuid4()) for doc in documents]
+    docstore = InMemoryDocstore(
+        {
+            id_: Document(id=id_, page_content=doc.page_content, metadata=doc.metadata)
+            for id_, doc in zip(ids, documents)
+        }
+    )
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
+
 def save_vector_store(
-    vector_store: FAISS, save_path: str, verbose: bool = False
+    vector_store: FAISS,
+    save_path: str,
+    verbose: bool = False,
+    docstore_backend: str = "pickle",
 ) -> None:
     """
     Sauvegarde le vector store FAISS sur le disque.
@@ -63,29 +273,64 @@ def save_vector_store(
         vector_store: Instance du vector store FAISS
         save_path: Chemin du répertoire de sauvegarde
         verbose: Si True, affiche des informations de progression
+        docstore_backend: "pickle" (index.pkl de LangChain) ou "sqlite"
+            (docstore.sqlite compact, lu à la demande, voir vectors.docstore)
+
+    Raises:
+        ValueError: Si le backend du docstore est inconnu
     """
+    if docstore_backend not in ("pickle", "sqlite"):
+        raise ValueError(f"Backend de docstore inconnu: {docstore_backend}")
+
     # Créer le répertoire s'il n'existe pas
     Path(save_path).mkdir(parents=True, exist_ok=True)
 
     if verbose:
         logger.info(f"Sauvegarde du vector store dans: {save_path}")
 
-    vector_store.save_local(save_path)
+    if docstore_backend == "sqlite":
+        faiss.write_index(vector_store.index, str(Path(save_path) / "index.faiss"))
+        save_docstore(
+            vector_store.docstore, vector_store.index_to_docstore_id, save_path
+        )
+    else:
+        vector_store.save_local(save_path)
+        # Un docstore SQLite d'une sauvegarde précédente serait lu à la place de index.pkl
+        (Path(save_path) / DOCSTORE_FILENAME).unlink(missing_ok=True)
+    # Type d'index et paramètres de recherche (nprobe, efSearch), relus au chargement
+    if isinstance(vector_store.index, faiss.Index):
+        save_index_params(vector_store.index, save_path)
 
     if verbose:
         logger.info("✓ Vector store sauvegardé avec succès")
 
 
 def load_vector_store(
-    load_path: str, embeddings: Embeddings, verbose: bool = False
+    load_path: str,
+    embeddings: Embeddings,
+    verbose: bool = False,
+    search_params: Optional[Dict[str, int]] = None,
+    mmap: bool = False,
 ) -> FAISS:
     """
     Charge un vector store FAISS depuis le disque.
 
+    Les paramètres de recherche enregistrés à la construction (nprobe,
+    efSearch) sont réappliqués, puis remplacés par search_params s'il est fourni.
+
+    Avec mmap, l'index est mappé en mémoire en lecture seule au lieu d'être
+    copié dans la mémoire du processus: les pages sont partagées entre les
+    workers via le cache du système. L'index ne peut alors plus être modifié.
+
+    Si le répertoire contient un docstore SQLite (docstore.sqlite), il est
+    utilisé à la place de index.pkl: aucun document n'est lu au chargement.
+
     Args:
         load_path: Chemin du répertoire contenant le vector store
         embeddings: Modèle d'embeddings (doit être le même que lors de la création)
         verbose: Si True, affiche des informations de progression
+        search_params: Paramètres de recherche prioritaires (ex: FAISS_NPROBE)
+        mmap: Si True, mappe l'index en mémoire (voir read_index_mmap)
 
     Returns:
         FAISS: Instance du vector store chargé
@@ -99,16 +344,82 @@ def load_vector_store(
     if verbose:
         logger.info(f"Chargement du vector store depuis: {load_path}")
 
-    vector_store = FAISS.load_local(
-        load_path, embeddings, allow_dangerous_deserialization=True
-    )
+    docstore = load_docstore(load_path)
+    if docstore is not None:
+        index_path = str(Path(load_path) / "index.faiss")
+        vector_store = FAISS(
+            embedding_function=embeddings,
+            index=read_index_mmap(index_path) if mmap else faiss.read_index(index_path),
+            docstore=docstore,
+            index_to_docstore_id=PositionMapping(docstore),
+        )
+    elif mmap:
+        vector_store = _load_local_mmap(load_path, embeddings)
+    else:
+        vector_store = FAISS.load_local(
+            load_path, embeddings, allow_dangerous_deserialization=True
+        )
+
+    index_params = load_index_params(load_path) or {}
+    params = {**index_params.get("search_params", {}), **(search_params or {})}
+    if params:
+        params = set_search_params(vector_store.index, params)
 
     if verbose:
         logger.info("✓ Vector store chargé avec succès")
+        if params:
+            logger.info(f"  Paramètres de recherche: {params}")
 
     return vector_store
 
 
+def read_index_mmap(index_path: str) -> faiss.Index:
+    """
+    Lit un index FAISS en mappant ses données en mémoire (lecture seule).
+
+    Les listes inversées des index IVF et, si la version de FAISS le permet
+    (IO_FLAG_MMAP_IFC), les codes des index plats (Flat, SQ, PQ) sont lus
+    directement dans le fichier. Pour les autres types d'index (ex: HNSW),
+    FAISS lit le fichier normalement.
+
+    Args:
+        index_path: Fichier de l'index (index.faiss)
+
+    Returns:
+        faiss.Index: Index chargé
+    """
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    try:
+        return faiss.read_index(index_path, flags)
+    except RuntimeError as e:
+        logger.warning(f"⚠️  Index non mappable en mémoire ({e}): lecture complète")
+        return faiss.read_index(index_path)
+
+
+def _load_local_mmap(load_path: str, embeddings: Embeddings) -> FAISS:
+    """
+    Équivalent de FAISS.load_local avec un index mappé en mémoire.
+
+    Args:
+        load_path: Répertoire du vector store (index.faiss, index.pkl)
+        embeddings: Modèle d'embeddings
+
+    Returns:
+        FAISS: Instance du vector store chargé
+    """
+    path = Path(load_path)
+    index = read_index_mmap(str(path / "index.faiss"))
+    with open(path / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+
+
 def search_similar_documents(
     vector_store: FAISS, query: str, k: int = 5, verbose: bool = False
 ) -> List[Tuple[Document, float]]:
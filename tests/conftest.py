@@ -9,6 +9,9 @@ import sys
 import logging
 from pathlib import Path
 
+import pytest
+from langchain_core.embeddings import Embeddings
+
 # Ajouter le répertoire src/ au PYTHONPATH
 tests_dir = Path(__file__).parent
 project_root = tests_dir.parent
@@ -18,3 +21,48 @@ sys.path.insert(0, str(src_dir))
 
 # Configuration du logging pour conftest
 logger = logging.getLogger(__name__)
+
+
+class TableEmbeddings(Embeddings):
+    """Modèle factice: chaque texte "doc-i ..." correspond à la ligne i d'une matrice."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return [self.embed_query(t) for t in texts]
+
+    def embed_query(self, text):
+        return self.vectors[int(text.split()[0].split("-")[1])].tolist()
+
+
+def vector_batches(vectors, size):
+    """Découpe une matrice en tranches (position, vecteurs) comme iter_embed_documents."""
+    return [(i, vectors[i : i + size]) for i in range(0, len(vectors), size)]
+
+
+@pytest.fixture
+def tiny_model_dir(tmp_path):
+    """Sauvegarde un petit modèle BERT aléatoire et son tokenizer sur disque."""
+    import torch
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=64,
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+    )
+    words = ["passage", "query", ":", "concert", "de", "jazz", "a", "toulouse", "expo"]
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text(
+        "\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words),
+        encoding="utf-8",
+    )
+
+    model_dir = tmp_path / "tiny"
+    BertModel(config).save_pretrained(model_dir)
+    BertTokenizerFast(vocab_file=str(vocab_file)).save_pretrained(model_dir)
+    return str(model_dir)
@@ -132,6 +132,19 @@ def test_health_endpoint_healthy(client):
     assert data["embeddings_model_loaded"] is True
 
 
+@pytest.mark.unit
+def test_health_endpoint_model_load_metrics(client):
+    """Teste l'exposition des métriques de chargement du modèle dans /health."""
+    import api.main
+
+    metrics = {"model": {"seconds": 1.5, "rss_mb": 2100.0, "rss_delta_mb": 30.0}}
+    with patch.object(api.main.embeddings_model, "load_metrics", metrics, create=True):
+        response = client.get("/health")
+
+    assert response.status_code == 200
+    assert response.json()["model_load_metrics"] == metrics
+
+
 @pytest.mark.unit
 def test_stats_endpoint(client):
     """Teste l'endpoint GET /stats."""
@@ -148,6 +161,44 @@ def test_stats_endpoint(client):
         assert data["num_vectors"] == 1000
         assert data["dimension"] == 1024
         assert "index_path" in data
+        # Le mock du modèle n'a pas de cache de requêtes réel
+        assert data["query_cache"] is None
+
+
+@pytest.mark.unit
+def test_stats_endpoint_with_query_cache(client):
+    """Teste l'exposition des statistiques du cache de requêtes dans /stats."""
+    from embeddings.cache import QueryEmbeddingCache
+    import api.main
+
+    query_cache = QueryEmbeddingCache(capacity=16)
+    query_cache.put("concert", [0.1])
+    query_cache.get("concert")
+    query_cache.get("expo")
+
+    with patch.object(api.main.embeddings_model, "query_cache", query_cache, create=True), \
+         patch("api.main.get_vector_store_stats", return_value={"num_vectors": 10, "dimension": 1024}):
+        response = client.get("/stats")
+
+    assert response.status_code == 200
+    stats = response.json()["query_cache"]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["capacity"] == 16
+
+
+@pytest.mark.unit
+def test_stats_endpoint_index_load_metrics(client):
+    """Teste l'exposition des métriques de chargement de l'index dans /stats."""
+    with patch("api.main.get_vector_store_stats", return_value={"num_vectors": 10, "dimension": 1024}):
+        response = client.get("/stats")
+
+    assert response.status_code == 200
+    metrics = response.json()["index_load_metrics"]
+    assert metrics["mmap"] is False
+    assert metrics["seconds"] >= 0
+    assert metrics["rss_mb"] > 0
 
 
 # ============================================================================
@@ -179,6 +230,149 @@ def test_search_endpoint_success(client):
     assert "metadata" in result
 
 
+@pytest.mark.unit
+def test_search_endpoint_with_filters(client, mock_vector_store):
+    """Teste la transmission des filtres de métadonnées à la recherche filtrée."""
+    import api.main
+
+    searcher = Mock()
+    searcher.search.return_value = mock_vector_store.similarity_search_with_score()
+    payload = {
+        "query": "concert de jazz",
+        "k": 3,
+        "filters": {"city": ["Toulouse"], "keywords": []},
+    }
+
+    with patch.object(api.main, "filtered_searcher", searcher):
+        response = client.post("/search", json=payload)
+
+    assert response.status_code == 200
+    assert response.json()["total_results"] == 1
+    _, k, filters = searcher.search.call_args.args
+    assert k == 3
+    assert filters == {"city": ["Toulouse"]}
+
+
+@pytest.mark.unit
+def test_search_endpoint_filters_unavailable(client):
+    """Teste le refus des filtres sans index des métadonnées."""
+    import api.main
+
+    with patch.object(api.main, "filtered_searcher", None):
+        response = client.post(
+            "/search", json={"query": "concert", "filters": {"city": ["Toulouse"]}}
+        )
+
+    assert response.status_code == 503
+
+
+@pytest.mark.unit
+def test_search_endpoint_with_date_filters(client, mock_vector_store):
+    """Teste la conversion de date_from / date_to en fenêtre de timestamps."""
+    import api.main
+
+    searcher = Mock()
+    searcher.search.return_value = mock_vector_store.similarity_search_with_score()
+    payload = {
+        "query": "feu d'artifice",
+        "filters": {"date_from": "2025-07-14", "date_to": "2025-07-14"},
+    }
+
+    with patch.object(api.main, "filtered_searcher", searcher):
+        response = client.post("/search", json=payload)
+        inverted = client.post(
+            "/search",
+            json={"query": "feu", "filters": {"date_from": "2025-07-15", "date_to": "2025-07-14"}},
+        )
+
+    assert response.status_code == 200
+    _, _, filters = searcher.search.call_args.args
+    assert filters == {}
+    # 14 juillet à Paris: 13 juillet 22:00 UTC → 14 juillet 21:59:59 UTC
+    assert searcher.search.call_args.kwargs["date_range"] == (1752444000, 1752530399)
+    assert inverted.status_code == 400
+
+
+@pytest.mark.unit
+def test_events_on_endpoint(client, mock_vector_store):
+    """Teste la liste des événements d'une journée sans recherche sémantique."""
+    import api.main
+
+    document = mock_vector_store.similarity_search_with_score.return_value[0][0]
+    mock_vector_store.docstore.search.return_value = document
+    mock_vector_store.index_to_docstore_id = {4: "doc-4"}
+    searcher = Mock()
+    searcher.date_index.events.return_value = [4]
+
+    with patch.object(api.main, "filtered_searcher", searcher):
+        response = client.get("/events/on", params={"date": "2025-11-10", "limit": 10})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["day"] == "2025-11-10"
+    assert data["total_results"] == 1
+    assert data["events"][0]["event_id"] == "evt_123"
+    assert data["events"][0]["title"] == "Jazz Festival"
+    assert data["lookup_us"] >= 0
+    assert searcher.date_index.events.call_args.kwargs["limit"] == 10
+    mock_vector_store.docstore.search.assert_called_once_with("doc-4")
+
+
+@pytest.mark.unit
+def test_events_on_endpoint_unavailable(client):
+    """Teste le refus de /events/on sans index des dates."""
+    import api.main
+
+    with patch.object(api.main, "filtered_searcher", None):
+        response = client.get("/events/on", params={"date": "2025-11-10"})
+
+    assert response.status_code == 503
+
+
+@pytest.mark.unit
+def test_search_endpoint_with_microbatching(client, mock_vector_store):
+    """Teste que /search passe par le micro-batcher lorsqu'il est activé."""
+    import api.main
+
+    batcher = Mock()
+    batcher.embed_query = AsyncMock(return_value=[0.1, 0.2])
+    mock_vector_store.similarity_search_with_score_by_vector = Mock(
+        return_value=mock_vector_store.similarity_search_with_score.return_value
+    )
+
+    with patch.object(api.main, "query_batcher", batcher):
+        response = client.post("/search", json={"query": "concert de jazz", "k": 3})
+
+    assert response.status_code == 200
+    assert response.json()["total_results"] == 1
+    batcher.embed_query.assert_awaited_once_with("concert de jazz")
+    mock_vector_store.similarity_search_with_score_by_vector.assert_called_once_with(
+        [0.1, 0.2], k=3
+    )
+
+
+@pytest.mark.unit
+def test_search_endpoint_with_cascade(client, mock_vector_store, mock_embeddings_model):
+    """Teste que /search reclasse les candidats du petit modèle avec e5-large."""
+    import api.main
+
+    results = mock_vector_store.similarity_search_with_score.return_value
+    retriever = Mock()
+    retriever.retrieve.return_value = ([4, 2], [0.1, 0.3])
+    retriever.is_confident.return_value = False
+    retriever.rescore.return_value = results
+    mock_embeddings_model.embed_query = Mock(return_value=[0.1, 0.2])
+
+    with patch.object(api.main, "cascade_retriever", retriever):
+        response = client.post("/search", json={"query": "concert de jazz", "k": 3})
+
+    assert response.status_code == 200
+    assert response.json()["total_results"] == 1
+    retriever.retrieve.assert_called_once_with("concert de jazz")
+    retriever.rescore.assert_called_once_with([0.1, 0.2], [4, 2], 3)
+    mock_vector_store.similarity_search_with_score.assert_not_called()
+
+
 @pytest.mark.unit
 def test_search_endpoint_validation_error(client):
     """Teste l'endpoint /search avec des données invalides."""
@@ -7,6 +7,7 @@ Ce module teste la génération d'embeddings avec multilingual-e5-large.
 import os
 from unittest.mock import patch, MagicMock
 
+import numpy as np
 import pytest
 import torch
 
@@ -336,3 +337,475 @@ def test_batch_processing(mock_environment):
         # Vérifier le nombre d'appels (ceil(5/2) = 3)
         assert call_count == 3
         assert len(result) == 5
+
+
+def _build_length_aware_mocks(mock_tokenizer_class, mock_model_class, padded_batches):
+    """
+    Configure un tokenizer et un modèle factices sensibles à la longueur.
+
+    Chaque mot devient un token dont l'identifiant est la longueur du texte:
+    l'embedding obtenu identifie donc le texte d'origine, quel que soit le batch.
+    """
+    mock_tokenizer = MagicMock()
+    mock_tokenizer_class.from_pretrained.return_value = mock_tokenizer
+
+    def tokenizer_side_effect(texts, **kwargs):
+        ids = [[len(text)] * len(text.split()) for text in texts]
+        if not kwargs.get("padding"):
+            return {"input_ids": ids}
+
+        padded_batches.append(list(texts))
+        width = max(len(row) for row in ids)
+        return {
+            "input_ids": torch.tensor([row + [0] * (width - len(row)) for row in ids]),
+            "attention_mask": torch.tensor(
+                [[1] * len(row) + [0] * (width - len(row)) for row in ids]
+            ),
+        }
+
+    mock_tokenizer.side_effect = tokenizer_side_effect
+
+    mock_model = MagicMock()
+    mock_model_class.from_pretrained.return_value = mock_model
+
+    def model_side_effect(**kwargs):
+        ids = kwargs["input_ids"].float()
+        mock_output = MagicMock()
+        mock_output.last_hidden_state = torch.stack([ids, torch.ones_like(ids)], dim=-1)
+        return mock_output
+
+    mock_model.side_effect = model_side_effect
+
+
+@pytest.mark.unit
+def test_sort_by_length_preserves_order(mock_environment):
+    """Teste que le regroupement par longueur ne change ni l'ordre ni les vecteurs."""
+    texts = [
+        "un deux trois quatre cinq six",
+        "court",
+        "moyen texte ici",
+        "a b",
+        "encore un texte assez long pour le test",
+    ]
+
+    with patch("embeddings.embeddings.AutoTokenizer") as mock_tokenizer_class, \
+         patch("embeddings.embeddings.AutoModel") as mock_model_class:
+
+        padded_batches = []
+        _build_length_aware_mocks(mock_tokenizer_class, mock_model_class, padded_batches)
+
+        from embeddings.embeddings import E5Embeddings
+
+        baseline = E5Embeddings(device="cpu", batch_size=2)
+        expected = baseline.embed_documents(texts)
+
+        padded_batches.clear()
+        bucketed = E5Embeddings(device="cpu", batch_size=2, sort_by_length=True)
+        result = bucketed.embed_documents(texts)
+
+    assert len(result) == len(texts)
+    for got, want in zip(result, expected):
+        assert got == pytest.approx(want)
+
+    # Les batchs sont formés par longueur croissante de tokens
+    batch_lengths = [[len(t.split()) for t in batch] for batch in padded_batches]
+    flat = [length for batch in batch_lengths for length in batch]
+    assert flat == sorted(flat)
+
+
+@pytest.mark.unit
+def test_get_embeddings_model_sort_by_length_from_env(mock_environment):
+    """Teste la lecture de EMBEDDINGS_SORT_BY_LENGTH par la factory."""
+    with patch.dict(os.environ, {"EMBEDDINGS_SORT_BY_LENGTH": "true"}), \
+         patch("embeddings.embeddings.E5Embeddings") as mock_e5:
+        from embeddings.embeddings import get_embeddings_model
+
+        get_embeddings_model()
+
+        assert mock_e5.call_args[1]["sort_by_length"] is True
+
+
+@pytest.mark.unit
+def test_max_tokens_per_batch_packs_by_budget(mock_environment):
+    """Teste la construction des batchs selon un budget de tokens."""
+    texts = ["a b", "c d", "e f", "un deux trois quatre cinq six", "g h"]
+
+    with patch("embeddings.embeddings.AutoTokenizer") as mock_tokenizer_class, \
+         patch("embeddings.embeddings.AutoModel") as mock_model_class:
+
+        padded_batches = []
+        _build_length_aware_mocks(mock_tokenizer_class, mock_model_class, padded_batches)
+
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu", batch_size=2, max_tokens_per_batch=9)
+        result = embeddings.embed_documents(texts)
+
+    # Avec le préfixe "passage: ", les textes courts font 3 tokens et le long 7:
+    # budget de 9 tokens => 3 textes courts, puis le texte long seul
+    assert [len(batch) for batch in padded_batches] == [3, 1, 1]
+    assert len(result) == len(texts)
+    for batch in padded_batches:
+        width = max(len(t.split()) for t in batch)
+        assert len(batch) == 1 or len(batch) * width <= 9
+
+
+@pytest.mark.unit
+def test_get_embeddings_model_max_tokens_from_env(mock_environment):
+    """Teste la lecture de EMBEDDINGS_MAX_TOKENS_PER_BATCH par la factory."""
+    with patch.dict(os.environ, {"EMBEDDINGS_MAX_TOKENS_PER_BATCH": "8192"}), \
+         patch("embeddings.embeddings.E5Embeddings") as mock_e5:
+        from embeddings.embeddings import get_embeddings_model
+
+        get_embeddings_model()
+
+        assert mock_e5.call_args[1]["max_tokens_per_batch"] == 8192
+
+
+@pytest.mark.unit
+def test_get_embeddings_model_env_prefix(mock_environment):
+    """Teste que le modèle de cascade n'hérite pas du backend du modèle principal."""
+    env_vars = {
+        "EMBEDDINGS_BACKEND": "onnx",
+        "EMBEDDINGS_ONNX_PATH": "data/onnx/e5-large",
+        "CASCADE_EMBEDDINGS_PRECISION": "int8",
+    }
+    with patch.dict(os.environ, env_vars), \
+         patch("embeddings.embeddings.E5Embeddings") as mock_e5:
+        from embeddings.embeddings import get_embeddings_model
+
+        get_embeddings_model(
+            model_id="intfloat/multilingual-e5-small", env_prefix="CASCADE_EMBEDDINGS_"
+        )
+
+        options = mock_e5.call_args[1]
+        assert "backend" not in options
+        assert "onnx_path" not in options
+        assert options["precision"] == "int8"
+
+
+@pytest.mark.unit
+def test_int8_precision_quantizes_linear_layers(mock_environment):
+    """Teste que la précision int8 applique la quantification dynamique."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel") as mock_model_class, \
+         patch("embeddings.embeddings.quantize_dynamic") as mock_quantize:
+
+        quantized_model = MagicMock()
+        mock_quantize.return_value = quantized_model
+
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cuda", precision="int8")
+
+        mock_quantize.assert_called_once()
+        assert mock_quantize.call_args[0][0] is mock_model_class.from_pretrained.return_value
+        assert embeddings.model is quantized_model
+        # La quantification dynamique force l'exécution sur CPU
+        assert embeddings.device == "cpu"
+
+
+@pytest.mark.unit
+def test_unknown_precision_raises(mock_environment):
+    """Teste le rejet d'une précision inconnue."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        with pytest.raises(ValueError, match="Précision d'embeddings inconnue"):
+            E5Embeddings(device="cpu", precision="fp8")
+
+
+@pytest.mark.unit
+def test_bf16_precision_loads_bfloat16_weights(mock_environment):
+    """Teste le chargement en bfloat16 lorsque le device le supporte."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel") as mock_model_class, \
+         patch("embeddings.embeddings.is_bf16_supported", return_value=True):
+
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu", precision="bf16")
+
+        assert embeddings.precision == "bf16"
+        call_kwargs = mock_model_class.from_pretrained.call_args[1]
+        assert call_kwargs["dtype"] == torch.bfloat16
+
+
+@pytest.mark.unit
+def test_bf16_precision_falls_back_to_fp32(mock_environment):
+    """Teste le repli en fp32 si le bfloat16 n'est pas supporté."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel") as mock_model_class, \
+         patch("embeddings.embeddings.is_bf16_supported", return_value=False):
+
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu", precision="bf16")
+
+        assert embeddings.precision == "fp32"
+        assert "dtype" not in mock_model_class.from_pretrained.call_args[1]
+
+
+@pytest.mark.unit
+def test_bf16_pooling_and_normalization_in_fp32(mock_environment):
+    """Teste que les embeddings bf16 sont retournés en float32 et normalisés."""
+    with patch("embeddings.embeddings.AutoTokenizer") as mock_tokenizer_class, \
+         patch("embeddings.embeddings.AutoModel") as mock_model_class, \
+         patch("embeddings.embeddings.is_bf16_supported", return_value=True):
+
+        mock_tokenizer = MagicMock()
+        mock_tokenizer_class.from_pretrained.return_value = mock_tokenizer
+        mock_tokenizer.return_value = {
+            "input_ids": torch.tensor([[1, 2, 3]]),
+            "attention_mask": torch.tensor([[1, 1, 1]]),
+        }
+
+        mock_model = MagicMock()
+        mock_model_class.from_pretrained.return_value = mock_model
+        mock_output = MagicMock()
+        mock_output.last_hidden_state = torch.randn(1, 3, 1024).to(torch.bfloat16)
+        mock_model.return_value = mock_output
+
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu", precision="bf16")
+        result = embeddings._embed_texts(["Concert"], prefix="query: ")
+
+    assert result.dtype == np.float32
+    assert np.linalg.norm(result[0]) == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.unit
+def test_iter_embed_documents_yields_offsets(mock_environment):
+    """Teste que le générateur produit des tranches contiguës avec leur position."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu")
+
+    def fake_embed(texts, prefix="passage: "):
+        return np.array([[float(t)] for t in texts], dtype=np.float64)
+
+    texts = [str(i) for i in range(5)]
+    with patch.object(embeddings, "_embed_texts_cached", side_effect=fake_embed):
+        chunks = list(embeddings.iter_embed_documents(texts, chunk_size=2))
+
+    assert [offset for offset, _ in chunks] == [0, 2, 4]
+    assert all(chunk.dtype == np.float32 for _, chunk in chunks)
+    assert np.vstack([chunk for _, chunk in chunks]).ravel().tolist() == [0, 1, 2, 3, 4]
+
+
+def _build_fake_pipeline(embeddings):
+    """Remplace tokenisation et forward par des fonctions traçables."""
+    calls = []
+
+    def tokenize(batch_texts):
+        calls.append(("tokenize", len(batch_texts)))
+        return {"lengths": [len(t) for t in batch_texts]}
+
+    def forward(batch_dict):
+        calls.append(("forward", len(batch_dict["lengths"])))
+        return np.array([[float(n)] for n in batch_dict["lengths"]], dtype=np.float32)
+
+    embeddings._tokenize_batch = tokenize
+    embeddings._forward_batch = forward
+    return calls
+
+
+@pytest.mark.unit
+def test_pipelined_tokenization_matches_sequential(mock_environment):
+    """Teste que la tokenisation en thread produit les mêmes embeddings, dans l'ordre."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        sequential = E5Embeddings(device="cpu", batch_size=2)
+        pipelined = E5Embeddings(device="cpu", batch_size=2, pipelined_tokenization=True)
+
+    _build_fake_pipeline(sequential)
+    calls = _build_fake_pipeline(pipelined)
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    expected = sequential._embed_texts(texts, prefix="")
+    actual = pipelined._embed_texts(texts, prefix="")
+
+    np.testing.assert_array_equal(actual, expected)
+    assert [c for c in calls if c[0] == "forward"] == [("forward", 2), ("forward", 2), ("forward", 1)]
+
+
+@pytest.mark.unit
+def test_pipelined_tokenization_propagates_errors(mock_environment):
+    """Teste qu'une erreur du tokenizer est levée dans le thread principal."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu", batch_size=1, pipelined_tokenization=True)
+
+    _build_fake_pipeline(embeddings)
+
+    def failing_tokenize(batch_texts):
+        raise RuntimeError("tokenizer hors service")
+
+    embeddings._tokenize_batch = failing_tokenize
+
+    with pytest.raises(RuntimeError, match="tokenizer hors service"):
+        embeddings._embed_texts(["a", "b", "c"])
+
+
+@pytest.mark.unit
+def test_query_fast_path_matches_batch_path(tiny_model_dir):
+    """Teste que le chemin rapide des requêtes donne les embeddings du chemin générique."""
+    from embeddings.embeddings import E5Embeddings
+
+    embeddings = E5Embeddings(model_id=tiny_model_dir, device="cpu")
+    buffered = E5Embeddings(model_id=tiny_model_dir, device="cpu", query_buffer=True)
+    query = "concert de jazz a toulouse"
+
+    expected = embeddings._encode_batch([f"query: {query}"])[0]
+
+    np.testing.assert_allclose(embeddings.embed_query(query), expected, atol=1e-5)
+    np.testing.assert_allclose(buffered.embed_query(query), expected, atol=1e-5)
+    np.testing.assert_allclose(
+        buffered.embed_queries([query, "expo"])[0], expected, atol=1e-5
+    )
+
+
+@pytest.mark.unit
+def test_query_fast_path_truncates_to_query_max_length(mock_environment):
+    """Teste que les requêtes sont tokenisées avec leur propre longueur maximale."""
+    with patch("embeddings.embeddings.AutoTokenizer") as mock_tokenizer_class, \
+         patch("embeddings.embeddings.AutoModel") as mock_model_class:
+
+        mock_tokenizer = MagicMock()
+        mock_tokenizer_class.from_pretrained.return_value = mock_tokenizer
+        mock_tokenizer.return_value = {
+            "input_ids": torch.tensor([[1, 2, 3]]),
+            "attention_mask": torch.tensor([[1, 1, 1]]),
+        }
+        mock_model = MagicMock()
+        mock_model_class.from_pretrained.return_value = mock_model
+        mock_output = MagicMock()
+        mock_output.last_hidden_state = torch.randn(1, 3, 1024)
+        mock_model.return_value = mock_output
+
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu", query_max_length=32)
+        embeddings.embed_query("concert")
+
+    assert mock_tokenizer.call_args[0][0] == ["query: concert"]
+    assert mock_tokenizer.call_args[1]["max_length"] == 32
+    assert "padding" not in mock_tokenizer.call_args[1]
+
+
+@pytest.mark.unit
+def test_query_max_length_defaults_to_max_length(mock_environment):
+    """Teste que les requêtes ne sont pas tronquées plus que les documents par défaut."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        assert E5Embeddings(device="cpu", max_length=256).query_max_length == 256
+        assert E5Embeddings(device="cpu", query_max_length=64).query_max_length == 64
+
+
+@pytest.mark.unit
+def test_query_lock_only_with_query_buffer(mock_environment):
+    """Teste que les requêtes concurrentes ne sont sérialisées qu'avec les tenseurs préalloués."""
+    with patch("embeddings.embeddings.AutoTokenizer") as mock_tokenizer_class, \
+         patch("embeddings.embeddings.AutoModel") as mock_model_class:
+
+        mock_tokenizer = MagicMock()
+        mock_tokenizer_class.from_pretrained.return_value = mock_tokenizer
+        mock_tokenizer.return_value = {
+            "input_ids": torch.tensor([[1, 2, 3]]),
+            "attention_mask": torch.tensor([[1, 1, 1]]),
+        }
+        mock_output = MagicMock()
+        mock_output.last_hidden_state = torch.randn(1, 3, 1024)
+        mock_model_class.from_pretrained.return_value.return_value = mock_output
+
+        from embeddings.embeddings import E5Embeddings
+
+        unbuffered = E5Embeddings(device="cpu")
+        buffered = E5Embeddings(device="cpu", query_buffer=True)
+
+    for embeddings, locked in ((unbuffered, False), (buffered, True)):
+        embeddings._query_lock = MagicMock()
+        embeddings.embed_query("concert")
+        assert embeddings._query_lock.__enter__.called is locked
+
+
+@pytest.mark.unit
+def test_duplicate_documents_are_embedded_once(mock_environment):
+    """Teste que les textes identiques ne sont encodés qu'une fois puis recopiés."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu")
+
+    calls = []
+
+    def fake_embed(texts, prefix="passage: "):
+        calls.append(list(texts))
+        return np.array([[float(len(t))] for t in texts], dtype=np.float32)
+
+    with patch.object(embeddings, "_embed_texts_cached", side_effect=fake_embed):
+        result = embeddings.embed_documents_array(["aa", "b", "aa", "ccc", "b"])
+
+    assert calls == [["aa", "b", "ccc"]]
+    assert result.ravel().tolist() == [2, 1, 2, 3, 1]
+    assert result.flags["C_CONTIGUOUS"]
+    assert embeddings.dedup_stats() == {
+        "texts": 5,
+        "embedded": 3,
+        "duplicates": 2,
+        "dedup_ratio": pytest.approx(0.4),
+    }
+
+
+@pytest.mark.unit
+def test_embed_documents_array_empty(mock_environment):
+    """Teste qu'une liste vide retourne une matrice vide sans appeler le modèle."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu")
+
+    with patch("embeddings.embeddings.AutoConfig") as mock_config, \
+         patch.object(embeddings, "_embed_texts_cached") as mock_embed:
+        mock_config.from_pretrained.return_value = MagicMock(hidden_size=1024)
+        result = embeddings.embed_documents_array([])
+
+    assert result.shape == (0, 1024)
+    assert result.dtype == np.float32
+    mock_embed.assert_not_called()
+
+
+@pytest.mark.unit
+def test_iter_embed_documents_reuses_vectors_across_chunks(mock_environment):
+    """Teste qu'un texte encodé dans une tranche n'est pas ré-encodé dans les suivantes."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu")
+
+    calls = []
+
+    def fake_embed(texts, prefix="passage: "):
+        calls.append(list(texts))
+        return np.array([[float(len(t))] for t in texts], dtype=np.float32)
+
+    texts = ["aa", "b", "ccc", "aa", "aa", "b"]
+    with patch.object(embeddings, "_embed_texts_cached", side_effect=fake_embed):
+        chunks = list(embeddings.iter_embed_documents(texts, chunk_size=2))
+
+    assert calls == [["aa", "b"], ["ccc"]]
+    assert np.vstack([c for _, c in chunks]).ravel().tolist() == [2, 1, 3, 2, 2, 1]
+    assert embeddings.dedup_stats()["embedded"] == 3
@@ -0,0 +1,120 @@
+"""
+Tests unitaires pour l'autotuning des embeddings (autotune.py).
+"""
+
+import os
+import platform
+from unittest.mock import patch
+
+import pytest
+import torch
+
+from embeddings.autotune import autotune, load_profile, save_profile
+
+
+@pytest.fixture
+def profile_path(tmp_path):
+    """Profil d'autotuning temporaire référencé par EMBEDDINGS_PROFILE_PATH."""
+    path = tmp_path / "profile.json"
+    with patch.dict(os.environ, {"EMBEDDINGS_PROFILE_PATH": str(path)}):
+        yield path
+
+
+@pytest.mark.unit
+def test_autotune_evaluates_grid_and_restores_settings(tiny_model_dir):
+    """Teste la grille évaluée, le choix du meilleur et la restauration de l'instance."""
+    from embeddings.embeddings import E5Embeddings
+
+    embeddings = E5Embeddings(model_id=tiny_model_dir, device="cpu", batch_size=3)
+    threads_before = torch.get_num_threads()
+    texts = [f"concert de jazz {'a toulouse ' * (i % 5)}" for i in range(16)]
+
+    profile = autotune(embeddings, texts, batch_sizes=(2, 8), thread_counts=(1,))
+
+    assert len(profile["results"]) == 4
+    best = max(profile["results"], key=lambda r: r["texts_per_second"])
+    assert profile["best"] == {
+        "batch_size": best["batch_size"],
+        "num_threads": 1,
+        "sort_by_length": best["sort_by_length"],
+    }
+    assert profile["model_id"] == tiny_model_dir
+    assert embeddings.batch_size == 3
+    assert embeddings.sort_by_length is False
+    assert torch.get_num_threads() == threads_before
+
+
+@pytest.mark.unit
+def test_get_embeddings_model_applies_profile(profile_path):
+    """Teste que la factory applique le profil, sous les variables d'environnement."""
+    save_profile(
+        {
+            "model_id": "intfloat/multilingual-e5-large",
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            "best": {"batch_size": 16, "num_threads": 4, "sort_by_length": True},
+        },
+        profile_path,
+    )
+    assert load_profile()["best"]["batch_size"] == 16
+
+    with patch.dict(os.environ, {"EMBEDDINGS_SORT_BY_LENGTH": "false"}), \
+         patch("embeddings.embeddings.E5Embeddings") as mock_e5:
+        from embeddings.embeddings import get_embeddings_model
+
+        get_embeddings_model(model_id="intfloat/multilingual-e5-large", use_profile=True)
+        kwargs = mock_e5.call_args.kwargs
+        assert kwargs["batch_size"] == 16
+        assert kwargs["num_threads"] == 4
+        assert kwargs["sort_by_length"] is False
+
+        get_embeddings_model(
+            model_id="intfloat/multilingual-e5-large", batch_size=64, use_profile=True
+        )
+        assert mock_e5.call_args.kwargs["batch_size"] == 64
+
+        # Sans use_profile (API, cascade): profil ignoré
+        get_embeddings_model(model_id="intfloat/multilingual-e5-large")
+        assert mock_e5.call_args.kwargs["batch_size"] == 32
+        assert "num_threads" not in mock_e5.call_args.kwargs
+
+
+@pytest.mark.unit
+def test_profile_for_another_model_is_ignored(profile_path):
+    """Teste qu'un profil mesuré pour un autre modèle n'est pas appliqué."""
+    save_profile(
+        {
+            "model_id": "autre-modele",
+            "host": platform.node(),
+            "cpu_count": os.cpu_count(),
+            "best": {"batch_size": 8},
+        },
+        profile_path,
+    )
+
+    with patch("embeddings.embeddings.E5Embeddings") as mock_e5:
+        from embeddings.embeddings import get_embeddings_model
+
+        get_embeddings_model(model_id="intfloat/multilingual-e5-large", use_profile=True)
+
+    mock_e5.assert_called_once_with(
+        model_id="intfloat/multilingual-e5-large", device=None, batch_size=32
+    )
+
+
+@pytest.mark.unit
+def test_profile_from_another_machine_is_ignored():
+    """Teste qu'un profil mesuré sur une autre machine ou un autre nombre de CPU est rejeté."""
+    from embeddings.autotune import profile_options
+
+    profile = {
+        "model_id": "intfloat/multilingual-e5-large",
+        "host": platform.node(),
+        "cpu_count": os.cpu_count(),
+        "best": {"batch_size": 16},
+    }
+    model_id = profile["model_id"]
+
+    assert profile_options(profile, model_id) == {"batch_size": 16}
+    assert profile_options({**profile, "host": "autre-machine"}, model_id) == {}
+    assert profile_options({**profile, "cpu_count": (os.cpu_count() or 1) + 1}, model_id) == {}
@@ -0,0 +1,64 @@
+"""
+Tests unitaires pour le benchmark des embeddings (benchmark.py).
+"""
+
+import json
+
+import pytest
+
+from embeddings.benchmark import make_corpus, percentiles_ms, run_benchmark
+
+
+@pytest.mark.unit
+def test_corpus_is_reproducible():
+    """Teste que le corpus dépend uniquement de la graine et de la distribution."""
+    assert make_corpus(10, "mixed", seed=1) == make_corpus(10, "mixed", seed=1)
+    assert make_corpus(10, "mixed", seed=1) != make_corpus(10, "mixed", seed=2)
+
+    short = make_corpus(50, "short")
+    long = make_corpus(50, "long")
+    assert max(len(t.split()) for t in short) < min(len(t.split()) for t in long)
+
+    with pytest.raises(ValueError, match="Distribution de longueurs inconnue"):
+        make_corpus(1, "huge")
+
+
+@pytest.mark.unit
+def test_percentiles_ms():
+    """Teste le calcul des percentiles en millisecondes."""
+    stats = percentiles_ms([i / 1000 for i in range(1, 101)])
+
+    assert stats["p50_ms"] == pytest.approx(50.5)
+    assert stats["p95_ms"] == pytest.approx(95.05)
+    assert stats["p99_ms"] == pytest.approx(99.01)
+
+
+@pytest.mark.unit
+def test_run_benchmark_reports_grid(tiny_model_dir):
+    """Teste la structure du rapport et l'enregistrement des configurations indisponibles."""
+    report = run_benchmark(
+        model_id=tiny_model_dir,
+        backends=("torch",),
+        precisions=("fp32", "fp8"),
+        batch_sizes=(2, 8),
+        distributions=("short", "long"),
+        num_texts=8,
+        num_queries=5,
+        device="cpu",
+    )
+
+    json.dumps(report)
+    results = report["results"]
+    documents = [r for r in results if r.get("task") == "embed_documents"]
+    queries = [r for r in results if r.get("task") == "embed_query"]
+    errors = [r for r in results if "error" in r]
+
+    assert len(documents) == 4
+    assert all(r["docs_per_second"] > 0 and r["tokens_per_second"] > 0 for r in documents)
+    assert len(queries) == 1 and queries[0]["p50_ms"] <= queries[0]["p99_ms"]
+    assert [r["task"] for r in results if r.get("task", "").startswith("embed_query")] == [
+        "embed_query",
+        "embed_query_batch_path",
+    ]
+    assert errors == [{"backend": "torch", "precision": "fp8", "error": errors[0]["error"]}]
+    assert report["environment"]["cpu_count"] > 0
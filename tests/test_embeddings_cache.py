@@ -0,0 +1,201 @@
+"""
+Tests unitaires pour le cache persistant des embeddings (cache.py).
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def cached_embeddings(tmp_path):
+    """E5Embeddings avec cache SQLite et encodage factice comptabilisé."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(
+            device="cpu", cache_path=str(tmp_path / "cache" / "embeddings.sqlite")
+        )
+
+    encoded = []
+
+    def fake_embed_texts(texts, prefix="passage: "):
+        encoded.append(list(texts))
+        return np.array(
+            [[float(len(text)), float(len(prefix)), 1.0] for text in texts],
+            dtype=np.float32,
+        )
+
+    embeddings._embed_texts = fake_embed_texts
+    return embeddings, encoded
+
+
+@pytest.mark.unit
+def test_cache_roundtrip(tmp_path):
+    """Teste l'écriture puis la lecture de vecteurs dans le cache."""
+    from embeddings.cache import EmbeddingCache
+
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"))
+    key = cache.make_key("model|fp32|passage: |512", "Concert")
+    cache.put_many([(key, np.array([0.1, 0.2], dtype=np.float32))])
+
+    found = cache.get_many([key, cache.make_key("autre", "Concert")])
+
+    assert list(found) == [key]
+    np.testing.assert_allclose(found[key], [0.1, 0.2])
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+@pytest.mark.unit
+def test_cache_is_lazy(tmp_path):
+    """Teste qu'aucun fichier n'est créé tant que le cache n'est pas utilisé."""
+    from embeddings.cache import EmbeddingCache
+
+    path = tmp_path / "cache.sqlite"
+    EmbeddingCache(str(path))
+
+    assert not path.exists()
+
+
+@pytest.mark.unit
+def test_embed_documents_only_computes_misses(cached_embeddings):
+    """Teste que seuls les textes absents du cache sont encodés."""
+    embeddings, encoded = cached_embeddings
+
+    first = embeddings.embed_documents(["Concert", "Exposition"])
+    second = embeddings.embed_documents(["Exposition", "Théâtre", "Concert"])
+
+    assert encoded == [["Concert", "Exposition"], ["Théâtre"]]
+    assert second[0] == first[1]
+    assert second[2] == first[0]
+    assert embeddings.cache.stats()["hits"] == 2
+    assert embeddings.cache.stats()["misses"] == 3
+
+
+@pytest.mark.unit
+def test_cache_key_depends_on_encoding_parameters(cached_embeddings):
+    """Teste que modèle, précision et max_length font partie de la clé."""
+    embeddings, encoded = cached_embeddings
+
+    embeddings.embed_documents(["Concert"])
+    embeddings.max_length = 256
+    embeddings.embed_documents(["Concert"])
+    embeddings.precision = "int8"
+    embeddings.embed_documents(["Concert"])
+
+    assert len(encoded) == 3
+
+
+@pytest.mark.unit
+def test_cache_key_depends_on_backend_and_onnx_model(cached_embeddings, tmp_path):
+    """Teste que le backend et le fichier ONNX font partie de la clé."""
+    embeddings, encoded = cached_embeddings
+    model_path = tmp_path / "onnx" / "model.onnx"
+    model_path.parent.mkdir()
+    model_path.write_bytes(b"v1")
+
+    embeddings.embed_documents(["Concert"])
+    embeddings.backend, embeddings.onnx_path = "onnx", str(model_path.parent)
+    embeddings.embed_documents(["Concert"])
+    embeddings.embed_documents(["Concert"])
+    model_path.write_bytes(b"v2 (nouvel export)")
+    embeddings.embed_documents(["Concert"])
+
+    assert len(encoded) == 3
+
+
+@pytest.mark.unit
+def test_cache_persists_between_instances(cached_embeddings, tmp_path):
+    """Teste que le cache survit à la recréation du modèle (nouvelle exécution)."""
+    embeddings, _ = cached_embeddings
+    embeddings.embed_documents(["Concert"])
+    embeddings.cache.close()
+
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        reloaded = E5Embeddings(device="cpu", cache_path=embeddings.cache.path)
+
+    reloaded._embed_texts = lambda texts, prefix="passage: ": pytest.fail(
+        "Aucun encodage attendu"
+    )
+    result = reloaded.embed_documents(["Concert"])
+
+    assert result == [[7.0, 9.0, 1.0]]
+
+
+# ============================================================================
+# Cache LRU des embeddings de requêtes
+# ============================================================================
+
+@pytest.mark.unit
+def test_query_cache_lru_eviction():
+    """Teste l'éviction de l'entrée la moins récemment utilisée."""
+    from embeddings.cache import QueryEmbeddingCache
+
+    cache = QueryEmbeddingCache(capacity=2)
+    cache.put("concert", np.array([1.0]))
+    cache.put("expo", np.array([2.0]))
+    assert cache.get("concert") is not None  # "concert" devient le plus récent
+    cache.put("théâtre", np.array([3.0]))
+
+    assert cache.get("expo") is None
+    assert cache.get("concert") is not None
+    assert cache.stats()["size"] == 2
+
+
+@pytest.mark.unit
+def test_query_cache_ttl_expiration():
+    """Teste l'expiration des entrées au-delà du TTL."""
+    from embeddings.cache import QueryEmbeddingCache
+
+    with patch("embeddings.cache.time.monotonic", side_effect=[0.0, 5.0, 20.0]):
+        cache = QueryEmbeddingCache(capacity=10, ttl=10.0)
+        cache.put("concert", np.array([1.0]))      # t=0
+        assert cache.get("concert") is not None    # t=5: valide
+        assert cache.get("concert") is None        # t=20: expiré
+
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.unit
+def test_embed_query_uses_query_cache():
+    """Teste que les requêtes répétées ne relancent pas le modèle."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu", query_cache_size=8)
+
+    calls = []
+
+    def fake_embed_texts(texts, prefix="passage: "):
+        calls.append((list(texts), prefix))
+        return np.array([[0.6, 0.8]], dtype=np.float32)
+
+    embeddings._embed_texts = fake_embed_texts
+
+    first = embeddings.embed_query("concert jazz Toulouse")
+    first.append(99.0)  # une modification du résultat ne doit pas polluer le cache
+    second = embeddings.embed_query("concert jazz Toulouse")
+
+    assert calls == [(["concert jazz Toulouse"], "query: ")]
+    assert second == pytest.approx([0.6, 0.8])
+    assert embeddings.query_cache.stats()["hit_rate"] == 0.5
+
+
+@pytest.mark.unit
+def test_query_cache_disabled_by_default():
+    """Teste que le cache de requêtes est désactivé par défaut."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu")
+
+    assert embeddings.query_cache is None
@@ -0,0 +1,125 @@
+"""
+Tests unitaires pour le chargement mmap du modèle et le warmup (loading.py).
+"""
+
+from pathlib import Path
+import json
+import struct
+
+import numpy as np
+import pytest
+import torch
+from transformers import AutoModel
+
+from embeddings.loading import load_model_mmap, load_safetensors_mmap
+
+
+@pytest.mark.unit
+def test_safetensors_tensors_are_file_backed(tiny_model_dir):
+    """Teste que les tenseurs lus sont des vues sur le fichier mappé (pas de copie)."""
+    path = Path(tiny_model_dir) / "model.safetensors"
+    tensors = load_safetensors_mmap(path)
+    reference = AutoModel.from_pretrained(tiny_model_dir).state_dict()
+
+    weight = tensors["embeddings.word_embeddings.weight"]
+    assert weight.shape == (64, 32)
+    torch.testing.assert_close(weight, reference["embeddings.word_embeddings.weight"])
+
+    # Les écarts d'adresses mémoire correspondent aux positions dans le fichier
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+    names = [name for name in header if name != "__metadata__"]
+    base = tensors[names[0]].data_ptr() - header[names[0]]["data_offsets"][0]
+    for name in names:
+        assert tensors[name].data_ptr() - base == header[name]["data_offsets"][0]
+
+
+@pytest.mark.unit
+def test_mmap_model_matches_from_pretrained(tiny_model_dir):
+    """Teste que le modèle mappé produit les mêmes sorties que from_pretrained."""
+    reference = AutoModel.from_pretrained(tiny_model_dir).eval()
+    model = load_model_mmap(tiny_model_dir)
+
+    input_ids = torch.tensor([[2, 5, 8, 9, 3]])
+    with torch.no_grad():
+        expected = reference(input_ids=input_ids).last_hidden_state
+        actual = model(input_ids=input_ids).last_hidden_state
+
+    torch.testing.assert_close(actual, expected)
+
+
+@pytest.mark.unit
+def test_lazy_load_with_warmup_records_metrics(tiny_model_dir):
+    """Teste le chargement différé, le warmup et les métriques par phase."""
+    from embeddings.embeddings import E5Embeddings
+
+    embeddings = E5Embeddings(
+        model_id=tiny_model_dir, device="cpu", mmap_weights=True, lazy_load=True
+    )
+    assert embeddings.model is None
+    assert embeddings.load_metrics == {}
+
+    embeddings.warmup(lengths=(4, 16))
+
+    assert embeddings.mmap_weights is True
+    assert set(embeddings.load_metrics) == {"tokenizer", "model", "warmup"}
+    assert all(m["seconds"] >= 0 and m["rss_mb"] > 0 for m in embeddings.load_metrics.values())
+
+    reference = E5Embeddings(model_id=tiny_model_dir, device="cpu")
+    np.testing.assert_allclose(
+        embeddings.embed_query("concert de jazz"),
+        reference.embed_query("concert de jazz"),
+        atol=1e-6,
+    )
+
+
+@pytest.mark.unit
+def test_mmap_falls_back_for_int8(tiny_model_dir):
+    """Teste que le mmap est désactivé lorsque les poids sont transformés."""
+    from embeddings.embeddings import E5Embeddings
+
+    embeddings = E5Embeddings(
+        model_id=tiny_model_dir, device="cpu", precision="int8", mmap_weights=True
+    )
+
+    assert embeddings.mmap_weights is False
+    assert len(embeddings.embed_query("concert")) == 32
+
+
+@pytest.mark.unit
+def test_mmap_load_error_falls_back_to_from_pretrained(tiny_model_dir):
+    """Teste le repli sur from_pretrained quel que soit l'échec du chargement mmap."""
+    from unittest.mock import patch
+
+    from embeddings.embeddings import E5Embeddings
+
+    with patch(
+        "embeddings.loading.load_model_mmap", side_effect=RuntimeError("état incompatible")
+    ):
+        embeddings = E5Embeddings(model_id=tiny_model_dir, device="cpu", mmap_weights=True)
+
+    assert embeddings.mmap_weights is False
+    assert len(embeddings.embed_query("concert")) == 32
+
+
+@pytest.mark.unit
+def test_concurrent_lazy_load_loads_once(tiny_model_dir):
+    """Teste que des premiers appels concurrents ne chargent le modèle qu'une fois."""
+    from concurrent.futures import ThreadPoolExecutor
+    from unittest.mock import patch
+
+    from embeddings.embeddings import AutoModel as EmbeddingsAutoModel
+    from embeddings.embeddings import E5Embeddings
+
+    embeddings = E5Embeddings(model_id=tiny_model_dir, device="cpu", lazy_load=True)
+
+    with patch(
+        "embeddings.embeddings.AutoModel.from_pretrained",
+        wraps=EmbeddingsAutoModel.from_pretrained,
+    ) as from_pretrained:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            vectors = list(pool.map(embeddings.embed_query, ["concert"] * 4))
+
+    assert from_pretrained.call_count == 1
+    assert all(len(v) == 32 for v in vectors)
@@ -0,0 +1,91 @@
+"""
+Tests unitaires pour le pool de processus d'encodage (pool.py).
+"""
+
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pytest
+
+from embeddings.pool import split_shards
+
+
+@pytest.mark.unit
+def test_split_shards_covers_all_texts_in_order():
+    """Teste que les shards sont contigus, équilibrés et sans shard vide."""
+    shards = split_shards(10, 4)
+
+    assert [list(shard) for shard in shards] == [
+        [0, 1, 2], [3, 4, 5], [6, 7], [8, 9]
+    ]
+    assert split_shards(2, 8) == [range(0, 1), range(1, 2)]
+
+
+@pytest.mark.unit
+def test_small_inputs_stay_in_process():
+    """Teste qu'un seul batch de documents n'active pas le pool de workers."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cpu", batch_size=4, workers=2)
+
+    with patch.object(embeddings, "_embed_texts", return_value=np.zeros((2, 3))) as local, \
+         patch("embeddings.pool.EmbeddingWorkerPool") as pool_class:
+        embeddings.embed_documents(["a", "b"])
+
+    local.assert_called_once()
+    pool_class.assert_not_called()
+
+
+@pytest.mark.unit
+def test_workers_disabled_on_gpu():
+    """Teste que le pool de workers est désactivé hors CPU."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel") as mock_model:
+        mock_model.from_pretrained.return_value = MagicMock()
+        from embeddings.embeddings import E5Embeddings
+
+        embeddings = E5Embeddings(device="cuda", workers=4)
+
+    assert embeddings.workers == 1
+
+
+@pytest.mark.unit
+def test_get_embeddings_model_workers_from_env():
+    """Teste la lecture de EMBEDDINGS_WORKERS et EMBEDDINGS_THREADS_PER_WORKER."""
+    with patch.dict(
+        "os.environ", {"EMBEDDINGS_WORKERS": "4", "EMBEDDINGS_THREADS_PER_WORKER": "8"}
+    ), patch("embeddings.embeddings.E5Embeddings") as mock_e5:
+        from embeddings.embeddings import get_embeddings_model
+
+        get_embeddings_model()
+
+    kwargs = mock_e5.call_args.kwargs
+    assert kwargs["workers"] == 4
+    assert kwargs["threads_per_worker"] == 8
+
+
+@pytest.mark.unit
+def test_worker_pool_matches_single_process(tiny_model_dir):
+    """Teste que le pool multi-processus produit les mêmes vecteurs, dans l'ordre."""
+    from embeddings.embeddings import E5Embeddings
+
+    texts = [f"concert de jazz {'a toulouse ' * (i % 4)}" for i in range(12)]
+
+    single = E5Embeddings(model_id=tiny_model_dir, device="cpu", batch_size=2)
+    parallel = E5Embeddings(
+        model_id=tiny_model_dir,
+        device="cpu",
+        batch_size=2,
+        workers=2,
+        threads_per_worker=1,
+    )
+    try:
+        expected = np.array(single.embed_documents(texts))
+        actual = np.array(parallel.embed_documents(texts))
+    finally:
+        parallel.close()
+
+    np.testing.assert_allclose(actual, expected, atol=1e-5)
+    assert parallel._worker_pool is None
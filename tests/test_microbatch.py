@@ -0,0 +1,99 @@
+"""
+Tests unitaires pour le micro-batching des requêtes (microbatch.py).
+"""
+
+import asyncio
+import time
+
+import numpy as np
+import pytest
+
+from embeddings.microbatch import QueryMicroBatcher
+
+
+class FakeEmbeddings:
+    """Modèle factice: encode chaque texte par sa longueur et trace les batchs."""
+
+    def __init__(self, fail: bool = False, delay: float = 0.0):
+        self.batches = []
+        self.fail = fail
+        self.delay = delay
+
+    def embed_queries(self, texts):
+        self.batches.append(list(texts))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("forward impossible")
+        return np.array([[float(len(text)), 1.0] for text in texts], dtype=np.float32)
+
+
+@pytest.mark.unit
+async def test_concurrent_queries_share_a_batch():
+    """Teste que des requêtes concurrentes sont encodées en un seul forward."""
+    embeddings = FakeEmbeddings()
+    batcher = QueryMicroBatcher(embeddings, max_batch_size=8, max_wait_ms=50)
+    texts = ["a", "bb", "ccc", "dddd"]
+
+    try:
+        results = await asyncio.gather(*(batcher.embed_query(t) for t in texts))
+    finally:
+        await batcher.stop()
+
+    assert embeddings.batches == [texts]
+    assert results == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+    assert batcher.stats()["mean_batch_size"] == 4.0
+
+
+@pytest.mark.unit
+async def test_batch_size_is_bounded():
+    """Teste que max_batch_size limite la taille de chaque forward."""
+    embeddings = FakeEmbeddings()
+    batcher = QueryMicroBatcher(embeddings, max_batch_size=2, max_wait_ms=50)
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    try:
+        results = await asyncio.gather(*(batcher.embed_query(t) for t in texts))
+    finally:
+        await batcher.stop()
+
+    assert [len(batch) for batch in embeddings.batches] == [2, 2, 1]
+    assert [result[0] for result in results] == [1.0, 2.0, 3.0, 4.0, 5.0]
+
+
+@pytest.mark.unit
+async def test_errors_are_propagated_to_callers():
+    """Teste qu'une erreur du modèle est renvoyée à chaque appelant du batch."""
+    batcher = QueryMicroBatcher(FakeEmbeddings(fail=True), max_batch_size=4, max_wait_ms=10)
+
+    try:
+        results = await asyncio.gather(
+            batcher.embed_query("a"), batcher.embed_query("b"), return_exceptions=True
+        )
+    finally:
+        await batcher.stop()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert batcher.stats()["batches"] == 0
+
+
+@pytest.mark.unit
+async def test_pending_queries_fail_when_worker_dies():
+    """Teste qu'aucune requête n'attend indéfiniment si la tâche de fond meurt."""
+    embeddings = FakeEmbeddings(delay=0.05)
+    batcher = QueryMicroBatcher(embeddings, max_batch_size=1, max_wait_ms=1)
+
+    in_flight = asyncio.ensure_future(batcher.embed_query("a"))
+    queued = asyncio.ensure_future(batcher.embed_query("bb"))
+    await asyncio.sleep(0.01)
+    batcher._worker.cancel()
+    await asyncio.gather(batcher._worker, return_exceptions=True)
+
+    try:
+        result = await batcher.embed_query("ccc")
+    finally:
+        await batcher.stop()
+
+    assert result == [3.0, 1.0]
+    for future in (in_flight, queued):
+        with pytest.raises(RuntimeError, match="micro-batching arrêtée"):
+            await asyncio.wait_for(future, timeout=1)
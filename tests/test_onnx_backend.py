@@ -0,0 +1,157 @@
+"""
+Tests unitaires pour le backend ONNX des embeddings (onnx_backend.py).
+
+Ces tests exportent un petit modèle BERT aléatoire (sans téléchargement) et
+vérifient que le backend ONNX reproduit les embeddings du backend PyTorch.
+"""
+
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+import torch
+
+pytest.importorskip("onnxruntime")
+pytest.importorskip("onnx")
+
+from transformers import BertConfig, BertModel, BertTokenizerFast  # noqa: E402
+
+
+@pytest.fixture
+def tiny_model():
+    """Petit modèle BERT aléatoire (2 couches, dimension 32)."""
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=64,
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+    )
+    return BertModel(config).eval()
+
+
+@pytest.fixture
+def tiny_tokenizer(tmp_path):
+    """Tokenizer WordPiece minimal construit depuis un vocabulaire local."""
+    words = [
+        "passage", "query", ":", "concert", "de", "jazz", "a", "toulouse",
+        "exposition", "art", "montpellier", "atelier", "poterie", "enfants",
+    ]
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words
+    vocab_file = tmp_path / "vocab.txt"
+    vocab_file.write_text("\n".join(vocab), encoding="utf-8")
+    return BertTokenizerFast(vocab_file=str(vocab_file))
+
+
+@pytest.fixture
+def onnx_pair(tiny_model, tiny_tokenizer, tmp_path):
+    """Exporte le modèle puis crée une instance torch et une instance ONNX."""
+    with patch("embeddings.embeddings.AutoTokenizer") as mock_tokenizer, \
+         patch("embeddings.embeddings.AutoModel") as mock_model, \
+         patch("embeddings.onnx_backend.AutoModel") as mock_export_model:
+
+        mock_tokenizer.from_pretrained.return_value = tiny_tokenizer
+        mock_model.from_pretrained.return_value = tiny_model
+        mock_export_model.from_pretrained.return_value = tiny_model
+
+        from embeddings.embeddings import E5Embeddings
+        from embeddings.onnx_backend import export_onnx_model
+
+        onnx_dir = str(tmp_path / "onnx")
+        model_path = export_onnx_model(model_id="tiny", onnx_dir=onnx_dir)
+
+        reference = E5Embeddings(model_id="tiny", device="cpu", batch_size=2)
+        candidate = E5Embeddings(
+            model_id="tiny",
+            device="cpu",
+            batch_size=2,
+            backend="onnx",
+            onnx_path=onnx_dir,
+        )
+        yield reference, candidate, model_path
+
+
+@pytest.mark.unit
+def test_export_creates_onnx_file(onnx_pair):
+    """Teste que l'export produit le fichier model.onnx."""
+    _, candidate, model_path = onnx_pair
+
+    assert model_path.exists()
+    assert model_path.name == "model.onnx"
+    assert candidate.model is None
+
+
+@pytest.mark.unit
+def test_onnx_backend_matches_torch(onnx_pair):
+    """Teste que les embeddings ONNX sont numériquement proches de PyTorch."""
+    reference, candidate, _ = onnx_pair
+    texts = ["concert de jazz a toulouse", "exposition art", "atelier poterie enfants"]
+
+    from embeddings.onnx_backend import compare_backends
+
+    report = compare_backends(reference, candidate, texts)
+
+    assert report["min_cosine"] > 0.9999
+    assert report["max_abs_diff"] < 1e-4
+
+
+@pytest.mark.unit
+def test_onnx_backend_keeps_langchain_contract(onnx_pair):
+    """Teste que embed_documents/embed_query retournent des listes de floats."""
+    _, candidate, _ = onnx_pair
+
+    documents = candidate.embed_documents(["concert de jazz", "exposition art"])
+    query = candidate.embed_query("jazz a toulouse")
+
+    assert isinstance(documents, list) and len(documents) == 2
+    assert len(documents[0]) == 32
+    assert isinstance(query, list) and len(query) == 32
+    assert np.linalg.norm(query) == pytest.approx(1.0, abs=1e-5)
+
+
+@pytest.mark.unit
+def test_onnx_backend_missing_model(tmp_path):
+    """Teste l'erreur explicite lorsque le modèle ONNX n'a pas été exporté."""
+    from embeddings.onnx_backend import OnnxEncoder
+
+    with pytest.raises(FileNotFoundError, match="Modèle ONNX introuvable"):
+        OnnxEncoder(str(tmp_path / "absent"))
+
+
+@pytest.mark.unit
+def test_unknown_backend_raises():
+    """Teste le rejet d'un backend inconnu."""
+    with patch("embeddings.embeddings.AutoTokenizer"), \
+         patch("embeddings.embeddings.AutoModel"):
+        from embeddings.embeddings import E5Embeddings
+
+        with pytest.raises(ValueError, match="Backend d'embeddings inconnu"):
+            E5Embeddings(device="cpu", backend="tensorrt")
+
+
+@pytest.mark.unit
+def test_onnx_int8_quantization(onnx_pair, tiny_tokenizer):
+    """Teste la création et le chargement du modèle ONNX int8."""
+    reference, candidate, model_path = onnx_pair
+
+    from embeddings.onnx_backend import compare_backends, quantize_onnx_model
+
+    int8_path = quantize_onnx_model(str(model_path.parent))
+    assert int8_path.name == "model.int8.onnx"
+
+    with patch("embeddings.embeddings.AutoTokenizer") as mock_tokenizer:
+        mock_tokenizer.from_pretrained.return_value = tiny_tokenizer
+        from embeddings.embeddings import E5Embeddings
+
+        quantized = E5Embeddings(
+            model_id="tiny",
+            device="cpu",
+            backend="onnx",
+            onnx_path=str(model_path.parent),
+            precision="int8",
+        )
+
+    assert quantized.onnx_encoder.model_path == int8_path
+    report = compare_backends(reference, quantized, ["concert de jazz a toulouse"])
+    assert report["min_cosine"] > 0.9
@@ -0,0 +1,102 @@
+"""
+Tests unitaires pour le contrôle de précision des embeddings (precision_check.py).
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+
+class HashEmbeddings(Embeddings):
+    """Embeddings déterministes (dimension 16) dérivés du texte."""
+
+    def _vector(self, text):
+        rng = np.random.default_rng(sum(ord(c) for c in text))
+        vector = rng.normal(size=16).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def embed_documents(self, texts):
+        return [self._vector(t).tolist() for t in texts]
+
+    def embed_query(self, text):
+        return self._vector(text).tolist()
+
+
+def _fake_model(precision, noise=0.0):
+    """Crée un faux E5Embeddings dont _embed_texts ajoute un bruit contrôlé."""
+    base = HashEmbeddings()
+    model = MagicMock()
+    model.precision = precision
+    model.backend = "torch"
+
+    def embed_texts(texts, prefix="passage: "):
+        vectors = np.array(base.embed_documents(texts), dtype=np.float32)
+        if noise:
+            rng = np.random.default_rng(0)
+            vectors = vectors + noise * rng.normal(size=vectors.shape)
+        return vectors
+
+    model._embed_texts.side_effect = embed_texts
+    return model
+
+
+@pytest.fixture
+def vector_store():
+    """Petit index FAISS réel construit avec des embeddings déterministes."""
+    texts = [f"événement culturel numéro {i}" for i in range(50)]
+    return FAISS.from_texts(texts, HashEmbeddings())
+
+
+@pytest.mark.unit
+def test_check_precision_identical_models(vector_store):
+    """Teste qu'un candidat identique à la référence passe le contrôle."""
+    from embeddings.precision_check import check_precision
+
+    queries = ["concert", "exposition", "festival"]
+    report = check_precision(
+        _fake_model("fp32"), _fake_model("int8"), queries, vector_store, k=5
+    )
+
+    assert report["passed"] is True
+    assert report["queries"]["min_cosine"] == pytest.approx(1.0, abs=1e-5)
+    assert report["top_k"]["mean_overlap"] == pytest.approx(1.0)
+    assert report["passages"]["num_passages"] == 50
+
+
+@pytest.mark.unit
+def test_check_precision_detects_degradation(vector_store):
+    """Teste qu'un candidat trop bruité est rejeté."""
+    from embeddings.precision_check import check_precision
+
+    queries = ["concert", "exposition", "festival"]
+    report = check_precision(
+        _fake_model("fp32"), _fake_model("int8", noise=1.0), queries, vector_store, k=5
+    )
+
+    assert report["passed"] is False
+    assert report["queries"]["min_cosine"] < 0.98
+
+
+@pytest.mark.unit
+def test_check_precision_without_vector_store():
+    """Teste le contrôle sans index (métriques de requêtes uniquement)."""
+    from embeddings.precision_check import check_precision
+
+    report = check_precision(_fake_model("fp32"), _fake_model("int8"), ["concert"])
+
+    assert "top_k" not in report
+    assert report["passed"] is True
+
+
+@pytest.mark.unit
+def test_load_reference_queries():
+    """Teste le chargement des questions RAGAS de référence."""
+    from embeddings.precision_check import load_reference_queries
+
+    queries = load_reference_queries()
+
+    assert len(queries) > 0
+    assert all(isinstance(q, str) and q for q in queries)
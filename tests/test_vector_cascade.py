@@ -0,0 +1,134 @@
+"""
+Tests unitaires pour la recherche en cascade (cascade.py).
+"""
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from tests.conftest import TableEmbeddings
+from vectors.cascade import (
+    CascadeRetriever,
+    build_cascade_index,
+    load_cascade_index,
+    save_cascade_index,
+)
+from vectors.vectors import create_vector_store_from_batches
+
+
+def _normalize(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+@pytest.fixture
+def cascade_setup():
+    """Index principal (dimension 32) et petit modèle (projection en dimension 8)."""
+    rng = np.random.default_rng(0)
+    large = _normalize(rng.normal(size=(120, 32)))
+    small = _normalize(large[:, :8] + 0.05 * rng.normal(size=(120, 8)))
+
+    large_embeddings = TableEmbeddings(large)
+    small_embeddings = TableEmbeddings(small)
+    documents = [Document(page_content=f"doc-{i}") for i in range(len(large))]
+    return documents, large_embeddings, small_embeddings
+
+
+def _vector_store(documents, embeddings, pca_dim=None, index_factory=None):
+    vectors = np.asarray(embeddings.embed_documents([d.page_content for d in documents]))
+    return create_vector_store_from_batches(
+        documents,
+        [(0, vectors.astype(np.float32))],
+        embeddings,
+        pca_dim=pca_dim,
+        index_factory=index_factory,
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("pca_dim", [None, 16])
+def test_rescore_matches_main_index(cascade_setup, pca_dim):
+    """Teste que le reclassement donne les distances de l'index principal."""
+    documents, large_embeddings, small_embeddings = cascade_setup
+    vector_store = _vector_store(documents, large_embeddings, pca_dim=pca_dim)
+    small_index = build_cascade_index([d.page_content for d in documents], small_embeddings)
+    retriever = CascadeRetriever(
+        vector_store, small_embeddings, small_index, candidates=len(documents)
+    )
+
+    ids, _ = retriever.retrieve("doc-7")
+    results = retriever.rescore(large_embeddings.embed_query("doc-7"), ids, k=5)
+    expected = vector_store.similarity_search_with_score_by_vector(
+        large_embeddings.embed_query("doc-7"), k=5
+    )
+
+    assert [doc.page_content for doc, _ in results] == [
+        doc.page_content for doc, _ in expected
+    ]
+    assert [score for _, score in results] == pytest.approx(
+        [score for _, score in expected], abs=1e-4
+    )
+    assert retriever.stats()["rescore_rate"] == 1.0
+
+
+@pytest.mark.unit
+def test_ivf_direct_map_is_built_at_load(cascade_setup):
+    """Teste que la table de correspondance IVF est construite avant toute requête."""
+    import faiss
+
+    documents, large_embeddings, small_embeddings = cascade_setup
+    vector_store = _vector_store(documents, large_embeddings, index_factory="IVF4,Flat")
+    small_index = build_cascade_index([d.page_content for d in documents], small_embeddings)
+    ivf = faiss.try_extract_index_ivf(vector_store.index)
+    assert ivf.direct_map.no()
+
+    retriever = CascadeRetriever(vector_store, small_embeddings, small_index)
+
+    assert not ivf.direct_map.no()
+    ids, _ = retriever.retrieve("doc-7")
+    results = retriever.rescore(large_embeddings.embed_query("doc-7"), ids, k=1)
+    assert results[0][0].page_content == "doc-7"
+
+
+@pytest.mark.unit
+def test_confident_queries_skip_rescoring(cascade_setup):
+    """Teste que l'écart entre les deux premiers candidats décide du reclassement."""
+    documents, large_embeddings, small_embeddings = cascade_setup
+    vector_store = _vector_store(documents, large_embeddings)
+    small_index = build_cascade_index([d.page_content for d in documents], small_embeddings)
+
+    never = CascadeRetriever(
+        vector_store, small_embeddings, small_index, candidates=10, skip_margin=None
+    )
+    strict = CascadeRetriever(
+        vector_store, small_embeddings, small_index, candidates=10, skip_margin=0.01
+    )
+
+    _, distances = strict.retrieve("doc-3")
+    margin = (distances[1] - distances[0]) / 2
+
+    assert not never.is_confident(distances)
+    assert strict.is_confident(distances) == (margin >= 0.01)
+    assert strict.results(*strict.retrieve("doc-3"), k=1)[0][0].page_content == "doc-3"
+
+
+@pytest.mark.unit
+def test_cascade_index_roundtrip_and_alignment(cascade_setup, tmp_path):
+    """Teste la sauvegarde de l'index compact et le refus d'un index désaligné."""
+    documents, large_embeddings, small_embeddings = cascade_setup
+    vector_store = _vector_store(documents, large_embeddings)
+    small_index = build_cascade_index(
+        [d.page_content for d in documents[:50]], small_embeddings
+    )
+
+    save_cascade_index(small_index, str(tmp_path), "intfloat/multilingual-e5-small")
+    loaded, info = load_cascade_index(str(tmp_path))
+
+    assert loaded.ntotal == 50
+    assert info == {
+        "model_id": "intfloat/multilingual-e5-small",
+        "num_vectors": 50,
+        "dimension": 8,
+    }
+    assert load_cascade_index(str(tmp_path / "absent")) is None
+    with pytest.raises(ValueError, match="Index de cascade désaligné"):
+        CascadeRetriever(vector_store, small_embeddings, loaded)
@@ -0,0 +1,125 @@
+"""
+Tests unitaires pour le docstore SQLite (docstore.py).
+"""
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from tests.conftest import TableEmbeddings
+from vectors.docstore import DOCSTORE_FILENAME, SQLiteDocstore
+
+
+@pytest.fixture
+def documents():
+    """Chunks avec les métadonnées de extract_metadata (et quelques cas limites)."""
+    cities = ["Toulouse", "Montpellier", "Nîmes"]
+    documents = []
+    for i in range(30):
+        metadata = {
+            "event_id": f"evt_{i // 3}",
+            "uid": 1000 + i // 3,
+            "title": f"Événement {i // 3}",
+            "city": cities[i % 3],
+            "department": "Haute-Garonne",
+            "region": "Occitanie",
+            "postal_code": "31000",
+            "latitude": 43.6 + i / 100,
+            "longitude": 1.44,
+            "date_debut": "2025-11-10T19:00:00+01:00",
+            "keywords": ["concert", "jazz"] if i % 2 else [],
+            "conditions": "",
+            "status": "Programmé",
+        }
+        documents.append(Document(page_content=f"doc-{i} Concert n°{i}", metadata=metadata))
+    # Champ inconnu et valeur d'un type inattendu: conservés dans extra
+    documents[0].metadata["chunk_index"] = 2
+    documents[1].metadata["postal_code"] = 31000
+    return documents
+
+
+@pytest.fixture
+def vectors():
+    """30 vecteurs de dimension 8."""
+    return np.random.default_rng(0).normal(size=(30, 8)).astype(np.float32)
+
+
+@pytest.mark.unit
+def test_sqlite_docstore_round_trip(documents, vectors, tmp_path):
+    """Teste la sauvegarde SQLite et le chargement sans index.pkl."""
+    from vectors.vectors import (
+        create_vector_store_from_batches,
+        load_vector_store,
+        save_vector_store,
+    )
+
+    embeddings = TableEmbeddings(vectors)
+    vector_store = create_vector_store_from_batches(documents, [(0, vectors)], embeddings)
+    save_vector_store(vector_store, str(tmp_path), docstore_backend="sqlite")
+
+    assert (tmp_path / DOCSTORE_FILENAME).exists()
+    assert not (tmp_path / "index.pkl").exists()
+
+    loaded = load_vector_store(str(tmp_path), embeddings)
+    assert isinstance(loaded.docstore, SQLiteDocstore)
+    assert len(loaded.index_to_docstore_id) == 30
+    assert list(loaded.index_to_docstore_id) == list(range(30))
+    assert list(loaded.index_to_docstore_id.items()) == list(
+        vector_store.index_to_docstore_id.items()
+    )
+    assert list(loaded.index_to_docstore_id.values()) == list(
+        vector_store.index_to_docstore_id.values()
+    )
+
+    for position, document in enumerate(documents):
+        stored = loaded.docstore.search(loaded.index_to_docstore_id[position])
+        assert stored.page_content == document.page_content
+        assert stored.metadata == document.metadata
+
+    results = loaded.similarity_search("doc-7", k=1)
+    assert results[0].page_content == "doc-7 Concert n°7"
+    assert list(results[0].metadata) == list(documents[7].metadata)
+
+
+@pytest.mark.unit
+def test_sqlite_docstore_missing_id(documents, vectors, tmp_path):
+    """Teste la convention LangChain pour un identifiant inconnu."""
+    from vectors.docstore import save_docstore
+    from vectors.vectors import create_vector_store_from_batches
+
+    vector_store = create_vector_store_from_batches(
+        documents, [(0, vectors)], TableEmbeddings(vectors)
+    )
+    save_docstore(vector_store.docstore, vector_store.index_to_docstore_id, str(tmp_path))
+
+    docstore = SQLiteDocstore(str(tmp_path / DOCSTORE_FILENAME))
+    assert docstore.search("inconnu") == "ID inconnu not found."
+    docstore.close()
+
+
+@pytest.mark.unit
+def test_pickle_save_replaces_sqlite_docstore(documents, vectors, tmp_path):
+    """Teste qu'une sauvegarde pickle supprime un docstore SQLite précédent."""
+    from vectors.vectors import (
+        create_vector_store_from_batches,
+        load_vector_store,
+        save_vector_store,
+    )
+
+    embeddings = TableEmbeddings(vectors)
+    vector_store = create_vector_store_from_batches(documents, [(0, vectors)], embeddings)
+    save_vector_store(vector_store, str(tmp_path), docstore_backend="sqlite")
+    save_vector_store(vector_store, str(tmp_path))
+
+    assert not (tmp_path / DOCSTORE_FILENAME).exists()
+    loaded = load_vector_store(str(tmp_path), embeddings)
+    assert not isinstance(loaded.docstore, SQLiteDocstore)
+
+
+@pytest.mark.unit
+def test_save_vector_store_rejects_unknown_backend(tmp_path):
+    """Teste le rejet d'un backend de docstore inconnu."""
+    from vectors.vectors import save_vector_store
+
+    with pytest.raises(ValueError, match="Backend de docstore inconnu"):
+        save_vector_store(None, str(tmp_path), docstore_backend="parquet")
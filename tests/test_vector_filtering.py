@@ -0,0 +1,157 @@
+"""
+Tests unitaires pour la recherche filtrée par métadonnées (filtering.py).
+"""
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from tests.conftest import TableEmbeddings
+from vectors.filtering import FilteredSearcher, MetadataIndex
+
+
+CITIES = ["Toulouse"] * 8 + ["Montpellier"] + ["Nîmes"]
+
+
+@pytest.fixture
+def vectors():
+    """200 vecteurs de dimension 16."""
+    return np.random.default_rng(0).normal(size=(200, 16)).astype(np.float32)
+
+
+@pytest.fixture
+def vector_store(vectors):
+    """Vector store dont 80% des chunks sont à Toulouse, 10% à Montpellier et à Nîmes."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    documents = [
+        Document(
+            page_content=f"doc-{i}",
+            metadata={
+                "city": CITIES[i % 10],
+                "department": "Hérault" if CITIES[i % 10] == "Montpellier" else "Autre",
+                "keywords": ["jazz"] if i % 4 == 0 else ["théâtre"],
+            },
+        )
+        for i in range(len(vectors))
+    ]
+    return create_vector_store_from_batches(
+        documents, [(0, vectors)], TableEmbeddings(vectors)
+    )
+
+
+def _exact_filtered(vectors, query, positions, k):
+    distances = ((vectors[positions] - query) ** 2).sum(axis=1)
+    return [int(positions[i]) for i in np.argsort(distances)[:k]]
+
+
+@pytest.mark.unit
+def test_metadata_index_mask(vector_store):
+    """Teste la bitmap d'un filtre (OU dans un champ, ET entre champs, casse ignorée)."""
+    index = MetadataIndex.from_vector_store(vector_store)
+
+    assert index.mask({}) is None
+    assert index.mask({"city": ["montpellier", "NÎMES "]}).sum() == 40
+    assert index.mask({"city": ["Montpellier"], "keywords": ["jazz"]}).sum() == 10
+    assert index.mask({"city": ["Toulouse"], "keywords": ["jazz"]}).sum() == 40
+    with pytest.raises(ValueError, match="Champ non filtrable"):
+        index.mask({"title": ["x"]})
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "filters,plan",
+    [
+        ({"city": ["Montpellier"]}, "prefilter"),
+        ({"city": ["Toulouse"]}, "postfilter"),
+        ({"department": ["Hérault"]}, "prefilter"),
+    ],
+)
+def test_filtered_search_matches_exact_filtered_search(
+    vector_store, vectors, filters, plan
+):
+    """Teste que les deux stratégies retournent le top-k exact parmi les chunks filtrés."""
+    index = MetadataIndex.from_vector_store(vector_store)
+    searcher = FilteredSearcher(vector_store, index, prefilter_selectivity=0.2)
+    mask = index.mask(filters)
+    assert searcher.plan(mask) == plan
+
+    query = vectors[3] + 0.1
+    results = searcher.search(query.tolist(), k=5, filters=filters)
+
+    expected = _exact_filtered(vectors, query, np.flatnonzero(mask), 5)
+    assert [int(doc.page_content.split("-")[1]) for doc, _ in results] == expected
+    assert searcher.stats()["plans"][plan] == 1
+
+
+@pytest.mark.unit
+def test_filtered_search_without_match(vector_store, vectors):
+    """Teste qu'un filtre sans correspondance ne lance aucune recherche."""
+    searcher = FilteredSearcher(vector_store, MetadataIndex.from_vector_store(vector_store))
+
+    assert searcher.search(vectors[0].tolist(), k=5, filters={"city": ["Paris"]}) == []
+    assert searcher.stats()["plans"]["empty"] == 1
+
+
+@pytest.mark.unit
+def test_filtered_search_rescores_with_exact_vectors(vectors, tmp_path):
+    """Teste que les candidats filtrés d'un index quantifié sont reclassés par distance exacte."""
+    from vectors.quantization import (
+        EXACT_VECTORS_FILENAME,
+        ExactRescorer,
+        load_exact_vectors,
+    )
+    from vectors.vectors import create_vector_store_from_batches
+
+    documents = [
+        Document(page_content=f"doc-{i}", metadata={"city": CITIES[i % 10]})
+        for i in range(len(vectors))
+    ]
+    vector_store = create_vector_store_from_batches(
+        documents,
+        [(0, vectors)],
+        TableEmbeddings(vectors),
+        quantization="sq4",
+        exact_vectors_path=str(tmp_path / EXACT_VECTORS_FILENAME),
+    )
+    rescorer = ExactRescorer(vector_store, load_exact_vectors(str(tmp_path)))
+    index = MetadataIndex.from_vector_store(vector_store)
+    searcher = FilteredSearcher(vector_store, index, rescorer=rescorer)
+
+    query = vectors[1] + 0.1
+    filters = {"city": ["Montpellier"]}
+    results = searcher.search(query.tolist(), k=3, filters=filters)
+
+    expected = _exact_filtered(vectors, query, np.flatnonzero(index.mask(filters)), 3)
+    assert [int(doc.page_content.split("-")[1]) for doc, _ in results] == expected
+    for doc, distance in results:
+        exact = ((vectors[int(doc.page_content.split("-")[1])] - query) ** 2).sum()
+        assert distance == pytest.approx(float(exact), rel=1e-5)
+    assert rescorer.stats()["queries"] == 1
+    assert searcher.stats()["rescored"] is True
+
+
+@pytest.mark.unit
+def test_filtered_search_on_pq_index(tmp_path):
+    """Teste qu'un filtre sélectif sur un index OPQ (sans sélecteur) est post-filtré."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    vectors = np.random.default_rng(1).normal(size=(400, 16)).astype(np.float32)
+    documents = [
+        Document(page_content=f"doc-{i}", metadata={"city": CITIES[i % 10]})
+        for i in range(len(vectors))
+    ]
+    vector_store = create_vector_store_from_batches(
+        documents, [(0, vectors)], TableEmbeddings(vectors), quantization="opq4"
+    )
+    index = MetadataIndex.from_vector_store(vector_store)
+    searcher = FilteredSearcher(vector_store, index, prefilter_selectivity=0.2)
+    filters = {"city": ["Montpellier"]}
+    assert searcher.plan(index.mask(filters)) == "prefilter"
+    assert searcher.accepts_selector is False
+
+    results = searcher.search((vectors[8] + 0.1).tolist(), k=5, filters=filters)
+
+    assert len(results) == 5
+    assert {doc.metadata["city"] for doc, _ in results} == {"Montpellier"}
+    assert searcher.stats()["plans"]["prefilter"] == 0
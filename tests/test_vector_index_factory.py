@@ -0,0 +1,121 @@
+"""
+Tests unitaires pour les index FAISS configurables (index_factory.py).
+"""
+
+import faiss
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from tests.conftest import TableEmbeddings, vector_batches
+from vectors.index_factory import (
+    create_factory_index,
+    get_search_params,
+    load_index_params,
+    set_search_params,
+)
+
+
+@pytest.fixture
+def vectors():
+    """500 vecteurs de dimension 16."""
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(500, 16)).astype(np.float32)
+
+
+def _documents(vectors):
+    return [Document(page_content=f"doc-{i}") for i in range(len(vectors))]
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "index_factory,expected",
+    [("IVF8,Flat", {"nprobe": 8}), ("HNSW16", {"efSearch": 128})],
+)
+def test_factory_vector_store_persists_search_params(
+    vectors, tmp_path, index_factory, expected
+):
+    """Teste l'entraînement de l'index et la relecture de ses paramètres."""
+    from vectors.vectors import (
+        create_vector_store_from_batches,
+        load_vector_store,
+        save_vector_store,
+    )
+
+    embeddings = TableEmbeddings(vectors)
+    vector_store = create_vector_store_from_batches(
+        _documents(vectors),
+        vector_batches(vectors, 64),
+        embeddings,
+        index_factory=index_factory,
+        search_params={"nprobe": 8, "efSearch": 128},
+    )
+
+    assert vector_store.index.is_trained
+    assert vector_store.index.ntotal == 500
+    assert get_search_params(vector_store.index) == expected
+
+    save_vector_store(vector_store, str(tmp_path))
+    assert load_index_params(str(tmp_path))["search_params"] == expected
+
+    loaded = load_vector_store(str(tmp_path), embeddings)
+    assert get_search_params(loaded.index) == expected
+    results = loaded.similarity_search("doc-42", k=1)
+    assert results[0].page_content == "doc-42"
+
+    # Les paramètres explicites (ex: FAISS_NPROBE) priment sur ceux enregistrés
+    loaded = load_vector_store(
+        str(tmp_path), embeddings, search_params={"nprobe": 2, "efSearch": 32}
+    )
+    assert set(get_search_params(loaded.index).values()) <= {2, 32}
+
+
+@pytest.mark.unit
+def test_set_search_params_caps_nprobe(vectors):
+    """Teste que nprobe est borné par le nombre de listes IVF."""
+    index = create_factory_index(16, "IVF4,Flat")
+    index.train(vectors)
+
+    assert set_search_params(index, {"nprobe": 100, "efSearch": 10}) == {"nprobe": 4}
+
+
+@pytest.mark.unit
+def test_factory_index_requires_enough_training_vectors(vectors):
+    """Teste le rejet d'un corpus trop petit pour le nombre de listes IVF."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    with pytest.raises(ValueError, match="Pas assez de vecteurs"):
+        create_vector_store_from_batches(
+            _documents(vectors[:10]),
+            vector_batches(vectors[:10], 4),
+            TableEmbeddings(vectors),
+            index_factory="IVF64,Flat",
+        )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize("index_factory", ["PQ4", "OPQ4,PQ4", "IVF4,PQ4"])
+def test_pq_index_requires_enough_training_vectors(vectors, index_factory):
+    """Teste le rejet d'un corpus plus petit que le codebook PQ (256 centroïdes)."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    with pytest.raises(ValueError, match="PQ à 256 centroïdes"):
+        create_vector_store_from_batches(
+            _documents(vectors[:200]),
+            vector_batches(vectors[:200], 64),
+            TableEmbeddings(vectors),
+            index_factory=index_factory,
+        )
+
+
+@pytest.mark.unit
+def test_create_factory_index_rejects_invalid_description():
+    """Teste le rejet d'une chaîne index_factory invalide."""
+    with pytest.raises(ValueError, match="Index FAISS invalide"):
+        create_factory_index(16, "NotAnIndex")
+
+
+@pytest.mark.unit
+def test_flat_index_has_no_search_params():
+    """Teste qu'un index exact n'a aucun paramètre de recherche."""
+    assert get_search_params(faiss.IndexFlatL2(16)) == {}
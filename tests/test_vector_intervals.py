@@ -0,0 +1,138 @@
+"""
+Tests unitaires pour l'index des intervalles de dates (intervals.py).
+"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from tests.conftest import TableEmbeddings
+from vectors.filtering import FilteredSearcher, MetadataIndex
+from vectors.intervals import DateIntervalIndex, day_window, parse_timestamp
+
+
+# (date_debut, date_fin) des événements, deux chunks chacun
+EVENTS = [
+    ("2025-07-13T21:00:00+02:00", "2025-07-13T23:00:00+02:00"),
+    ("2025-07-14T22:00:00Z", "2025-07-14T23:30:00Z"),  # 15 juillet à Paris
+    ("2025-07-01T10:00:00+02:00", "2025-08-31T18:00:00+02:00"),  # exposition
+    ("2025-07-14T10:00:00+02:00", None),
+    (None, None),
+]
+
+
+@pytest.fixture
+def vectors():
+    """10 vecteurs de dimension 8."""
+    return np.random.default_rng(0).normal(size=(10, 8)).astype(np.float32)
+
+
+@pytest.fixture
+def vector_store(vectors):
+    """Vector store de 5 événements de deux chunks chacun."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    documents = []
+    for i in range(len(vectors)):
+        start, end = EVENTS[i // 2]
+        metadata = {"event_id": f"evt_{i // 2}", "city": "Toulouse"}
+        if start:
+            metadata["date_debut"] = start
+        if end:
+            metadata["date_fin"] = end
+        documents.append(Document(page_content=f"doc-{i}", metadata=metadata))
+    return create_vector_store_from_batches(
+        documents, [(0, vectors)], TableEmbeddings(vectors)
+    )
+
+
+@pytest.mark.unit
+def test_date_interval_index_events_on(vector_store):
+    """Teste la liste des événements d'une journée (heure de Paris, un chunk par événement)."""
+    index = DateIntervalIndex.from_vector_store(vector_store)
+    assert index.stats() == {"dated_chunks": 8, "events": 4}
+
+    def event_ids(day, limit=None):
+        positions = index.events(*day_window(day), limit=limit)
+        return [f"evt_{p // 2}" for p in positions]
+
+    assert event_ids(date(2025, 7, 14)) == ["evt_2", "evt_3"]
+    assert event_ids(date(2025, 7, 15)) == ["evt_2", "evt_1"]
+    assert event_ids(date(2025, 7, 13), limit=1) == ["evt_2"]
+    assert event_ids(date(2025, 9, 1)) == []
+
+
+@pytest.mark.unit
+def test_chunks_without_event_id_are_distinct_events(vectors):
+    """Teste qu'un chunk daté sans event_id n'est pas fusionné avec les autres."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    documents = [
+        Document(page_content=f"doc-{i}", metadata={"date_debut": "2025-07-14T10:00:00"})
+        for i in range(3)
+    ]
+    vector_store = create_vector_store_from_batches(
+        documents, [(0, vectors[:3])], TableEmbeddings(vectors)
+    )
+    index = DateIntervalIndex.from_vector_store(vector_store)
+
+    assert index.stats() == {"dated_chunks": 3, "events": 3}
+    assert index.events(*day_window(date(2025, 7, 14))) == [0, 1, 2]
+
+
+@pytest.mark.unit
+def test_date_interval_index_mask(vector_store):
+    """Teste la bitmap des chunks qui chevauchent une fenêtre de plusieurs jours."""
+    index = DateIntervalIndex.from_vector_store(vector_store)
+
+    mask = index.mask(*day_window(date(2025, 7, 13), date(2025, 7, 14)))
+    assert np.flatnonzero(mask).tolist() == [0, 1, 4, 5, 6, 7]
+
+
+@pytest.mark.unit
+def test_overlapping_matches_brute_force():
+    """Teste la recherche par les débuts (date ancienne) et par les fins (date récente)."""
+    rng = np.random.default_rng(0)
+    starts = np.sort(rng.integers(0, 1000, size=500))
+    ends = starts + rng.integers(0, 50, size=500)
+    index = DateIntervalIndex(
+        500, starts, ends, np.arange(500), np.array([f"evt_{i}" for i in range(500)])
+    )
+
+    for start, end in [(10, 20), (500, 510), (980, 1200), (-5, -1), (0, 2000)]:
+        expected = np.flatnonzero((starts <= end) & (ends >= start))
+        np.testing.assert_array_equal(index.overlapping(start, end), expected)
+
+
+@pytest.mark.unit
+def test_filtered_search_with_date_range(vector_store, vectors):
+    """Teste la combinaison d'un filtre de métadonnées et d'une fenêtre de dates."""
+    searcher = FilteredSearcher(
+        vector_store,
+        MetadataIndex.from_vector_store(vector_store),
+        date_index=DateIntervalIndex.from_vector_store(vector_store),
+    )
+
+    results = searcher.search(
+        vectors[8].tolist(),
+        k=3,
+        filters={"city": ["Toulouse"]},
+        date_range=day_window(date(2025, 7, 15)),
+    )
+    assert len(results) == 3
+    assert {doc.metadata["event_id"] for doc, _ in results} <= {"evt_1", "evt_2"}
+
+    without_index = FilteredSearcher(vector_store, MetadataIndex.from_vector_store(vector_store))
+    with pytest.raises(ValueError, match="index de dates absent"):
+        without_index.search(vectors[0].tolist(), k=3, filters={}, date_range=(0, 1))
+
+
+@pytest.mark.unit
+def test_parse_timestamp():
+    """Teste la lecture des dates des métadonnées."""
+    assert parse_timestamp("2025-07-14T00:00:00Z") == 1752451200
+    assert parse_timestamp("2025-07-14T00:00:00") == 1752451200
+    assert parse_timestamp("") is None
+    assert parse_timestamp("bientôt") is None
@@ -0,0 +1,110 @@
+"""
+Tests unitaires pour la quantification des vecteurs stockés (quantization.py).
+"""
+
+import faiss
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+
+from tests.conftest import TableEmbeddings, vector_batches
+from vectors.quantization import (
+    EXACT_VECTORS_FILENAME,
+    ExactRescorer,
+    bytes_per_vector,
+    load_exact_vectors,
+    quantization_factory,
+)
+from vectors.reduction import RecallEvaluator
+
+
+@pytest.fixture
+def vectors():
+    """2000 vecteurs de dimension 32."""
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(2000, 32)).astype(np.float32)
+
+
+def _build(vectors, tmp_path, quantization):
+    from vectors.vectors import create_vector_store_from_batches
+
+    return create_vector_store_from_batches(
+        [Document(page_content=f"doc-{i}") for i in range(len(vectors))],
+        vector_batches(vectors, 256),
+        TableEmbeddings(vectors),
+        quantization=quantization,
+        exact_vectors_path=str(tmp_path / EXACT_VECTORS_FILENAME),
+    )
+
+
+@pytest.mark.unit
+@pytest.mark.parametrize(
+    "quantization,expected", [("sq8", 32), ("sq4", 16), ("opq8", 8)]
+)
+def test_quantized_index_reduces_vector_size(vectors, tmp_path, quantization, expected):
+    """Teste la taille des vecteurs encodés (128 octets en float32)."""
+    vector_store = _build(vectors, tmp_path, quantization)
+
+    assert vector_store.index.ntotal == 2000
+    assert bytes_per_vector(vector_store.index) == expected
+
+
+@pytest.mark.unit
+def test_exact_rescoring_recovers_recall(vectors, tmp_path):
+    """Teste que le reclassement exact retrouve le top-k d'une recherche exacte."""
+    vector_store = _build(vectors, tmp_path, "sq4")
+    exact_vectors = load_exact_vectors(str(tmp_path))
+    np.testing.assert_array_equal(exact_vectors, vectors)
+
+    evaluator = RecallEvaluator(vectors[:50] + 0.05, k=10)
+    evaluator.observe(vectors)
+    rescorer = ExactRescorer(vector_store, exact_vectors, fetch_factor=4)
+
+    quantized = evaluator.report(vector_store.index)["recall@10"]
+    rescored = evaluator.report(rescorer)["recall@10"]
+    assert rescored >= quantized
+    assert rescored > 0.9
+
+    results = rescorer.similarity_search_with_score_by_vector(vectors[42].tolist(), k=3)
+    assert results[0][0].page_content == "doc-42"
+    assert results[0][1] == pytest.approx(0.0, abs=1e-5)
+    assert rescorer.stats() == {"fetch_factor": 4, "queries": 1}
+
+
+@pytest.mark.unit
+def test_exact_rescorer_rejects_misaligned_vectors(vectors, tmp_path):
+    """Teste le rejet de vecteurs exacts d'une autre construction."""
+    vector_store = _build(vectors, tmp_path, "sq8")
+
+    with pytest.raises(ValueError, match="désalignés"):
+        ExactRescorer(vector_store, vectors[:10])
+
+
+@pytest.mark.unit
+def test_quantization_factory():
+    """Teste la traduction des modes de quantification."""
+    assert quantization_factory("SQ8") == "SQ8"
+    assert quantization_factory("opq256") == "OPQ256,PQ256"
+    with pytest.raises(ValueError, match="Quantification inconnue"):
+        quantization_factory("int3")
+
+
+@pytest.mark.unit
+def test_quantization_excludes_index_factory(vectors):
+    """Teste le rejet d'une quantification combinée à index_factory."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    with pytest.raises(ValueError, match="exclusifs"):
+        create_vector_store_from_batches(
+            [Document(page_content="doc-0")],
+            [(0, vectors[:1])],
+            TableEmbeddings(vectors),
+            index_factory="IVF4,Flat",
+            quantization="sq8",
+        )
+
+
+@pytest.mark.unit
+def test_flat_index_bytes_per_vector():
+    """Teste la taille d'un vecteur dans un index exact."""
+    assert bytes_per_vector(faiss.IndexFlatL2(32)) == 128
@@ -0,0 +1,73 @@
+"""
+Tests unitaires pour la réduction PCA de l'index vectoriel (reduction.py).
+"""
+
+import faiss
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.documents import Document
+
+from tests.conftest import TableEmbeddings, vector_batches
+from vectors.reduction import RecallEvaluator, build_pca_index
+
+
+@pytest.fixture
+def low_rank_vectors():
+    """300 vecteurs de dimension 32 proches d'un sous-espace de dimension 6."""
+    rng = np.random.default_rng(0)
+    basis = rng.normal(size=(6, 32))
+    vectors = rng.normal(size=(300, 6)) @ basis + 0.01 * rng.normal(size=(300, 32))
+    return vectors.astype(np.float32)
+
+
+@pytest.mark.unit
+def test_recall_evaluator_matches_exact_search(low_rank_vectors):
+    """Teste que le top-k incrémental correspond à une recherche exacte."""
+    queries = low_rank_vectors[:5] + 0.1
+    evaluator = RecallEvaluator(queries, k=7)
+    for _, batch in vector_batches(low_rank_vectors, 64):
+        evaluator.observe(batch)
+
+    exact = faiss.IndexFlatL2(32)
+    exact.add(low_rank_vectors)
+
+    assert evaluator.report(exact, k_values=[1, 7]) == {"recall@1": 1.0, "recall@7": 1.0}
+
+
+@pytest.mark.unit
+def test_pca_vector_store_is_transparent(low_rank_vectors, tmp_path):
+    """Teste l'index réduit: requêtes en pleine dimension, sauvegarde et rappel."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    embeddings = TableEmbeddings(low_rank_vectors)
+    documents = [Document(page_content=f"doc-{i}") for i in range(len(low_rank_vectors))]
+    evaluator = RecallEvaluator(low_rank_vectors[:20], k=5)
+
+    vector_store = create_vector_store_from_batches(
+        documents,
+        vector_batches(low_rank_vectors, 64),
+        embeddings,
+        pca_dim=8,
+        recall_evaluator=evaluator,
+    )
+
+    assert isinstance(vector_store.index, faiss.IndexPreTransform)
+    assert vector_store.index.d == 32
+    assert vector_store.index.ntotal == 300
+    assert evaluator.report(vector_store.index)["recall@5"] > 0.9
+
+    # La PCA est sauvegardée avec l'index et appliquée aux requêtes au chargement
+    vector_store.save_local(str(tmp_path))
+    loaded = FAISS.load_local(
+        str(tmp_path), embeddings, allow_dangerous_deserialization=True
+    )
+    results = loaded.similarity_search("doc-42", k=1)
+    assert results[0].page_content == "doc-42"
+
+
+@pytest.mark.unit
+def test_build_pca_index_rejects_invalid_dimension(low_rank_vectors):
+    """Teste le rejet d'une dimension cible supérieure à celle d'origine."""
+    with pytest.raises(ValueError, match="Dimension PCA invalide"):
+        build_pca_index(low_rank_vectors, 64)
@@ -7,8 +7,10 @@ Ce module teste la gestion de la base vectorielle FAISS.
 from unittest.mock import patch, MagicMock
 from pathlib import Path
 
+import numpy as np
 import pytest
 from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
 
 
 @pytest.fixture
@@ -79,6 +81,93 @@ def test_create_vector_store_verbose_logging(mock_embeddings, mock_documents):
         assert mock_logger.info.call_count >= 2
 
 
+class ArrayEmbeddings(Embeddings):
+    """Modèle factice exposant embed_documents_array (chemin numpy direct)."""
+
+    def __init__(self):
+        self.list_calls = 0
+
+    def embed_documents_array(self, texts):
+        return np.array([[float(len(t)), 1.0, 0.0] for t in texts], dtype=np.float32)
+
+    def embed_documents(self, texts):
+        self.list_calls += 1
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0, 0.0]
+
+
+@pytest.mark.unit
+def test_create_vector_store_numpy_path(mock_documents):
+    """Teste que la matrice numpy est ajoutée à FAISS sans passer par des listes."""
+    from vectors.vectors import create_vector_store
+
+    embeddings = ArrayEmbeddings()
+    documents = mock_documents + [Document(page_content="Doc 3", metadata={"title": "T3"})]
+
+    vector_store = create_vector_store(documents, embeddings)
+
+    assert embeddings.list_calls == 0
+    assert vector_store.index.ntotal == 3
+    np.testing.assert_array_equal(vector_store.index.reconstruct(2), [5.0, 1.0, 0.0])
+
+    results = vector_store.similarity_search_with_score("Doc 4", k=1)
+    assert results[0][0].page_content == "Doc 3"
+    assert results[0][0].metadata == {"title": "T3"}
+
+
+class StreamingEmbeddings(ArrayEmbeddings):
+    """Modèle factice produisant les vecteurs par tranches de 2 documents."""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def iter_embed_documents(self, texts):
+        for offset in range(0, len(texts), 2):
+            chunk = texts[offset : offset + 2]
+            self.chunks.append(len(chunk))
+            yield offset, self.embed_documents_array(chunk)
+
+
+@pytest.mark.unit
+def test_create_vector_store_streaming_path(mock_documents):
+    """Teste la construction incrémentale de l'index à partir des tranches."""
+    from vectors.vectors import create_vector_store
+
+    embeddings = StreamingEmbeddings()
+    documents = mock_documents + [Document(page_content="Doc 3", metadata={"title": "T3"})]
+
+    vector_store = create_vector_store(documents, embeddings)
+
+    assert embeddings.chunks == [2, 1]
+    assert embeddings.list_calls == 0
+    assert vector_store.index.ntotal == 3
+    np.testing.assert_array_equal(vector_store.index.reconstruct(2), [5.0, 1.0, 0.0])
+
+
+@pytest.mark.unit
+def test_create_vector_store_from_batches_rejects_gaps(mock_documents):
+    """Teste le rejet de tranches non contiguës."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    batches = [(0, np.zeros((1, 3), dtype=np.float32)), (2, np.zeros((1, 3), dtype=np.float32))]
+    with pytest.raises(ValueError, match="Tranche de vecteurs inattendue"):
+        create_vector_store_from_batches(mock_documents, batches, ArrayEmbeddings())
+
+
+@pytest.mark.unit
+def test_create_vector_store_from_batches_size_mismatch(mock_documents):
+    """Teste le rejet d'une matrice dont la taille ne correspond pas aux documents."""
+    from vectors.vectors import create_vector_store_from_batches
+
+    with pytest.raises(ValueError, match="Nombre de vecteurs"):
+        create_vector_store_from_batches(
+            mock_documents, [(0, np.zeros((1, 3), dtype=np.float32))], ArrayEmbeddings()
+        )
+
+
 @pytest.mark.unit
 def test_save_vector_store_success(mock_embeddings, tmp_path):
     """Teste la sauvegarde d'un vector store."""
@@ -135,6 +224,37 @@ def test_load_vector_store_success(mock_embeddings, tmp_path):
         )
 
 
+@pytest.mark.unit
+@pytest.mark.parametrize("index_factory", [None, "IVF2,Flat"])
+def test_load_vector_store_mmap(tmp_path, index_factory):
+    """Teste le chargement mappé en mémoire (mêmes résultats que le chargement complet)."""
+    from vectors.vectors import (
+        create_vector_store_from_batches,
+        load_vector_store,
+        save_vector_store,
+    )
+
+    embeddings = ArrayEmbeddings()
+    texts = [f"doc {'x' * i}" for i in range(20)]
+    documents = [Document(page_content=t, metadata={"rank": i}) for i, t in enumerate(texts)]
+    vectors = embeddings.embed_documents_array(texts)
+    vector_store = create_vector_store_from_batches(
+        documents, [(0, vectors)], embeddings, index_factory=index_factory
+    )
+    save_vector_store(vector_store, str(tmp_path))
+
+    loaded = load_vector_store(str(tmp_path), embeddings, mmap=True)
+    expected = load_vector_store(str(tmp_path), embeddings)
+
+    assert loaded.index.ntotal == 20
+    results = loaded.similarity_search_with_score("doc xxx", k=3)
+    assert [(doc.metadata, score) for doc, score in results] == [
+        (doc.metadata, score)
+        for doc, score in expected.similarity_search_with_score("doc xxx", k=3)
+    ]
+    assert results[0][0].metadata == {"rank": 3}
+
+
 @pytest.mark.unit
 def test_load_vector_store_not_found(mock_embeddings, tmp_path):
     """Teste le chargement depuis un chemin inexistant."""